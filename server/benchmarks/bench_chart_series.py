@@ -0,0 +1,64 @@
+"""
+Benchmark: chart series latency and payload size as history grows.
+
+For histories of increasing length, times get_chart_series (LTTB and SQL
+buckets) for one (commodity, market) against returning every daily row,
+and reports the JSON payload size of each.
+
+Usage:
+    python benchmarks/bench_chart_series.py --years 1 5 20 --points 300
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import dumps  # noqa: E402
+from market_data_fetcher import MarketDataFetcher, parse_market_records  # noqa: E402
+from bench_market_backends import make_pages  # noqa: E402
+
+
+def timed(fn, repeat):
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3, len(dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chart series downsampling benchmark')
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--points', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as workdir:
+            # The random walk's jumps trip the anomaly detector; screening isn't what this measures
+            fetcher = MarketDataFetcher(os.path.join(workdir, 'bench.db'), anomaly_mode='off')
+            for page in make_pages(365 * years, 1, 5000):
+                fetcher._store_market_data(parse_market_records(page, datetime(2025, 1, 1)))
+            full_sql = ("SELECT date, AVG(price) FROM market_prices WHERE commodity = ? AND market_name = ?"
+                        " GROUP BY date ORDER BY date")
+            conn = fetcher._pool.get()
+            full = timed(lambda: conn.execute(full_sql, ('Wheat', 'Pune Market')).fetchall(), args.repeat)
+            lttb = timed(lambda: fetcher.get_chart_series('Wheat', 'Pune Market', points=args.points),
+                         args.repeat)
+            buckets = timed(lambda: fetcher.get_chart_series('Wheat', 'Pune Market', points=args.points,
+                                                             method='buckets'), args.repeat)
+            print(f"{years:3d}y  full {full[0]:7.2f} ms {full[1] / 1024:8.1f} KiB   "
+                  f"lttb {lttb[0]:7.2f} ms {lttb[1] / 1024:6.1f} KiB   "
+                  f"buckets {buckets[0]:7.2f} ms {buckets[1] / 1024:6.1f} KiB")
+            fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
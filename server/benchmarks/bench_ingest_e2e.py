@@ -0,0 +1,74 @@
+"""
+Benchmark: end-to-end market ingest against the local data.gov.in stub.
+
+Starts benchmarks/data_gov_stub.py in-process, points MarketDataFetcher at
+it and runs repeated fetch -> parse -> store cycles, reporting throughput and
+fetch latency percentiles. Failed fetches are counted rather than replaced
+with mock data, so upstream error rates show up in the numbers.
+
+Usage:
+    python benchmarks/bench_ingest_e2e.py --iterations 50 \\
+        --stub-args "--latency-ms 80 --jitter-ms 40 --slow-rate 0.05 --slow-ms 2000 --error-rate 0.02"
+"""
+
+import argparse
+import logging
+import os
+import shlex
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+from data_gov_stub import start_stub  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--stub-args', default='', help='Extra data_gov_stub.py arguments')
+    parser.add_argument('--normalized', action='store_true')
+    parser.add_argument('--wal', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    stub = start_stub(['--port', '0'] + shlex.split(args.stub_args))
+    base_url = f'http://127.0.0.1:{stub.server_port}'
+    db_path = os.path.join(tempfile.mkdtemp(), 'ingest.db')
+    fetcher = MarketDataFetcher(db_path, normalized=args.normalized, wal=args.wal, api_base_url=base_url)
+
+    fetch_times, cycle_times = [], []
+    failures = stored = 0
+    wall_start = time.perf_counter()
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        raw = fetcher._fetch_market_prices()
+        fetched = time.perf_counter()
+        fetch_times.append(fetched - start)
+        if raw is None:
+            failures += 1
+            continue
+        prices, _, _ = fetcher._store_market_data(fetcher._parse_market_data(raw))
+        stored += prices
+        cycle_times.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    stub.shutdown()
+
+    print(f"stub: {base_url} {args.stub_args}")
+    print(f"cycles: {args.iterations}, failed fetches: {failures}, price rows stored: {stored}")
+    print(f"throughput: {stored / wall:,.0f} rows/s over {wall:.2f} s")
+    for label, values in (('fetch', fetch_times), ('cycle', cycle_times)):
+        if values:
+            print(f"{label} ms: p50 {percentile(values, 50) * 1000:.0f}  p95 {percentile(values, 95) * 1000:.0f}  "
+                  f"p99 {percentile(values, 99) * 1000:.0f}  max {max(values) * 1000:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: peak memory and time to first byte for full-table JSON exports.
+
+Compares fetchall() + one json.dumps (the previous CLI behaviour) with
+MarketDataFetcher.iter_market_rows + json_stream.write_stream.
+
+Usage:
+    python benchmarks/bench_json_export.py --records 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import write_stream  # noqa: E402
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+from bench_market_records import make_raw  # noqa: E402
+
+
+class FirstByteSink:
+    """Discards output, remembering when the first write happened."""
+    
+    def __init__(self):
+        self.first_write = None
+        self.size = 0
+    
+    def write(self, data):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        self.size += len(data)
+    
+    def flush(self):
+        pass
+
+
+def export_buffered(fetcher, sink):
+    conn = fetcher._read_connection()
+    rows = conn.execute("SELECT * FROM market_prices ORDER BY id").fetchall()
+    sink.write(json.dumps(rows, default=str).encode('utf-8'))
+
+
+def export_streamed(fetcher, sink):
+    write_stream(fetcher.iter_market_rows('prices'), sink, 'json', 500)
+
+
+def measure(fn, fetcher):
+    sink = FirstByteSink()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(fetcher, sink)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, sink.first_write - start, total, sink.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON export benchmark')
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        fetcher = MarketDataFetcher(os.path.join(workdir, 'bench.db'))
+        raw = make_raw(args.records)
+        for i, record in enumerate(raw):
+            record['district'] = f'District {i}'
+        fetcher._store_market_data(fetcher._parse_market_data(raw))
+        for label, fn in (('buffered', export_buffered), ('streamed', export_streamed)):
+            peak, first_byte, total, size = measure(fn, fetcher)
+            print(f"{label:9s} peak={peak / 1024 / 1024:7.1f} MiB  first byte={first_byte * 1000:8.1f} ms  "
+                  f"total={total:6.2f}s  output={size / 1024 / 1024:6.1f} MiB")
+        fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
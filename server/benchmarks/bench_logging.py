@@ -0,0 +1,97 @@
+"""
+Benchmark: cost of per-record error logging on a dirty feed.
+
+Times a loop that logs one error per record through the previous
+synchronous FileHandler + StreamHandler setup and through the queued,
+rate-limited pipeline from log_pipeline, with and without ErrorTally. Console output goes to /dev/null
+so only formatting and file I/O are compared.
+
+Usage:
+    python benchmarks/bench_logging.py --records 100000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_pipeline import ErrorTally, install_logging  # noqa: E402
+
+logger = logging.getLogger('bench')
+
+
+def hot_loop(count):
+    start = time.perf_counter()
+    for i in range(count):
+        try:
+            float('n/a')
+        except ValueError as e:
+            logger.error("Error parsing record %s: %s", i, e)
+    return time.perf_counter() - start
+
+
+def tallied_loop(count):
+    start = time.perf_counter()
+    errors = ErrorTally(logger)
+    for _ in range(count):
+        try:
+            float('n/a')
+        except ValueError as e:
+            errors.add("Error parsing record", e)
+    errors.flush()
+    return time.perf_counter() - start
+
+
+def baseline_loop(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        try:
+            float('n/a')
+        except ValueError:
+            pass
+    return time.perf_counter() - start
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp()
+    sys.stderr = open(os.devnull, 'w')
+
+    sync_log = os.path.join(workdir, 'sync.log')
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.FileHandler(sync_log), logging.StreamHandler()],
+    )
+    sync_s = hot_loop(args.records)
+    reset_root()
+
+    queued_log = os.path.join(workdir, 'queued.log')
+    handler = install_logging(queued_log)
+    queued_s = hot_loop(args.records)
+    tallied_s = tallied_loop(args.records)
+    baseline_s = baseline_loop(args.records)
+    handler.flush_suppressed()
+
+    out = sys.__stdout__
+    print(f"no logging:           {baseline_s:.2f} s", file=out)
+    print(f"sync handlers:        {sync_s:.2f} s, {os.path.getsize(sync_log) / 1e6:.1f} MB written", file=out)
+    print(f"queued, rate-limited: {queued_s:.2f} s", file=out)
+    print(f"queued + ErrorTally:  {tallied_s:.2f} s", file=out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: write and range-query throughput of the market storage backends.
+
+Drives every backend through the MarketStore interface with the same
+synthetic history (commodities x markets x districts x days), written one
+page-sized batch at a time as an ingest would, then times random
+commodity/date-window range queries. Both backends write only price rows,
+upserted on the natural key.
+
+SQLite always runs; the Mongo time-series backend runs when --mongo-uri (or
+MONGO_URI) is set, in a throwaway collection that is dropped afterwards.
+
+Usage:
+    python benchmarks/bench_market_backends.py --days 365 --queries 200
+    python benchmarks/bench_market_backends.py --mongo-uri mongodb://localhost:27017
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import parse_market_records  # noqa: E402
+from market_store import MongoMarketStore, SQLiteMarketStore  # noqa: E402
+
+COMMODITIES = ['Wheat', 'Rice', 'Maize', 'Soybean', 'Cotton', 'Onion', 'Tomato', 'Chilli']
+MARKETS = [('Delhi Mandi', 'Delhi'), ('Mumbai APMC', 'Maharashtra'),
+           ('Kolkata Market', 'West Bengal'), ('Pune Market', 'Maharashtra')]
+START = date(2024, 1, 1)
+
+
+def make_pages(days, districts, page_size):
+    """Raw API records for every series and day, cut into pages."""
+    records = [
+        {
+            'commodity': commodity,
+            'market': market,
+            'state': state,
+            'district': f'District {d + 1}',
+            'price': str(1500 + (i * 37 + day * 11) % 2000),
+            'unit': 'Quintal',
+            'date': (START + timedelta(days=day)).isoformat(),
+        }
+        for day in range(days)
+        for i, commodity in enumerate(COMMODITIES)
+        for market, state in MARKETS
+        for d in range(districts)
+    ]
+    return [records[i:i + page_size] for i in range(0, len(records), page_size)]
+
+
+def bench(store, pages, days, queries, window, seed):
+    batches = [parse_market_records(page) for page in pages]
+    rows = sum(len(batch) for batch in batches)
+    start = time.perf_counter()
+    for batch in batches:
+        store.write_batch(batch)
+    write_elapsed = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    returned = 0
+    start = time.perf_counter()
+    for _ in range(queries):
+        first = START + timedelta(days=rng.randrange(max(1, days - window)))
+        returned += len(store.price_range(rng.choice(COMMODITIES), first, first + timedelta(days=window - 1)))
+    query_elapsed = time.perf_counter() - start
+    return rows, write_elapsed, returned, query_elapsed
+
+
+def report(label, queries, rows, write_elapsed, returned, query_elapsed):
+    print(f"{label:8s} write: {rows / write_elapsed:10,.0f} rows/s ({write_elapsed:6.2f}s)   "
+          f"range: {queries / query_elapsed:8,.1f} queries/s, {returned / query_elapsed:10,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market storage backend benchmark')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--districts', type=int, default=3)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--window', type=int, default=30, help='Days per range query')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI'))
+    parser.add_argument('--granularity', default='hours')
+    args = parser.parse_args()
+
+    pages = make_pages(args.days, args.districts, args.page_size)
+    print(f"{sum(len(p) for p in pages):,} rows in {len(pages)} pages, "
+          f"{args.queries} queries over {args.window}-day windows")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = SQLiteMarketStore(os.path.join(workdir, 'bench.db'))
+        try:
+            report('sqlite', args.queries, *bench(store, pages, args.days, args.queries, args.window, args.seed))
+        finally:
+            store.close()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+
+        db = MongoClient(args.mongo_uri)[os.environ.get('MONGO_DB', 'agriai_bench')]
+        name = f'bench_market_{os.getpid()}'
+        store = MongoMarketStore(db, collection=name, granularity=args.granularity)
+        try:
+            report('mongo', args.queries, *bench(store, pages, args.days, args.queries, args.window, args.seed))
+        finally:
+            db.drop_collection(name)
+
+
+if __name__ == '__main__':
+    main()
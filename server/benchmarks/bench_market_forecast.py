@@ -0,0 +1,79 @@
+"""
+Benchmark: batch forecasting of thousands of price series on one CPU.
+
+Builds a synthetic (series x days) matrix of random walks with a weekly
+cycle, then times forecast_all over every series at once against the same
+models fitted one series at a time (timed on a sample and scaled up), and
+the SQLite write of the resulting market_forecasts rows.
+
+Usage:
+    python benchmarks/bench_market_forecast.py --series 5000 --days 365 --horizon 14
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import market_forecast  # noqa: E402
+from market_migrations import migrate  # noqa: E402
+
+
+def make_matrix(series, days, seed):
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(1000, 5000, size=(series, 1))
+    walk = np.cumsum(rng.normal(0, 15, size=(series, days)), axis=1)
+    weekly = rng.uniform(0, 60, size=(series, 1)) * np.sin(2 * np.pi * np.arange(days) / 7)
+    return base + walk + weekly
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batch forecast benchmark')
+    parser.add_argument('--series', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--horizon', type=int, default=14)
+    parser.add_argument('--sample', type=int, default=200, help='Series fitted one at a time for the baseline')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    matrix = make_matrix(args.series, args.days, args.seed)
+    keys = [(f'Commodity {i // 50}', f'Market {i % 50}') for i in range(args.series)]
+    print(f"{args.series:,} series x {args.days} days, {args.horizon}-day horizon, "
+          f"{len(market_forecast.MODELS)} models")
+
+    start = time.perf_counter()
+    results = market_forecast.forecast_all(matrix, args.horizon)
+    batched = time.perf_counter() - start
+
+    sample = min(args.sample, args.series)
+    start = time.perf_counter()
+    for i in range(sample):
+        market_forecast.forecast_all(matrix[i:i + 1], args.horizon)
+    per_series = (time.perf_counter() - start) / sample * args.series
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'bench.db')
+        migrate(path)
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        rows = market_forecast.forecast_rows(keys, date(2025, 1, 1), args.horizon, results, datetime.now())
+        with conn:
+            conn.executemany("INSERT INTO market_forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        write = time.perf_counter() - start
+        stored = conn.execute("SELECT COUNT(*) FROM market_forecasts").fetchone()[0]
+        conn.close()
+
+    print(f"batched fit   {batched:8.3f} s")
+    print(f"per-series    {per_series:8.3f} s (scaled from {sample} series)   {per_series / batched:6.1f}x")
+    print(f"store         {write:8.3f} s ({stored:,} rows)")
+
+
+if __name__ == '__main__':
+    main()
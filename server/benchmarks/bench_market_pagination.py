@@ -0,0 +1,84 @@
+"""
+Benchmark: keyset vs OFFSET page latency, and batched vs per-key lookups.
+
+Pages through the price table newest first, timing the first page and
+pages at increasing depth with get_market_page cursors against the same
+pages fetched with LIMIT/OFFSET. Then compares one get_market_batch call
+for several commodities with one get_market_data_from_db call per commodity.
+
+Usage:
+    python benchmarks/bench_market_pagination.py --days 365 --depths 10 100 1000 2000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher, parse_market_records  # noqa: E402
+from bench_market_backends import COMMODITIES, make_pages  # noqa: E402
+
+
+def timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market pagination benchmark')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--districts', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--depths', type=int, nargs='+', default=[10, 100, 1000, 2000])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--normalized', action='store_true')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fetcher = MarketDataFetcher(os.path.join(workdir, 'bench.db'), normalized=args.normalized)
+        # Ten ingest pages share each last_updated, as a crawl run would
+        for i, page in enumerate(make_pages(args.days, args.districts, 1000)):
+            fetcher._store_market_data(parse_market_records(page, datetime(2025, 1, 1) + timedelta(hours=i // 10)))
+        table = fetcher._tables['prices']
+        total = fetcher._pool.get().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        print(f"{total:,} price rows, {args.page_size} rows per page")
+
+        cursors = {0: None}
+        cursor, page_no = None, 0
+        while page_no < max(args.depths):
+            cursor = fetcher.get_market_page('prices', cursor=cursor, limit=args.page_size)['next_cursor']
+            page_no += 1
+            if cursor is None:
+                break
+            cursors[page_no] = cursor
+
+        offset_sql = f"SELECT * FROM {table} ORDER BY last_updated DESC, id DESC LIMIT ? OFFSET ?"
+        conn = fetcher._pool.get()
+        for depth in [0] + args.depths:
+            if depth not in cursors:
+                print(f"page {depth:6d}: beyond the last page")
+                continue
+            keyset = timed(lambda: fetcher.get_market_page('prices', cursor=cursors[depth], limit=args.page_size),
+                           args.repeat)
+            offset = timed(lambda: conn.execute(offset_sql, (args.page_size, depth * args.page_size)).fetchall(),
+                           args.repeat)
+            print(f"page {depth:6d}: keyset {keyset:7.2f} ms   offset {offset:7.2f} ms")
+
+        wanted = COMMODITIES[:5]
+        per_key = timed(lambda: [fetcher.get_market_data_from_db(commodity=c) for c in wanted], args.repeat)
+        batched = timed(lambda: fetcher.get_market_batch(wanted, limit=100), args.repeat)
+        print(f"{len(wanted)} commodities: per-key calls {per_key:7.2f} ms   batch {batched:7.2f} ms")
+        fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
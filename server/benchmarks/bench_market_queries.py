@@ -0,0 +1,68 @@
+"""
+Benchmark: per-query overhead of small market lookups.
+
+Compares opening a fresh connection and concatenating the query per call
+(the previous behaviour) against the pooled connection and fixed query
+shapes used by get_market_data_from_db.
+
+Usage:
+    python benchmarks/bench_market_queries.py --queries 5000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+from bench_market_records import make_raw  # noqa: E402
+
+
+def fresh_connection_lookup(db_path, commodity):
+    """One lookup the way get_market_data_from_db used to do it."""
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        results = []
+        for table, limit in (('market_prices', 100), ('market_trends', 50), ('market_demand', 50)):
+            query = f"SELECT * FROM {table} WHERE 1=1"
+            params = []
+            if commodity:
+                query += " AND commodity LIKE ?"
+                params.append(f"%{commodity}%")
+            query += f" ORDER BY last_updated DESC LIMIT {limit}"
+            cursor.execute(query, params)
+            results.append(cursor.fetchall())
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market lookup overhead benchmark')
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--records', type=int, default=2000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'bench.db')
+        fetcher = MarketDataFetcher(db_path)
+        fetcher._store_market_data(fetcher._parse_market_data(make_raw(args.records)))
+        # A commodity that matches nothing isolates per-query overhead from row transfer
+        for label, lookup in (
+            ('fresh connection', lambda: fresh_connection_lookup(db_path, 'Saffron')),
+            ('pooled', lambda: fetcher.get_market_data_from_db(commodity='Saffron')),
+        ):
+            lookup()
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                lookup()
+            elapsed = time.perf_counter() - start
+            print(f"{label:17s} {elapsed / args.queries * 1e6:8.1f} us/lookup")
+        fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
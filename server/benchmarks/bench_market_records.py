@@ -0,0 +1,105 @@
+"""
+Benchmark: memory and allocations for parsed market records.
+
+Compares the previous representation (three dicts per input record, each
+with its own datetime.now()) against MarketBatch/MarketRecord.
+
+Usage:
+    python benchmarks/bench_market_records.py --records 50000
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+
+
+def make_raw(count):
+    commodities = ['Wheat', 'Rice', 'Maize', 'Soybean', 'Cotton', 'Onion', 'Tomato', 'Chilli']
+    markets = ['Delhi Mandi', 'Mumbai APMC', 'Kolkata Market', 'Pune Market']
+    states = ['Delhi', 'Maharashtra', 'West Bengal', 'Maharashtra']
+    # Build fresh strings per record, as json.loads would
+    return [
+        {
+            'commodity': ''.join(commodities[i % len(commodities)]),
+            'market': ''.join(markets[i % len(markets)]),
+            'state': ''.join(states[i % len(states)]),
+            'district': f'District {i % 10 + 1}',
+            'price': str(2000 + i % 1000),
+            'unit': ''.join('Quintal'),
+            'date': '2025-01-15',
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_parse(raw):
+    """The pre-MarketBatch shape: three dicts per record."""
+    prices, trends, demand = [], [], []
+    for record in raw:
+        commodity = str(record.get('commodity', '')).strip()
+        market_name = str(record.get('market', '')).strip()
+        state = str(record.get('state', '')).strip()
+        district = str(record.get('district', '')).strip()
+        price = float(str(record.get('price', '0')).strip())
+        unit = str(record.get('unit', 'Quintal')).strip()
+        market_date = datetime.strptime(record['date'], '%Y-%m-%d').date()
+        prices.append({
+            'commodity': commodity, 'market_name': market_name, 'state': state,
+            'district': district, 'price': price, 'unit': unit,
+            'date': market_date, 'last_updated': datetime.now(),
+        })
+        trends.append({
+            'commodity': commodity, 'market_name': market_name,
+            'price_today': price, 'price_yesterday': price * 0.95,
+            'price_change': price * 0.05, 'change_percentage': 5.0,
+            'date': market_date, 'last_updated': datetime.now(),
+        })
+        demand.append({
+            'commodity': commodity, 'market_name': market_name,
+            'demand_level': 'High', 'supply_level': 'Medium',
+            'arrival_quantity': price * 10, 'unit': unit,
+            'date': market_date, 'last_updated': datetime.now(),
+        })
+    return prices, trends, demand
+
+
+def measure(fn, raw):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn(raw)
+    after = tracemalloc.take_snapshot()
+    stats = after.compare_to(before, 'filename')
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in stats)
+    count = sum(s.count_diff for s in stats)
+    del result
+    return size, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market record memory benchmark')
+    parser.add_argument('--records', type=int, default=50000)
+    args = parser.parse_args()
+
+    raw = make_raw(args.records)
+    fetcher = MarketDataFetcher.__new__(MarketDataFetcher)
+
+    legacy_size, legacy_count = measure(legacy_parse, raw)
+    batch_size, batch_count = measure(fetcher._parse_market_data, raw)
+
+    n = args.records
+    print(f"records:           {n}")
+    print(f"legacy bytes/rec:  {legacy_size / n:8.1f}   allocs/rec: {legacy_count / n:6.2f}")
+    print(f"batch bytes/rec:   {batch_size / n:8.1f}   allocs/rec: {batch_count / n:6.2f}")
+    print(f"memory reduction:  {legacy_size / max(batch_size, 1):.1f}x")
+    print(f"alloc reduction:   {legacy_count / max(batch_count, 1):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: on-disk size of plain vs normalized (dimension-encoded) market storage.
+
+Ingests the same synthetic batch into two fresh databases and reports the
+file size and, where SQLite was built with the dbstat table, the space used
+by tables and indexes.
+
+Usage:
+    python benchmarks/bench_market_storage.py --records 100000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+from bench_market_records import make_raw  # noqa: E402
+
+
+def space_by_kind(db_path):
+    """Return (table_bytes, index_bytes), or None if dbstat is unavailable."""
+    with sqlite3.connect(db_path) as conn:
+        try:
+            rows = conn.execute("""
+                SELECT m.type, SUM(s.pgsize)
+                FROM dbstat s JOIN sqlite_master m ON m.name = s.name
+                GROUP BY m.type
+            """).fetchall()
+        except sqlite3.Error:
+            return None
+    sizes = dict(rows)
+    return sizes.get('table', 0), sizes.get('index', 0)
+
+
+def run(normalized, raw, workdir):
+    db_path = os.path.join(workdir, 'normalized.db' if normalized else 'plain.db')
+    fetcher = MarketDataFetcher(db_path, normalized=normalized)
+    batch = fetcher._parse_market_data(raw)
+    start = time.perf_counter()
+    fetcher._store_market_data(batch)
+    elapsed = time.perf_counter() - start
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("VACUUM")
+    return os.path.getsize(db_path), space_by_kind(db_path), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market storage size benchmark')
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    raw = make_raw(args.records)
+    with tempfile.TemporaryDirectory() as workdir:
+        for normalized in (False, True):
+            size, space, elapsed = run(normalized, raw, workdir)
+            label = 'normalized' if normalized else 'plain'
+            print(f"{label:10s} file: {size / 1024:10.1f} KiB   store: {elapsed:6.2f}s")
+            if space:
+                print(f"{'':10s} tables: {space[0] / 1024:8.1f} KiB   indexes: {space[1] / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: record normalization throughput.
+
+Compares the hand-rolled chained record.get() parsing the fetchers used to
+do with the shared RecordMapper, for the market and scheme schemas, and
+prints the per-field rejection report for a feed with drifted field names.
+
+Usage:
+    python benchmarks/bench_normalization.py --records 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from sys import intern
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gov_schemes_fetcher import SCHEME_FIELDS  # noqa: E402
+from market_data_fetcher import MARKET_FIELDS  # noqa: E402
+from record_mapping import RecordMapper  # noqa: E402
+from bench_market_records import make_raw  # noqa: E402
+
+
+def legacy_market(record):
+    commodity = intern(str(record.get('commodity', record.get('commodity_name', ''))).strip())
+    market_name = intern(str(record.get('market', record.get('market_name', record.get('mandi', '')))).strip())
+    state = intern(str(record.get('state', record.get('state_name', ''))).strip())
+    district = intern(str(record.get('district', record.get('district_name', ''))).strip())
+    price = 0.0
+    for field in ['price', 'modal_price', 'min_price', 'max_price', 'arrival_price']:
+        price_str = str(record.get(field, '0')).strip()
+        if price_str and price_str != '0' and price_str != 'null':
+            try:
+                price = float(price_str.replace(',', ''))
+                break
+            except ValueError:
+                continue
+    unit = intern(str(record.get('unit', 'Quintal')).strip())
+    date_str = record.get('date', '')
+    market_date = None
+    if date_str:
+        try:
+            market_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            try:
+                market_date = datetime.strptime(date_str, '%d/%m/%Y').date()
+            except ValueError:
+                pass
+    return [commodity, market_name, state, district, price, unit, market_date]
+
+
+def legacy_scheme(rec):
+    return {
+        "schemeId": str(rec.get("scheme_id") or rec.get("id") or "").strip(),
+        "schemeName": str(rec.get("scheme_name") or rec.get("scheme") or rec.get("title") or "").strip(),
+        "description": str(rec.get("description", "")).strip(),
+        "ministry": str(rec.get("implementing_ministry", rec.get("ministry", ""))).strip(),
+        "startDate": rec.get("start_date"),
+        "eligibility": str(rec.get("eligibility_criteria", rec.get("eligibility", ""))).strip(),
+        "region": str(rec.get("region", "Central")).strip(),
+        "state": str(rec.get("state", "")).strip(),
+    }
+
+
+def make_schemes(count):
+    return [
+        {
+            "id": f"S{i}", "title": f"Scheme {i}", "description": "Support for farmers",
+            "ministry": "Agriculture", "start_date": "2020-01-01",
+            "eligibility": "Small farmers", "state": "Punjab",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+    n = args.records
+
+    for label, rows, legacy, fields in (
+        ('market', make_raw(n), legacy_market, MARKET_FIELDS),
+        ('scheme', make_schemes(n), legacy_scheme, SCHEME_FIELDS),
+    ):
+        mapper = RecordMapper(fields)
+        extract = mapper.extract_dict if label == 'scheme' else mapper.extract
+        legacy_s = timed(legacy, rows)
+        mapped_s = timed(extract, rows)
+        print(f"{label}: legacy {n / legacy_s:,.0f} rec/s, mapper {n / mapped_s:,.0f} rec/s")
+
+    drifted = [{'commodity_name': r['commodity'], 'mandi': r['market'], 'modal_price': 'NA', 'date': r['date']}
+               for r in make_raw(1000)]
+    mapper = RecordMapper(MARKET_FIELDS)
+    for row in drifted:
+        mapper.extract(row)
+    print(f"drifted feed report: {mapper.report()}")
+
+
+if __name__ == '__main__':
+    main()
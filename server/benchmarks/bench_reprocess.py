@@ -0,0 +1,60 @@
+"""
+Benchmark: archive size and reprocess throughput for archived market pages.
+
+Archives synthetic data.gov.in pages (the stub's generator) and replays
+them with MarketDataFetcher.reprocess using one and several parser
+processes.
+
+Usage:
+    python benchmarks/bench_reprocess.py --pages 60 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MARKET_RESOURCE_ID, MarketDataFetcher  # noqa: E402
+from payload_archive import PayloadArchive  # noqa: E402
+from data_gov_stub import StubConfig, build_parser, synthetic_page  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    workdir = tempfile.mkdtemp()
+    archive = PayloadArchive(os.path.join(workdir, 'archive'))
+    config = StubConfig(build_parser().parse_args(['--total', str(args.pages * 1000), '--dirty-rate', '0.01']))
+    raw_bytes = 0
+    start = datetime(2025, 1, 1)
+    for page in range(args.pages):
+        body = json.dumps(synthetic_page(config, MARKET_RESOURCE_ID, page * 1000, 1000)).encode()
+        raw_bytes += len(body)
+        archive.store(MARKET_RESOURCE_ID, page * 1000, body, start + timedelta(hours=page))
+    stored_bytes = sum(
+        os.path.getsize(os.path.join(d, name))
+        for d, _, names in os.walk(os.path.join(archive.root, 'objects')) for name in names
+    )
+    print(f"archived {args.pages} pages: {raw_bytes / 1e6:.1f} MB raw -> {stored_bytes / 1e6:.2f} MB on disk")
+
+    for workers in sorted({1, args.workers}):
+        fetcher = MarketDataFetcher(os.path.join(workdir, f'reprocess_{workers}.db'), archive_dir=archive.root)
+        t = time.perf_counter()
+        result = fetcher.reprocess(workers=workers)
+        elapsed = time.perf_counter() - t
+        print(f"workers={workers}: {result['payloads']} pages, {args.pages * 1000 / elapsed:,.0f} records/s ({elapsed:.2f} s)")
+        fetcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: farmer-to-scheme matching latency and batch throughput.
+
+Compares a linear scan over per-scheme eligibility attributes with the
+bitset EligibilityIndex, for single lookups and a batch of profiles.
+
+Usage:
+    python benchmarks/bench_scheme_matching.py --schemes 2000 --profiles 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheme_matching import CATEGORIES, CROPS, STATES, EligibilityIndex, extract_eligibility  # noqa: E402
+
+
+def make_schemes(count, rng):
+    schemes = []
+    for i in range(count):
+        parts = ["Farmers"]
+        if rng.random() < 0.4:
+            parts.append(f"belonging to {rng.choice(list(CATEGORIES['sc'] + CATEGORIES['women']))}")
+        if rng.random() < 0.5:
+            parts.append(f"growing {rng.choice(list(CROPS))}")
+        if rng.random() < 0.3:
+            parts.append(f"with land up to {rng.choice([1, 2, 2.5, 5])} {rng.choice(['hectares', 'acres'])}")
+        state = rng.choice(STATES) if rng.random() < 0.6 else ""
+        schemes.append({"schemeId": f"S{i:05d}", "eligibility": " ".join(parts), "state": state})
+    return schemes
+
+
+def make_profiles(count, rng):
+    return [
+        {
+            "farmerId": f"F{i}",
+            "state": rng.choice(STATES),
+            "landholding": round(rng.choice([0.5, 1, 1.5, 2, 3, 5, 8]), 1),
+            "crops": rng.sample(list(CROPS), 2),
+            "categories": rng.sample(["sc", "st", "women", "tenant"], rng.randint(0, 1)),
+        }
+        for i in range(count)
+    ]
+
+
+def linear_match(attributes, profile):
+    state, land = profile["state"], profile["landholding"]
+    crops = set(profile["crops"])
+    categories = set(profile["categories"]) | ({"small"} if land <= 2 else set()) | ({"marginal"} if land <= 1 else set())
+    return [
+        scheme_id
+        for scheme_id, a in attributes
+        if (not a["states"] or state in a["states"])
+        and (not a["crops"] or crops & set(a["crops"]))
+        and (not a["categories"] or categories & set(a["categories"]))
+        and (a["maxLandHa"] is None or land <= a["maxLandHa"])
+        and (a["minLandHa"] is None or land >= a["minLandHa"])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schemes", type=int, default=2000)
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    attributes = [(s["schemeId"], extract_eligibility(s)) for s in make_schemes(args.schemes, rng)]
+    extract_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = EligibilityIndex(attributes)
+    build_s = time.perf_counter() - start
+    profiles = make_profiles(args.profiles, rng)
+    print(f"{args.schemes} schemes: extract {extract_s * 1000:.0f} ms, index build {build_s * 1000:.1f} ms")
+
+    sample = profiles[:1000]
+    start = time.perf_counter()
+    expected = [linear_match(attributes, p) for p in sample]
+    linear_us = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    got = [index.match(p) for p in sample]
+    index_us = (time.perf_counter() - start) / len(sample) * 1e6
+    assert got == expected, "index and linear scan disagree"
+    print(f"single match: linear {linear_us:.0f} us, index {index_us:.1f} us")
+
+    start = time.perf_counter()
+    matched = sum(len(ids) for _, ids in index.match_batch(profiles))
+    batch_s = time.perf_counter() - start
+    print(f"batch {args.profiles} profiles: {batch_s:.2f} s "
+          f"({args.profiles / batch_s:,.0f} profiles/s, {matched} matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: cold start time of the fetcher CLIs.
+
+Runs each command in a fresh interpreter with -X importtime, reports the
+wall time and the slowest top-level imports. Intended for local tracking
+before/after changes, not for CI.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    'gov_schemes_fetcher get_states': ['gov_schemes_fetcher.py', 'get_states'],
+    'import gov_schemes_fetcher': ['-c', 'import gov_schemes_fetcher'],
+    'import market_data_fetcher': ['-c', 'import market_data_fetcher'],
+}
+
+
+def parse_importtime(stderr):
+    """Return [(cumulative_us, module)] for top-level imports in -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|', 2)
+        # Nested imports are indented further under their parent
+        if len(name) - len(name.lstrip()) <= 3:
+            imports.append((int(cumulative_us), name.strip()))
+    return imports
+
+
+def run(args):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=SERVER_DIR, capture_output=True, text=True,
+        env=dict(os.environ, MONGO_URI=os.environ.get('MONGO_URI', '')),
+    )
+    return time.perf_counter() - start, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetcher CLI startup benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    for label, command in COMMANDS.items():
+        walls = []
+        imports = []
+        for _ in range(args.runs):
+            wall, imports = run(command)
+            walls.append(wall)
+        print(f"{label}: median {statistics.median(walls) * 1000:.1f} ms over {args.runs} runs")
+        for cumulative_us, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
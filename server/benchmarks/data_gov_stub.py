@@ -0,0 +1,212 @@
+"""
+Local stand-in for api.data.gov.in, for offline load tests of ingest.
+
+Serves paged `/resource/<id>` responses in the data.gov.in envelope
+(total, count, limit, offset, records) from one of three sources:
+
+- synthetic (default): deterministic mandi-price or scheme records,
+  `--total` per resource, with `--dirty-rate` of them carrying bad prices/dates
+- replay: pages previously saved under `--replay DIR`
+- record: proxies to `--upstream` and saves each page under `--record DIR`
+
+Upstream behaviour is shaped with `--latency-ms`/`--jitter-ms`, a slow tail
+(`--slow-rate`, `--slow-ms`), HTTP 503s (`--error-rate`), truncated JSON
+bodies (`--malformed-rate`) and resources that do not exist (`--missing`).
+
+Point the fetchers at it with DATA_GOV_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python benchmarks/data_gov_stub.py --port 8765 --total 50000 --latency-ms 80 --error-rate 0.02
+    python benchmarks/data_gov_stub.py --record recorded/ --upstream https://api.data.gov.in
+    python benchmarks/data_gov_stub.py --replay recorded/
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MARKET_RESOURCE_ID  # noqa: E402
+
+# data.gov.in caps page size
+MAX_LIMIT = 1000
+
+COMMODITIES = ['Wheat', 'Rice', 'Maize', 'Soybean', 'Cotton', 'Onion', 'Tomato', 'Potato', 'Chilli']
+MARKETS = [('Delhi', 'New Delhi', 'Azadpur'), ('Maharashtra', 'Pune', 'Pune APMC'),
+           ('West Bengal', 'Kolkata', 'Sealdah'), ('Punjab', 'Ludhiana', 'Khanna'),
+           ('Karnataka', 'Bangalore', 'Yeshwanthpur'), ('Gujarat', 'Ahmedabad', 'Jamalpur')]
+MINISTRIES = ['Agriculture and Farmers Welfare', 'Rural Development', 'Jal Shakti']
+
+
+def market_record(i: int, dirty: bool) -> Dict:
+    state, district, market = MARKETS[i % len(MARKETS)]
+    modal = 1500 + (i * 37) % 4000
+    arrival = date(2025, 1, 1) + timedelta(days=i % 30)
+    return {
+        'state': state, 'district': district, 'market': market,
+        'commodity': COMMODITIES[i % len(COMMODITIES)], 'variety': 'Other', 'grade': 'FAQ',
+        'arrival_date': 'NA' if dirty else arrival.strftime('%d/%m/%Y'),
+        'min_price': str(modal - 200), 'max_price': str(modal + 200),
+        'modal_price': 'NR' if dirty else str(modal),
+    }
+
+
+def scheme_record(i: int, dirty: bool) -> Dict:
+    state = MARKETS[i % len(MARKETS)][0]
+    return {
+        'scheme_id': '' if dirty else f'SCH-{i:06d}',
+        'scheme_name': f'Kisan Support Scheme {i}',
+        'description': f'Assistance for {COMMODITIES[i % len(COMMODITIES)].lower()} growers',
+        'implementing_ministry': MINISTRIES[i % len(MINISTRIES)],
+        'eligibility_criteria': f'Small and marginal farmers of {state} with land up to {1 + i % 5} hectares',
+        'state': state, 'region': 'State', 'start_date': '2020-04-01',
+    }
+
+
+class StubConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.total = args.total
+        self.latency = args.latency_ms / 1000
+        self.jitter = args.jitter_ms / 1000
+        self.slow_rate = args.slow_rate
+        self.slow = args.slow_ms / 1000
+        self.error_rate = args.error_rate
+        self.malformed_rate = args.malformed_rate
+        self.dirty_rate = args.dirty_rate
+        self.missing = set(args.missing)
+        self.replay = args.replay
+        self.record = args.record
+        self.upstream = args.upstream.rstrip('/') if args.upstream else None
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+
+    def roll(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+
+def page_path(root: str, resource: str, offset: int, limit: int) -> str:
+    return os.path.join(root, resource, f'{offset}-{limit}.json')
+
+
+def synthetic_page(config: StubConfig, resource: str, offset: int, limit: int) -> Dict:
+    make = market_record if resource == MARKET_RESOURCE_ID else scheme_record
+    end = min(offset + limit, config.total)
+    # Dirtiness depends only on the index so every fetch of a page is identical
+    threshold = config.dirty_rate * 2 ** 32
+    records: List[Dict] = [make(i, (i * 2654435761) % 2 ** 32 < threshold) for i in range(offset, end)]
+    return {'total': config.total, 'count': len(records), 'limit': limit, 'offset': offset, 'records': records}
+
+
+def load_page(config: StubConfig, resource: str, offset: int, limit: int, query: Dict) -> Optional[bytes]:
+    if config.replay:
+        try:
+            with open(page_path(config.replay, resource, offset, limit), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    if config.record:
+        with urlopen(f'{config.upstream}/resource/{resource}?{urlencode(query)}', timeout=60) as response:
+            body = response.read()
+        path = page_path(config.record, resource, offset, limit)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return body
+    return json.dumps(synthetic_page(config, resource, offset, limit)).encode()
+
+
+def make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip('/').split('/')
+            if len(parts) != 2 or parts[0] != 'resource' or parts[1] in config.missing:
+                return self._send(404, b'{"error": "not found"}')
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            offset = int(query.get('offset', 0))
+            limit = min(int(query.get('limit', 10)), MAX_LIMIT)
+
+            delay = config.latency + config.jitter * config.roll()
+            if config.roll() < config.slow_rate:
+                delay += config.slow
+            time.sleep(delay)
+            if config.roll() < config.error_rate:
+                return self._send(503, b'{"error": "service unavailable"}')
+
+            body = load_page(config, parts[1], offset, limit, query)
+            if body is None:
+                return self._send(404, b'{"error": "page not recorded"}')
+            if config.roll() < config.malformed_rate:
+                body = body[: len(body) // 2]
+            self._send(200, body)
+
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--total', type=int, default=10000, help='Synthetic records per resource')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of requests given --slow-ms extra')
+    parser.add_argument('--slow-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered 503')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Fraction of bodies truncated')
+    parser.add_argument('--dirty-rate', type=float, default=0.0, help='Fraction of synthetic records with bad values')
+    parser.add_argument('--missing', action='append', default=[], metavar='RESOURCE',
+                        help='Answer 404 for this resource id (repeatable)')
+    parser.add_argument('--seed', type=int, default=1)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--replay', metavar='DIR', help='Serve pages recorded under DIR')
+    source.add_argument('--record', metavar='DIR', help='Proxy to --upstream and save pages under DIR')
+    parser.add_argument('--upstream', default='https://api.data.gov.in')
+    return parser
+
+
+def start_stub(argv: Optional[List[str]] = None) -> ThreadingHTTPServer:
+    """Start a stub in a background thread; its URL is http://host:server_port."""
+    args = build_parser().parse_args(argv or [])
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StubConfig(args)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    args = build_parser().parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StubConfig(args)))
+    server.daemon_threads = True
+    print(f"data.gov.in stub on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
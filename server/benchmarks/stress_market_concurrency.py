@@ -0,0 +1,104 @@
+"""
+Stress test: concurrent readers against the market ingest writer.
+
+One writer thread ingests a new day of data in a loop while reader threads
+query continuously. Every batch writes price and trend rows for the same
+new date, so a reader that sees different latest dates in the two tables
+within one read observed a torn version. Reports lock errors, torn reads and reader latency per mode.
+
+Usage:
+    python benchmarks/stress_market_concurrency.py --seconds 10 --readers 4
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data_fetcher import MarketDataFetcher  # noqa: E402
+from bench_market_records import make_raw  # noqa: E402
+
+
+def writer(fetcher, records, stop, stats):
+    day = date(2020, 1, 1)
+    while not stop.is_set():
+        raw = make_raw(records)
+        for i, record in enumerate(raw):
+            record['date'] = day.isoformat()
+            record['district'] = f'District {i}'
+        fetcher._store_market_data(fetcher._parse_market_data(raw))
+        if fetcher.wal:
+            fetcher.checkpoint()
+        fetcher.publish_snapshot()
+        stats['batches'] += 1
+        day += timedelta(days=1)
+
+
+def reader(fetcher, stop, stats):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with fetcher._reading() as conn:
+                conn.execute("BEGIN")
+                prices = conn.execute("SELECT MAX(date) FROM market_prices").fetchone()[0]
+                trends = conn.execute("SELECT MAX(date) FROM market_trends").fetchone()[0]
+            if prices != trends:
+                stats['torn'] += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' in str(e):
+                stats['locked'] += 1
+            else:
+                raise
+        stats['latencies'].append(time.perf_counter() - start)
+
+
+def run_mode(label, seconds, readers, records, **options):
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'staging.db')
+        if options.pop('snapshot', False):
+            options['snapshot_path'] = os.path.join(workdir, 'snapshot.db')
+        fetcher = MarketDataFetcher(db_path, **options)
+        fetcher.publish_snapshot()
+        
+        stop = threading.Event()
+        write_stats = {'batches': 0}
+        read_stats = {'torn': 0, 'locked': 0, 'latencies': []}
+        threads = [threading.Thread(target=writer, args=(fetcher, records, stop, write_stats))]
+        threads += [threading.Thread(target=reader, args=(fetcher, stop, read_stats)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        fetcher.close()
+    
+    latencies = sorted(read_stats['latencies'])
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(f"{label:9s} batches={write_stats['batches']:4d} reads={len(latencies):7d} "
+          f"locked={read_stats['locked']:5d} torn={read_stats['torn']:3d} "
+          f"p50={statistics.median(latencies) * 1000 if latencies else 0:7.2f}ms p99={p99 * 1000:7.2f}ms "
+          f"max={latencies[-1] * 1000 if latencies else 0:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Market store concurrency stress test')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--records', type=int, default=5000, help='Records per ingest batch')
+    args = parser.parse_args()
+    
+    run_mode('rollback', args.seconds, args.readers, args.records)
+    run_mode('wal', args.seconds, args.readers, args.records, wal=True)
+    run_mode('snapshot', args.seconds, args.readers, args.records, snapshot=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Per-endpoint circuit breakers with state persisted in SQLite.
+
+The fetchers are short-lived processes, so breaker state has to outlive
+them: an endpoint that failed on the last scheduled run should not cost a
+full timeout again on this one.
+
+- closed: requests flow; `failure_threshold` consecutive failures open it.
+- open: requests are skipped until `open_until`; the cooldown doubles on
+  every failed probe, up to `max_cooldown`.
+- half_open: one caller is let through as a probe; success closes the
+  breaker, failure re-opens it.
+
+Responses that say the resource does not exist (404/410) open the breaker
+immediately for `negative_ttl`: a negative cache of known-bad endpoints.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuit_breakers (
+    endpoint TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    cooldown REAL NOT NULL,
+    open_until REAL,
+    probe_started REAL,
+    last_error TEXT,
+    last_failure REAL,
+    last_success REAL
+)
+"""
+
+PERMANENT_STATUSES = (404, 410)
+
+
+class CircuitBreakers:
+    """Breaker registry backed by a SQLite file shared by all fetcher processes."""
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        failure_threshold: int = 3,
+        cooldown: float = 300.0,
+        max_cooldown: float = 86400.0,
+        negative_ttl: float = 86400.0,
+        probe_timeout: float = 120.0,
+    ):
+        self.path = path or os.environ.get("CIRCUIT_STATE_DB", "circuit_breakers.db")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.negative_ttl = negative_ttl
+        self.probe_timeout = probe_timeout
+        with closing(self._connect()) as conn, conn:
+            conn.execute(SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def allow(self, endpoint: str) -> bool:
+        """
+        Whether a request to endpoint should be attempted now.
+        
+        An open breaker past its cooldown turns half-open and admits exactly
+        one probe; a probe that never reports back is retried after probe_timeout.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT * FROM circuit_breakers WHERE endpoint = ?", (endpoint,)).fetchone()
+                if row is None or row["state"] == "closed":
+                    return True
+                if row["state"] == "open" and now < row["open_until"]:
+                    return False
+                if row["state"] == "half_open" and now - row["probe_started"] < self.probe_timeout:
+                    return False
+                conn.execute(
+                    "UPDATE circuit_breakers SET state = 'half_open', probe_started = ? WHERE endpoint = ?",
+                    (now, endpoint),
+                )
+                return True
+            finally:
+                conn.execute("COMMIT")
+    
+    def record_success(self, endpoint: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO circuit_breakers (endpoint, state, failures, cooldown, last_success)"
+                " VALUES (?, 'closed', 0, ?, ?)"
+                " ON CONFLICT(endpoint) DO UPDATE SET state = 'closed', failures = 0,"
+                " cooldown = excluded.cooldown, open_until = NULL, probe_started = NULL,"
+                " last_success = excluded.last_success",
+                (endpoint, self.cooldown, time.time()),
+            )
+    
+    def record_failure(self, endpoint: str, error: str, status: Optional[int] = None) -> None:
+        """
+        Count a failed request; opens the breaker at the threshold, after a
+        failed probe, or at once for a permanent (404/410) status.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT * FROM circuit_breakers WHERE endpoint = ?", (endpoint,)).fetchone()
+                failures = (row["failures"] if row else 0) + 1
+                cooldown = row["cooldown"] if row else self.cooldown
+                state, open_until = "closed", None
+                if status in PERMANENT_STATUSES:
+                    state, open_until = "open", now + self.negative_ttl
+                elif row is not None and row["state"] == "open" and now < row["open_until"]:
+                    state, open_until = "open", row["open_until"]
+                elif row is not None and row["state"] == "half_open":
+                    cooldown = min(cooldown * 2, self.max_cooldown)
+                    state, open_until = "open", now + cooldown
+                elif failures >= self.failure_threshold:
+                    state, open_until = "open", now + cooldown
+                conn.execute(
+                    "INSERT OR REPLACE INTO circuit_breakers"
+                    " (endpoint, state, failures, cooldown, open_until, probe_started,"
+                    "  last_error, last_failure, last_success)"
+                    " VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?)",
+                    (endpoint, state, failures, cooldown, open_until, error[:500], now,
+                     row["last_success"] if row else None),
+                )
+            finally:
+                conn.execute("COMMIT")
+    
+    def status(self) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM circuit_breakers ORDER BY endpoint")]
+    
+    def reset(self, endpoint: Optional[str] = None) -> int:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "DELETE FROM circuit_breakers WHERE (:endpoint IS NULL OR endpoint = :endpoint)",
+                {"endpoint": endpoint},
+            )
+            return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or reset upstream circuit breakers")
+    parser.add_argument("command", choices=["status", "reset"])
+    parser.add_argument("--db", help="Defaults to CIRCUIT_STATE_DB or circuit_breakers.db")
+    parser.add_argument("--endpoint", help="Reset only this endpoint URL")
+    args = parser.parse_args()
+    breakers = CircuitBreakers(args.db)
+    if args.command == "status":
+        print(json.dumps(breakers.status(), indent=2))
+    else:
+        print(json.dumps({"reset": breakers.reset(args.endpoint)}))
+
+
+if __name__ == "__main__":
+    main()
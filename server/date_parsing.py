@@ -0,0 +1,79 @@
+"""
+Memoized date parsing for ingest.
+
+Feeds repeat a handful of distinct date strings across many thousands of
+records, so results (including failures) are cached per string. Misses go
+through a sniffer that reads the separator and the position of the 4-digit
+year instead of trying strptime formats and catching the errors.
+"""
+
+from datetime import date
+from typing import Dict, Optional
+
+# Parsed fields of the sniffed layouts: (year, month, day) slice order
+_YEAR_FIRST = (0, 1, 2)
+_DAY_FIRST = (2, 1, 0)
+
+
+def sniff_date(value: str) -> Optional[date]:
+    """
+    Parse Y-m-d or d-m-Y with '-', '/' or '.' separators, ignoring any time part.
+    
+    Returns None when the string does not look like a date.
+    """
+    text = value.strip()
+    if len(text) > 10 and text[10] in "T ":
+        text = text[:10]
+    for sep in "-/.":
+        if sep in text:
+            break
+    else:
+        return None
+    parts = text.split(sep)
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    if len(parts[0]) == 4:
+        order = _YEAR_FIRST
+    elif len(parts[2]) == 4:
+        order = _DAY_FIRST
+    else:
+        return None
+    try:
+        return date(int(parts[order[0]]), int(parts[order[1]]), int(parts[order[2]]))
+    except ValueError:
+        return None
+
+
+class DateParser:
+    """
+    Bounded memo in front of sniff_date.
+    
+    When the cache reaches max_entries it is cleared rather than evicted
+    entry by entry; a feed with that many distinct dates is not the case
+    being optimized.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._cache: Dict[str, Optional[date]] = {}
+    
+    def parse(self, value: str) -> date:
+        """
+        Args:
+            value (str): Raw date string
+            
+        Returns:
+            date: Parsed date
+            
+        Raises:
+            ValueError: If the string is not a recognised date
+        """
+        try:
+            parsed = self._cache[value]
+        except KeyError:
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            parsed = self._cache[value] = sniff_date(value)
+        if parsed is None:
+            raise ValueError(f"Could not parse date: {value}")
+        return parsed
@@ -3,200 +3,825 @@ Government Schemes Fetcher/Reader backed by MongoDB.
 
 Actions:
   - fetch_schemes     : pull from data.gov.in and upsert into Mongo
-  - get_schemes       : return schemes with filters
+  - get_schemes       : return schemes with filters, or changes since a sync token (--since)
   - get_scheme        : return a single scheme by scheme_id
+  - search_schemes    : ranked, spelling-tolerant search with pagination
   - get_stats         : summary counts
   - get_states        : distinct states (if present)
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import os
+import sqlite3
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
-import requests
-from pymongo import MongoClient, UpdateOne
+from circuit_breaker import CircuitBreakers
+from json_stream import dumps, write_stream
+from leader_lease import StaleLeaseError
+from log_pipeline import install_logging
+from mongo_connection import get_db
+from payload_archive import ArchiveEntry, PayloadArchive
+from record_mapping import Field, RecordMapper
+from scheme_matching import EligibilityIndex, extract_eligibility
+from scheme_search import SEARCH_WEIGHTS, SchemeSearchIndex, search_fields, text_keys
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("gov_schemes_fetcher.log"), logging.StreamHandler()],
-)
 logger = logging.getLogger(__name__)
 
 DEFAULT_API_KEY = "579b464db66ec23bdd000001cdd3946e44de4f064641eaf0bc5473fa"
-API_ENDPOINTS = [
-    "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070",
-    "https://api.data.gov.in/resource/agriculture-schemes",
-    "https://api.data.gov.in/resource/farmer-schemes",
+DEFAULT_API_BASE_URL = "https://api.data.gov.in"
+# Tried in order under the base URL (DATA_GOV_BASE_URL overrides it)
+API_RESOURCES = [
+    "9ef84268-d588-465a-a308-a864a43d0070",
+    "agriculture-schemes",
+    "farmer-schemes",
 ]
 
+REVISION_COUNTER = "schemes"
+SYNC_TOKEN_PREFIX = "v1."
+# Internal bookkeeping fields are not part of the scheme payload
+SCHEME_PROJECTION = {
+    "_id": 0,
+    "contentHash": 0,
+    "searchKeys": 0,
+    "nameKeys": 0,
+    "eligibilityKeys": 0,
+    "descriptionKeys": 0,
+    "sourceResource": 0,
+    "crawlId": 0,
+    "revision": 0,
+    "deleted": 0,
+    "eligibilityAttributes": 0,
+    "createdAt": 0,
+}
+# Delta sync pages by revision and splits out tombstones, so it reads those two fields
+DELTA_PROJECTION = {
+    field: 0 for field in SCHEME_PROJECTION if field not in ("revision", "deleted")
+}
+SUMMARY_ID = "summary"
+# Output field -> source aliases in priority order
+SCHEME_FIELDS = (
+    Field("schemeId", ("scheme_id", "id")),
+    Field("schemeName", ("scheme_name", "scheme", "title")),
+    Field("description", ("description",)),
+    Field("ministry", ("implementing_ministry", "ministry")),
+    Field("startDate", ("start_date",), coerce=None, default=None),
+    Field("eligibility", ("eligibility_criteria", "eligibility")),
+    Field("region", ("region",), default="Central"),
+    Field("state", ("state",)),
+)
 
-def get_db():
-    mongo_uri = os.environ.get("MONGO_URI")
-    if not mongo_uri:
-        raise RuntimeError("MONGO_URI is required")
-    client = MongoClient(mongo_uri, tlsAllowInvalidCertificates=True)
-    db_name = os.environ.get("MONGO_DB", "agriai")
-    return client[db_name]
 
+def configure_logging() -> None:
+    """Install queued, rate-limited file and console handlers; only done when running as a CLI."""
+    install_logging("gov_schemes_fetcher.log")
+
+
+# HTTP statuses meaning the resource itself does not exist (not worth retrying this run)
+MISSING_STATUSES = (404, 410)
+
+
+def fetch_page(
+    resource: str,
+    offset: int = 0,
+    limit: int = 1000,
+    breakers: Optional[CircuitBreakers] = None,
+    archive: Optional[PayloadArchive] = None,
+) -> Optional[Dict]:
+    """
+    One page of a data.gov.in resource as its JSON envelope, or None on failure.
+    
+    breakers and archive are opened once per run by the caller (see
+    circuit_breakers and fetch_archive); None skips that step.
+    """
+    return _fetch_page(resource, offset, limit, breakers, archive)[0]
+
+
+def _fetch_page(
+    resource: str,
+    offset: int,
+    limit: int,
+    breakers: Optional[CircuitBreakers],
+    archive: Optional[PayloadArchive],
+) -> Tuple[Optional[Dict], str]:
+    """
+    fetch_page plus why it returned nothing: 'ok', 'skipped' (circuit open),
+    'missing' (the resource does not exist) or 'failed'.
+    """
+    import requests
 
-def fetch_from_api() -> Optional[List[Dict]]:
     api_key = os.environ.get("GOV_SCHEMES_API_KEY", DEFAULT_API_KEY)
-    for api_url in API_ENDPOINTS:
+    base_url = (os.environ.get("DATA_GOV_BASE_URL") or DEFAULT_API_BASE_URL).rstrip("/")
+    api_url = f"{base_url}/resource/{resource}"
+    try:
+        allowed = breakers is None or breakers.allow(api_url)
+    except sqlite3.Error as exc:
+        logger.warning("Circuit breaker state unavailable: %s", exc)
+        allowed = True
+    if not allowed:
+        logger.info("Skipping %s: circuit open after repeated failures", api_url)
+        return None, "skipped"
+    try:
+        params = {"api-key": api_key, "format": "json", "limit": limit, "offset": offset}
+        logger.info("Fetching schemes from %s (offset %s)", api_url, offset)
+        response = requests.get(api_url, params=params, timeout=(5, 30))
+        if response.status_code != 200:
+            logger.warning("Non-200 from %s: %s", api_url, response.status_code)
+            _record_failure(breakers, api_url, f"HTTP {response.status_code}", response.status_code)
+            return None, "missing" if response.status_code in MISSING_STATUSES else "failed"
+        data = response.json()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Fetch failed for %s: %s", api_url, exc)
+        _record_failure(breakers, api_url, str(exc))
+        return None, "failed"
+    if breakers is not None:
         try:
-            params = {"api-key": api_key, "format": "json", "limit": 1000, "offset": 0}
-            logger.info("Fetching schemes from %s", api_url)
-            response = requests.get(api_url, params=params, timeout=30)
-            if response.status_code != 200:
-                logger.warning("Non-200 from %s: %s", api_url, response.status_code)
-                continue
-            data = response.json()
-            records = data.get("records") or data.get("data") or []
-            if records:
-                logger.info("Fetched %s records from %s", len(records), api_url)
-                return records
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("Fetch failed for %s: %s", api_url, exc)
-            continue
+            breakers.record_success(api_url)
+        except sqlite3.Error as exc:
+            logger.warning("Circuit breaker state unavailable: %s", exc)
+    archive_page(archive, resource, offset, response.content)
+    return data, "ok"
+
+
+def circuit_breakers() -> Optional[CircuitBreakers]:
+    """Persistent per-endpoint breakers (CIRCUIT_STATE_DB); None if the state file is unusable."""
+    try:
+        return CircuitBreakers()
+    except sqlite3.Error as exc:
+        logger.warning("Circuit breaker state unavailable: %s", exc)
+        return None
+
+
+def _record_failure(breakers: Optional[CircuitBreakers], api_url: str, error: str, status: Optional[int] = None):
+    if breakers is None:
+        return
+    try:
+        breakers.record_failure(api_url, error, status)
+    except sqlite3.Error as exc:
+        logger.warning("Circuit breaker state unavailable: %s", exc)
+
+
+def page_records(data: Dict) -> List[Dict]:
+    return data.get("records") or data.get("data") or []
+
+
+def fetch_from_api() -> Optional[List[Dict]]:
+    breakers, archive = circuit_breakers(), fetch_archive()
+    for resource in API_RESOURCES:
+        data = fetch_page(resource, breakers=breakers, archive=archive)
+        records = page_records(data) if data is not None else []
+        if records:
+            logger.info("Fetched %s records from %s", len(records), resource)
+            return records
     return None
 
 
+def payload_archive() -> Optional[PayloadArchive]:
+    archive_dir = os.environ.get("PAYLOAD_ARCHIVE_DIR")
+    return PayloadArchive(archive_dir) if archive_dir else None
+
+
+def fetch_archive() -> Optional[PayloadArchive]:
+    """payload_archive() for a fetch run; an unusable archive disables archiving instead of failing the fetch."""
+    try:
+        return payload_archive()
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Payload archive unavailable: %s", exc)
+        return None
+
+
+def archive_page(archive: Optional[PayloadArchive], resource: str, offset: int, body: bytes) -> None:
+    """Keep the raw page for reprocess_schemes; never fails the fetch."""
+    if archive is None:
+        return
+    try:
+        archive.store(resource, offset, body)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Could not archive %s page at offset %s: %s", resource, offset, exc)
+
+
 def parse_records(raw: List[Dict]) -> List[Dict]:
+    mapper = RecordMapper(SCHEME_FIELDS)
+    now = datetime.utcnow()
     parsed = []
     for rec in raw:
-        scheme_id = str(rec.get("scheme_id") or rec.get("id") or "").strip()
-        scheme_name = str(
-            rec.get("scheme_name") or rec.get("scheme") or rec.get("title") or ""
-        ).strip()
-        if not scheme_id and scheme_name:
-            scheme_id = scheme_name.lower().replace(" ", "-")
-
-        parsed.append(
-            {
-                "schemeId": scheme_id,
-                "schemeName": scheme_name,
-                "description": str(rec.get("description", "")).strip(),
-                "ministry": str(
-                    rec.get("implementing_ministry", rec.get("ministry", ""))
-                ).strip(),
-                "startDate": rec.get("start_date"),
-                "eligibility": str(
-                    rec.get("eligibility_criteria", rec.get("eligibility", ""))
-                ).strip(),
-                "region": str(rec.get("region", "Central")).strip(),
-                "state": str(rec.get("state", "")).strip(),
-                "lastUpdated": datetime.utcnow(),
-            }
-        )
+        scheme = mapper.extract_dict(rec)
+        if not scheme["schemeId"] and scheme["schemeName"]:
+            scheme["schemeId"] = scheme["schemeName"].lower().replace(" ", "-")
+        scheme["lastUpdated"] = now
+        parsed.append(scheme)
+    report = mapper.report()
+    if report["fields"]:
+        logger.info("Field rejections: %s", report)
     return parsed
 
 
-def save_to_mongo(db, schemes: List[Dict]) -> int:
+def _content_hash(scheme: Dict) -> str:
+    """Hash of the scheme fields that matter to clients (lastUpdated excluded)."""
+    content = {k: v for k, v in scheme.items() if k != "lastUpdated"}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _allocate_revisions(db, count: int, fencing_token: Optional[int] = None) -> int:
+    """
+    Reserve count consecutive revisions; returns the first one.
+    
+    With a fencing token (from the scheduler's leader lease) the counter
+    remembers the highest token it has served and refuses older ones, so a
+    deposed leader cannot write once its successor has.
+    """
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
+
+    query: Dict = {"_id": REVISION_COUNTER}
+    update: Dict = {"$inc": {"revision": count}}
+    if fencing_token is not None:
+        query["fence"] = {"$not": {"$gt": fencing_token}}
+        update["$max"] = {"fence": fencing_token}
+    try:
+        counter = db.counters.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The counter exists but its fence is newer, so the upsert tried an insert
+        raise StaleLeaseError(f"Fencing token {fencing_token} is stale") from None
+    return counter["revision"] - count + 1
+
+
+def _publish_revision(db, revision: int) -> None:
+    """Make revisions up to revision visible to delta readers."""
+    db.counters.update_one(
+        {"_id": REVISION_COUNTER}, {"$max": {"committed": revision}}, upsert=True
+    )
+
+
+def _committed_revision(db) -> int:
+    counter = db.counters.find_one({"_id": REVISION_COUNTER}, {"committed": 1})
+    return (counter or {}).get("committed", 0)
+
+
+def save_to_mongo(db, schemes: List[Dict], fencing_token: Optional[int] = None) -> int:
+    """
+    Upsert schemes, stamping a new revision only on those whose content changed.
+    
+    Revisions come from a counter document and are published to readers
+    (the "committed" mark) only after the bulk write, so a delta reader
+    never gets a sync token ahead of data it cannot see yet. Assumes a
+    single ingest writer at a time; scheduled runs enforce that with
+    fencing_token.
+    """
+    from pymongo import UpdateOne
+
     if not schemes:
         return 0
-    ops = []
+    latest = {}
     for scheme in schemes:
-        if not scheme.get("schemeId"):
-            continue
+        if scheme.get("schemeId"):
+            latest[scheme["schemeId"]] = {
+                **scheme,
+                **search_fields(scheme),
+                "eligibilityAttributes": extract_eligibility(scheme),
+            }
+    if not latest:
+        return 0
+
+    db.schemes.create_index("schemeId", unique=True)
+    db.schemes.create_index("revision")
+    db.schemes.create_index("searchKeys")
+    known = {
+        doc["schemeId"]: doc.get("contentHash")
+        for doc in db.schemes.find(
+            {"schemeId": {"$in": list(latest)}}, {"schemeId": 1, "contentHash": 1, "deleted": 1}
+        )
+        if not doc.get("deleted")
+    }
+    changed = []
+    for scheme_id, scheme in latest.items():
+        content_hash = _content_hash(scheme)
+        if known.get(scheme_id) != content_hash:
+            changed.append((scheme, content_hash))
+    if not changed:
+        return 0
+
+    revision = _allocate_revisions(db, len(changed), fencing_token)
+    ops = []
+    for offset, (scheme, content_hash) in enumerate(changed):
         ops.append(
             UpdateOne(
                 {"schemeId": scheme["schemeId"]},
-                {"$set": scheme, "$setOnInsert": {"createdAt": datetime.utcnow()}},
+                {
+                    "$set": {
+                        **scheme,
+                        "contentHash": content_hash,
+                        "revision": revision + offset,
+                        "deleted": False,
+                    },
+                    "$setOnInsert": {"createdAt": datetime.utcnow()},
+                },
                 upsert=True,
             )
         )
-    if not ops:
-        return 0
     result = db.schemes.bulk_write(ops, ordered=False)
+    _publish_revision(db, revision + len(changed) - 1)
     return result.upserted_count + result.modified_count
 
 
-def handle_fetch():
+def _stamp_crawl(db, resource: str, crawl_id: str, scheme_ids: List[str]) -> None:
+    """Record which resource and crawl last returned these schemes, for prune_schemes."""
+    db.schemes.update_many(
+        {"schemeId": {"$in": scheme_ids}}, {"$set": {"sourceResource": resource, "crawlId": crawl_id}}
+    )
+
+
+def prune_schemes(db, resource: str, crawl_id: str, fencing_token: Optional[int] = None) -> int:
+    """
+    Tombstone a resource's schemes that its completed crawl crawl_id did not return.
+    
+    Only schemes last seen in an earlier crawl of the same resource are
+    candidates; schemes from other resources or never crawled (fetch_schemes,
+    reprocess_schemes) are left alone.
+    """
+    missing = [
+        doc["schemeId"]
+        for doc in db.schemes.find(
+            {"sourceResource": resource, "crawlId": {"$ne": crawl_id}, "deleted": {"$ne": True}},
+            {"schemeId": 1},
+        )
+    ]
+    if not missing:
+        return 0
+    from pymongo import UpdateOne
+
+    revision = _allocate_revisions(db, len(missing), fencing_token)
+    ops = [
+        UpdateOne(
+            {"schemeId": scheme_id},
+            {"$set": {"deleted": True, "revision": revision + offset, "lastUpdated": datetime.utcnow()}},
+        )
+        for offset, scheme_id in enumerate(missing)
+    ]
+    db.schemes.bulk_write(ops, ordered=False)
+    _publish_revision(db, revision + len(missing) - 1)
+    try:
+        local_search_index().remove(missing)
+    except sqlite3.Error as exc:
+        logger.warning("Local search index cleanup failed: %s", exc)
+    return len(missing)
+
+
+def handle_fetch(prune: bool = False, fencing_token: Optional[int] = None):
+    if prune:
+        # One page of one resource cannot show that a scheme is gone
+        return {"success": False, "message": "Pruning needs a complete crawl; use crawl_schemes --prune"}
     records = fetch_from_api()
     if records is None:
         return {"success": False, "message": "Fetch failed from all endpoints"}
-    parsed = parse_records(records)
+    return ingest_schemes(parse_records(records), fencing_token)
+
+
+def _reparse_scheme_page(entry: ArchiveEntry, records: List[Dict]) -> List[Dict]:
+    return parse_records(records)
+
+
+def handle_reprocess(since: Optional[str], until: Optional[str], workers: Optional[int]):
+    """Re-ingest archived scheme pages in fetch order without calling the API."""
+    archive = payload_archive()
+    if archive is None:
+        return {"success": False, "message": "No payload archive configured (set PAYLOAD_ARCHIVE_DIR)"}
+    since_dt = datetime.fromisoformat(since) if since else None
+    until_dt = datetime.fromisoformat(until) if until else None
+    entries = sorted(
+        (e for resource in API_RESOURCES for e in archive.entries(resource, since_dt, until_dt)),
+        key=lambda e: e.fetched_at,
+    )
+    # Later pages win for a schemeId, as they would have on the original run
+    latest: Dict[str, Dict] = {}
+    for parsed in archive.map_payloads(_reparse_scheme_page, entries, workers):
+        for scheme in parsed:
+            if scheme["schemeId"]:
+                latest[scheme["schemeId"]] = scheme
+    result = ingest_schemes(list(latest.values()))
+    result["payloads"] = len(entries)
+    return result
+
+
+def _crawl_resource(
+    db,
+    resource: str,
+    page_size: int,
+    max_pages: Optional[int],
+    restart: bool,
+    breakers: Optional[CircuitBreakers] = None,
+    archive: Optional[PayloadArchive] = None,
+) -> Dict:
+    """
+    Crawl one resource from its checkpoint, saving each page before advancing it.
+    
+    Mongo has no transaction here, so a crash between the save and the
+    checkpoint update replays that page; content-hash upserts make the
+    replay a no-op.
+    
+    Status is 'complete', 'paused' (max_pages reached), 'interrupted' (a
+    fetch failed), 'skipped' (circuit breaker open) or 'missing' (the API
+    has no such resource).
+    """
+    checkpoint = None if restart else db.crawl_checkpoints.find_one({"_id": resource})
+    if checkpoint is None or checkpoint.get("completedAt") is not None:
+        now = datetime.utcnow()
+        checkpoint = {
+            "_id": resource, "crawlId": now.isoformat(), "nextOffset": 0, "total": None,
+            "pagesDone": 0, "saved": 0, "startedAt": now, "completedAt": None,
+        }
+    pages = 0
+    status = "paused"
+    while max_pages is None or pages < max_pages:
+        data, outcome = _fetch_page(resource, checkpoint["nextOffset"], page_size, breakers, archive)
+        if data is None:
+            status = outcome if outcome in ("skipped", "missing") else "interrupted"
+            break
+        records = page_records(data)
+        parsed = [s for s in parse_records(records) if s["schemeId"]]
+        if parsed:
+            try:
+                local_search_index().upsert(parsed)
+            except sqlite3.Error as exc:
+                logger.warning("Local search index update failed: %s", exc)
+            checkpoint["saved"] += save_to_mongo(db, parsed)
+            _stamp_crawl(db, resource, checkpoint["crawlId"], [s["schemeId"] for s in parsed])
+        if data.get("total") is not None:
+            checkpoint["total"] = int(data["total"])
+        checkpoint["nextOffset"] += len(records)
+        checkpoint["pagesDone"] += 1
+        checkpoint["updatedAt"] = datetime.utcnow()
+        done = len(records) < page_size or (
+            checkpoint["total"] is not None and checkpoint["nextOffset"] >= checkpoint["total"]
+        )
+        if done:
+            checkpoint["completedAt"] = checkpoint["updatedAt"]
+        db.crawl_checkpoints.replace_one({"_id": resource}, checkpoint, upsert=True)
+        pages += 1
+        if done:
+            status = "complete"
+            break
+    return {
+        "resource": resource,
+        "status": status,
+        "pagesThisRun": pages,
+        **{k: v for k, v in checkpoint.items() if k != "_id"},
+    }
+
+
+def handle_crawl(page_size: int = 1000, max_pages: Optional[int] = None, restart: bool = False,
+                 prune: bool = False):
+    """
+    Crawl every scheme resource to the end, resuming unfinished crawls.
+    
+    With prune, each resource whose crawl completed in this run (and returned
+    records) tombstones its schemes that the crawl no longer returned.
+    """
     db = get_db()
-    saved = save_to_mongo(db, parsed)
+    breakers, archive = circuit_breakers(), fetch_archive()
+    resources = [
+        _crawl_resource(db, r, page_size, max_pages, restart, breakers, archive) for r in API_RESOURCES
+    ]
+    for r in resources:
+        r["removed"] = 0
+        if prune and r["status"] == "complete" and r["nextOffset"] > 0:
+            r["removed"] = prune_schemes(db, r["resource"], r["crawlId"])
+    if any(r["saved"] or r["removed"] for r in resources):
+        refresh_scheme_summary(db)
+        rebuild_match_index(db)
+    # Skipped and missing resources do not fail the crawl, as long as one resource was crawled
+    statuses = [r["status"] for r in resources]
+    return {
+        "success": "interrupted" not in statuses and any(s in ("complete", "paused") for s in statuses),
+        "resources": resources,
+        "syncToken": encode_sync_token(_committed_revision(db)),
+    }
+
+
+def ingest_schemes(parsed: List[Dict], fencing_token: Optional[int] = None):
+    """Index, save and summarize parsed schemes; shared by fetch and reprocess."""
+    try:
+        local_search_index().upsert(parsed)
+    except sqlite3.Error as exc:
+        logger.warning("Local search index update failed: %s", exc)
+    db = get_db()
+    saved = save_to_mongo(db, parsed, fencing_token)
+    if saved:
+        refresh_scheme_summary(db)
+        rebuild_match_index(db)
     return {
         "success": True,
         "message": f"Upserted {saved} schemes",
         "count": saved,
+        "syncToken": encode_sync_token(_committed_revision(db)),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
 
-def handle_get_schemes(region: Optional[str], ministry: Optional[str], state: Optional[str]):
+def encode_sync_token(revision: int) -> str:
+    return f"{SYNC_TOKEN_PREFIX}{revision}"
+
+
+def decode_sync_token(token: str) -> int:
+    if not token.startswith(SYNC_TOKEN_PREFIX) or not token[len(SYNC_TOKEN_PREFIX):].isdigit():
+        raise ValueError(f"Invalid sync token: {token!r}")
+    return int(token[len(SYNC_TOKEN_PREFIX):])
+
+
+def iter_schemes(
+    region: Optional[str], ministry: Optional[str], state: Optional[str], batch_size: int = 500
+) -> Iterator[Dict]:
+    """Lazily iterate filtered schemes, fetching batch_size documents per round trip."""
     db = get_db()
-    query: Dict[str, Dict] = {}
+    query: Dict = {"deleted": {"$ne": True}}
     if region:
         query["region"] = region
     if ministry:
         query["ministry"] = ministry
     if state:
         query["state"] = state
-    schemes = list(db.schemes.find(query, {"_id": 0}).sort("lastUpdated", -1))
-    return schemes
+    return db.schemes.find(query, SCHEME_PROJECTION).sort("lastUpdated", -1).batch_size(batch_size)
 
 
-def handle_get_scheme(scheme_id: str):
-    db = get_db()
-    return db.schemes.find_one({"schemeId": scheme_id}, {"_id": 0})
+def handle_get_schemes(region: Optional[str], ministry: Optional[str], state: Optional[str]):
+    return list(iter_schemes(region, ministry, state))
 
 
-def handle_get_stats():
+def handle_get_changes(since: str, limit: int = 1000):
+    """
+    Schemes inserted, changed or removed after a sync token.
+    
+    An empty token returns the full catalogue plus a token to sync from.
+    A client that is already current costs one counter lookup.
+    """
     db = get_db()
-    total = db.schemes.count_documents({})
-    by_region = {
-        doc["_id"]: doc["count"]
-        for doc in db.schemes.aggregate(
-            [{"$group": {"_id": "$region", "count": {"$count": {}}}}]
+    committed = _committed_revision(db)
+    if not since:
+        schemes = list(db.schemes.find({"deleted": {"$ne": True}}, SCHEME_PROJECTION))
+        return {"changes": schemes, "removed": [], "syncToken": encode_sync_token(committed), "hasMore": False}
+
+    since_revision = decode_sync_token(since)
+    if since_revision >= committed:
+        return {"changes": [], "removed": [], "syncToken": since, "hasMore": False}
+
+    docs = list(
+        db.schemes.find(
+            {"revision": {"$gt": since_revision, "$lte": committed}}, DELTA_PROJECTION
         )
+        .sort("revision", 1)
+        .limit(limit)
+    )
+    has_more = len(docs) == limit and docs[-1]["revision"] < committed
+    next_revision = docs[-1]["revision"] if has_more else committed
+    changes, removed = [], []
+    for doc in docs:
+        del doc["revision"]
+        if doc.pop("deleted", False):
+            removed.append(doc["schemeId"])
+        else:
+            changes.append(doc)
+    return {
+        "changes": changes,
+        "removed": removed,
+        "syncToken": encode_sync_token(next_revision),
+        "hasMore": has_more,
+    }
+
+
+def handle_get_scheme(scheme_id: str):
+    db = get_db()
+    return db.schemes.find_one({"schemeId": scheme_id, "deleted": {"$ne": True}}, SCHEME_PROJECTION)
+
+
+def local_search_index() -> SchemeSearchIndex:
+    return SchemeSearchIndex(os.environ.get("SCHEMES_SEARCH_DB", "schemes_search.db"))
+
+
+def match_index_path() -> str:
+    return os.environ.get("SCHEMES_MATCH_INDEX", "schemes_match_index.json")
+
+
+def rebuild_match_index(db) -> EligibilityIndex:
+    """Rebuild the on-disk eligibility index from the live schemes."""
+    docs = db.schemes.find(
+        {"deleted": {"$ne": True}}, {"_id": 0, "schemeId": 1, "eligibilityAttributes": 1}
+    ).sort("schemeId", 1)
+    index = EligibilityIndex((d["schemeId"], d.get("eligibilityAttributes") or {}) for d in docs)
+    tmp_path = f"{match_index_path()}.{os.getpid()}.tmp"
+    index.save(tmp_path)
+    os.replace(tmp_path, match_index_path())
+    return index
+
+
+def load_match_index() -> EligibilityIndex:
+    try:
+        return EligibilityIndex.load(match_index_path())
+    except FileNotFoundError:
+        return rebuild_match_index(get_db())
+
+
+def handle_match_schemes(profile: Dict) -> Dict:
+    index = load_match_index()
+    scheme_ids = index.match(profile)
+    return {"farmerId": profile.get("farmerId"), "schemeIds": scheme_ids, "count": len(scheme_ids)}
+
+
+def iter_batch_matches(path: str) -> Iterator[Dict]:
+    """Match an NDJSON file of farmer profiles, one result per input line."""
+    index = load_match_index()
+    with open(path, encoding="utf-8") as f:
+        profiles = (json.loads(line) for line in f if line.strip())
+        for farmer_id, scheme_ids in index.match_batch(profiles):
+            yield {"farmerId": farmer_id, "schemeIds": scheme_ids}
+
+
+def _search_mongo(db, keys: List[str], page: int, page_size: int) -> Dict:
+    def matched(field: str):
+        return {
+            "$size": {
+                "$filter": {"input": {"$ifNull": [f"${field}", []]}, "cond": {"$in": ["$$this", keys]}}
+            }
+        }
+
+    score = {
+        "$add": [
+            {"$multiply": [SEARCH_WEIGHTS[name], matched(f"{name}Keys")]}
+            for name in ("name", "eligibility", "description")
+        ]
     }
-    by_ministry = {
-        doc["_id"]: doc["count"]
-        for doc in db.schemes.aggregate(
-            [{"$group": {"_id": "$ministry", "count": {"$count": {}}}}]
+    pipeline = [
+        {"$match": {"searchKeys": {"$in": keys}, "deleted": {"$ne": True}}},
+        {"$addFields": {"score": score}},
+        {"$sort": {"score": -1, "schemeName": 1}},
+        {
+            "$facet": {
+                "results": [
+                    {"$skip": (page - 1) * page_size},
+                    {"$limit": page_size},
+                    {"$project": SCHEME_PROJECTION},
+                ],
+                "total": [{"$group": {"_id": None, "count": {"$sum": 1}}}],
+            }
+        },
+    ]
+    facets = next(db.schemes.aggregate(pipeline))
+    return {
+        "results": facets["results"],
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "page": page,
+        "pageSize": page_size,
+        "source": "mongo",
+    }
+
+
+def search_schemes(query: str, page: int = 1, page_size: int = 20) -> Dict:
+    """
+    Ranked search over scheme name, eligibility and description.
+    
+    Matching uses spelling- and script-tolerant keys (see scheme_search), so
+    "kissan yojna" and "किसान योजना" find "Kisan Yojana". Falls back to the
+    local SQLite FTS index when Mongo is unreachable.
+    """
+    page = max(page, 1)
+    page_size = min(max(page_size, 1), 100)
+    keys = text_keys(query)
+    if not keys:
+        return {"results": [], "total": 0, "page": page, "pageSize": page_size, "source": "none"}
+    try:
+        return _search_mongo(get_db(), keys, page, page_size)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Mongo search unavailable (%s); using local index", exc)
+        return local_search_index().search(query, page, page_size)
+
+
+def refresh_scheme_summary(db) -> Dict:
+    """
+    Recompute the stats/facets summary document in one aggregation.
+    
+    Called once per ingest, right after the scheme writes; the stats and
+    states handlers then read it with a single _id lookup. Counts are stored
+    as name/count pairs since ministry names are not safe as field names.
+    """
+    facets = next(
+        db.schemes.aggregate(
+            [
+                {"$match": {"deleted": {"$ne": True}}},
+                {
+                    "$facet": {
+                        "total": [{"$group": {"_id": None, "count": {"$sum": 1}}}],
+                        "byRegion": [{"$group": {"_id": "$region", "count": {"$sum": 1}}}],
+                        "byMinistry": [{"$group": {"_id": "$ministry", "count": {"$sum": 1}}}],
+                        "byState": [{"$group": {"_id": "$state", "count": {"$sum": 1}}}],
+                    }
+                },
+            ]
         )
+    )
+    summary = {
+        "_id": SUMMARY_ID,
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "byRegion": [{"name": d["_id"], "count": d["count"]} for d in facets["byRegion"]],
+        "byMinistry": [{"name": d["_id"], "count": d["count"]} for d in facets["byMinistry"]],
+        "byState": [{"name": d["_id"], "count": d["count"]} for d in facets["byState"]],
+        "states": sorted(d["_id"] for d in facets["byState"] if d["_id"]),
+        "revision": _committed_revision(db),
+        "lastUpdated": datetime.utcnow(),
     }
+    db.scheme_stats.replace_one({"_id": SUMMARY_ID}, summary, upsert=True)
+    return summary
+
+
+def _get_summary(db) -> Dict:
+    summary = db.scheme_stats.find_one({"_id": SUMMARY_ID})
+    if summary is None:
+        # First read before any ingest has built it
+        summary = refresh_scheme_summary(db)
+    return summary
+
+
+def handle_get_stats():
+    db = get_db()
+    summary = _get_summary(db)
     return {
-        "total": total,
-        "byRegion": by_region,
-        "byMinistry": by_ministry,
-        "lastUpdated": datetime.utcnow().isoformat(),
+        "total": summary["total"],
+        "byRegion": {entry["name"]: entry["count"] for entry in summary["byRegion"]},
+        "byMinistry": {entry["name"]: entry["count"] for entry in summary["byMinistry"]},
+        "byState": {entry["name"]: entry["count"] for entry in summary["byState"]},
+        "lastUpdated": summary["lastUpdated"].isoformat(),
     }
 
 
 def handle_get_states():
     db = get_db()
-    states = db.schemes.distinct("state")
-    return sorted([s for s in states if s])
+    return _get_summary(db)["states"]
 
 
 def main():
+    configure_logging()
     parser = argparse.ArgumentParser(description="Government Schemes Fetcher (Mongo)")
     sub = parser.add_subparsers(dest="command")
-    sub.add_parser("fetch_schemes")
+    fp = sub.add_parser("fetch_schemes")
+    fp.add_argument("--prune", action="store_true", help="Refused: a single page cannot prune (see crawl_schemes)")
+    cp = sub.add_parser("crawl_schemes")
+    cp.add_argument("--page-size", type=int, default=1000)
+    cp.add_argument("--max-pages", type=int, help="Pages per resource this run; the next run resumes")
+    cp.add_argument("--restart", action="store_true", help="Ignore unfinished crawls")
+    cp.add_argument("--prune", action="store_true", help="Tombstone schemes missing from completed resource crawls")
+    rp = sub.add_parser("reprocess_schemes")
+    rp.add_argument("--since", help="ISO time; archived pages fetched at or after")
+    rp.add_argument("--until", help="ISO time; archived pages fetched before")
+    rp.add_argument("--workers", type=int, help="Parser processes (default: all CPUs)")
     gp = sub.add_parser("get_schemes")
     gp.add_argument("--region")
     gp.add_argument("--ministry")
     gp.add_argument("--state")
+    gp.add_argument("--format", choices=["json", "ndjson"], default="json")
+    gp.add_argument("--batch-size", type=int, default=500)
+    gp.add_argument("--since", help="Sync token; return only changes after it ('' for a full sync)")
+    gp.add_argument("--limit", type=int, default=1000, help="Max changes per delta page")
     gid = sub.add_parser("get_scheme")
     gid.add_argument("--id", required=True)
+    sp = sub.add_parser("search_schemes")
+    sp.add_argument("--q", required=True, help="Search text (any script)")
+    sp.add_argument("--page", type=int, default=1)
+    sp.add_argument("--page-size", type=int, default=20)
+    mp = sub.add_parser("match_schemes")
+    mg = mp.add_mutually_exclusive_group(required=True)
+    mg.add_argument("--profile", help="Farmer profile JSON (state, landholding, crops, categories)")
+    mg.add_argument("--input", help="NDJSON file of farmer profiles for batch matching")
     sub.add_parser("get_stats")
     sub.add_parser("get_states")
     args = parser.parse_args()
 
     try:
         if args.command == "fetch_schemes":
-            result = handle_fetch()
+            result = handle_fetch(args.prune)
+        elif args.command == "crawl_schemes":
+            result = handle_crawl(args.page_size, args.max_pages, args.restart, args.prune)
+        elif args.command == "reprocess_schemes":
+            result = handle_reprocess(args.since, args.until, args.workers)
+        elif args.command == "get_schemes" and args.since is not None:
+            result = handle_get_changes(args.since, args.limit)
         elif args.command == "get_schemes":
-            result = handle_get_schemes(args.region, args.ministry, args.state)
+            # Streamed straight from the cursor instead of building one big list
+            schemes = iter_schemes(args.region, args.ministry, args.state, args.batch_size)
+            write_stream(schemes, sys.stdout.buffer, args.format, args.batch_size)
+            return
         elif args.command == "get_scheme":
             result = handle_get_scheme(args.id)
+        elif args.command == "search_schemes":
+            result = search_schemes(args.q, args.page, args.page_size)
+        elif args.command == "match_schemes" and args.input:
+            write_stream(iter_batch_matches(args.input), sys.stdout.buffer, "ndjson")
+            return
+        elif args.command == "match_schemes":
+            result = handle_match_schemes(json.loads(args.profile))
         elif args.command == "get_stats":
             result = handle_get_stats()
         elif args.command == "get_states":
@@ -204,10 +829,10 @@ def main():
         else:
             parser.print_help()
             return
-        print(json.dumps(result, default=str))
+        sys.stdout.buffer.write(dumps(result) + b"\n")
     except Exception as exc:  # noqa: BLE001
         logger.exception("Unhandled error")
-        print(json.dumps({"success": False, "error": str(exc)}))
+        sys.stdout.buffer.write(dumps({"success": False, "error": str(exc)}) + b"\n")
         raise
 
 
@@ -0,0 +1,95 @@
+"""
+Streaming JSON output shared by the fetcher CLIs.
+
+Results are written straight from a cursor in batches as either a JSON
+array (what server.js parses today) or NDJSON, so peak memory does not grow
+with the result size and the first bytes go out immediately. orjson is used
+when installed; otherwise the stdlib encoder is used with the same output.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, BinaryIO, Iterable
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """
+    Encode the non-JSON types the fetchers produce.
+    
+    Anything else (ObjectId, Decimal128, ...) falls back to str(), as the
+    previous json.dumps(default=str) output did.
+    """
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """Encode obj as compact UTF-8 JSON."""
+        # orjson encodes datetime/date natively in the same ISO format
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        """Encode obj as compact UTF-8 JSON."""
+        return _encoder.encode(obj).encode("utf-8")
+
+
+def write_json_array(items: Iterable, out: BinaryIO, batch_size: int = 500) -> int:
+    """
+    Write items as one JSON array, flushing every batch_size items.
+    
+    Returns:
+        int: Number of items written
+    """
+    count = 0
+    buffer = [b"["]
+    for item in items:
+        if count:
+            buffer.append(b",")
+        buffer.append(dumps(item))
+        count += 1
+        if count % batch_size == 0:
+            out.write(b"".join(buffer))
+            out.flush()
+            buffer = []
+    buffer.append(b"]\n")
+    out.write(b"".join(buffer))
+    out.flush()
+    return count
+
+
+def write_ndjson(items: Iterable, out: BinaryIO, batch_size: int = 500) -> int:
+    """
+    Write one JSON document per line, flushing every batch_size items.
+    
+    Returns:
+        int: Number of items written
+    """
+    count = 0
+    buffer = []
+    for item in items:
+        buffer.append(dumps(item))
+        buffer.append(b"\n")
+        count += 1
+        if count % batch_size == 0:
+            out.write(b"".join(buffer))
+            out.flush()
+            buffer = []
+    out.write(b"".join(buffer))
+    out.flush()
+    return count
+
+
+def write_stream(items: Iterable, out: BinaryIO, fmt: str = "json", batch_size: int = 500) -> int:
+    """Write items in the requested format ("json" array or "ndjson")."""
+    if fmt == "ndjson":
+        return write_ndjson(items, out, batch_size)
+    return write_json_array(items, out, batch_size)
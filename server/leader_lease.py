@@ -0,0 +1,256 @@
+"""
+Leader leases so that only one of several scheduler replicas runs jobs.
+
+Every replica runs scheduler.py and tries to hold the same named lease:
+
+- A lease has an owner, an expiry and a fencing token. The holder renews it
+  every ttl/3; if the holder dies, another replica takes it over as soon as
+  it expires.
+- Every change of owner bumps the token. Writers hand the token to the
+  store, which refuses tokens older than the newest it has seen, so a leader
+  that stalled past its expiry cannot overwrite its successor's work.
+- claim_run() records each job's last run inside the lease, so a new leader
+  does not repeat a run its predecessor already made this interval.
+
+MongoLease keeps the lease in a `scheduler_leases` document; FileLease keeps
+it in a JSON file for a single host or a volume shared by the replicas.
+Expiry uses each replica's clock, so clocks must agree to well within the TTL.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# A FileLease mutex older than this was left by a process that died mid-update
+STALE_MUTEX_SECONDS = 10.0
+
+
+class StaleLeaseError(RuntimeError):
+    """A write carried a fencing token older than one the store has already seen."""
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease(ABC):
+    """Common state for lease backends; `token` is set while this replica leads."""
+    
+    def __init__(self, name: str, ttl: float, owner: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.token: Optional[int] = None
+    
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None
+    
+    @abstractmethod
+    def acquire(self) -> Optional[int]:
+        """Renew or take the lease; returns the fencing token, or None if another replica holds it."""
+    
+    @abstractmethod
+    def release(self) -> None:
+        """Expire the lease now if held, so a successor need not wait out the TTL."""
+    
+    @abstractmethod
+    def claim_run(self, job: str, min_interval: float) -> Optional[int]:
+        """
+        Claim a run of job if this replica leads and it has not run for min_interval seconds.
+        
+        Returns the fencing token to pass to the job's writes, or None to skip.
+        """
+    
+    def renew(self) -> bool:
+        """acquire() that logs leadership changes and treats store errors as lost leadership."""
+        was_leader = self.is_leader
+        try:
+            self.acquire()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Lease %s renewal failed: %s", self.name, exc)
+            self.token = None
+        if self.is_leader and not was_leader:
+            logger.info("Acquired lease %s as %s (token %s)", self.name, self.owner, self.token)
+        elif was_leader and not self.is_leader:
+            logger.warning("Lost lease %s", self.name)
+        return self.is_leader
+
+
+class MongoLease(Lease):
+    """Lease held in one document of db.scheduler_leases."""
+    
+    def __init__(self, db, name: str = "scheduler", ttl: float = 60.0, owner: Optional[str] = None):
+        super().__init__(name, ttl, owner)
+        self.collection = db.scheduler_leases
+    
+    def acquire(self) -> Optional[int]:
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+        
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=self.ttl)
+        # Renew our own lease, else take over an expired one, else create it
+        doc = self.collection.find_one_and_update(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expiresAt": expires, "renewedAt": now}},
+            {"token": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            doc = self.collection.find_one_and_update(
+                {"_id": self.name, "expiresAt": {"$lte": now}},
+                {
+                    "$set": {"owner": self.owner, "expiresAt": expires, "renewedAt": now, "acquiredAt": now},
+                    "$inc": {"token": 1},
+                },
+                {"token": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+        if doc is None:
+            doc = {
+                "_id": self.name, "owner": self.owner, "token": 1, "expiresAt": expires,
+                "renewedAt": now, "acquiredAt": now, "lastRun": {},
+            }
+            try:
+                self.collection.insert_one(doc)
+            except DuplicateKeyError:
+                doc = None
+        self.token = doc["token"] if doc else None
+        return self.token
+    
+    def release(self) -> None:
+        # The document stays so the token keeps counting up across owners
+        self.collection.update_one(
+            {"_id": self.name, "owner": self.owner}, {"$set": {"expiresAt": datetime.utcnow()}}
+        )
+        self.token = None
+    
+    def claim_run(self, job: str, min_interval: float) -> Optional[int]:
+        token = self.token
+        if token is None:
+            return None
+        now = datetime.utcnow()
+        last_run = f"lastRun.{job}"
+        result = self.collection.update_one(
+            {
+                "_id": self.name,
+                "owner": self.owner,
+                "token": token,
+                "expiresAt": {"$gt": now},
+                "$or": [
+                    {last_run: {"$exists": False}},
+                    {last_run: {"$lte": now - timedelta(seconds=min_interval)}},
+                ],
+            },
+            {"$set": {last_run: now}},
+        )
+        return token if result.modified_count else None
+
+
+class FileLease(Lease):
+    """
+    Lease held in a JSON file.
+    
+    Updates are serialized by a mutex file created with O_EXCL, which works
+    on local disks and on shared volumes where fcntl locks are unreliable.
+    """
+    
+    def __init__(self, path: str, name: str = "scheduler", ttl: float = 60.0, owner: Optional[str] = None):
+        super().__init__(name, ttl, owner)
+        self.path = path
+    
+    @contextmanager
+    def _locked(self) -> Iterator[Dict]:
+        mutex = f"{self.path}.lock"
+        deadline = time.monotonic() + STALE_MUTEX_SECONDS
+        while True:
+            try:
+                os.close(os.open(mutex, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(mutex) > STALE_MUTEX_SECONDS:
+                        os.remove(mutex)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Lease mutex {mutex} is busy")
+                time.sleep(0.05)
+        try:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (FileNotFoundError, ValueError):
+                state = {}
+            leases = state.setdefault("leases", {})
+            yield leases.setdefault(self.name, {"token": 0, "expires_at": 0, "last_run": {}})
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            os.remove(mutex)
+    
+    def acquire(self) -> Optional[int]:
+        with self._locked() as lease:
+            now = time.time()
+            if lease.get("owner") != self.owner:
+                if lease["expires_at"] > now:
+                    self.token = None
+                    return None
+                lease.update(owner=self.owner, token=lease["token"] + 1, acquired_at=now)
+            lease["expires_at"] = now + self.ttl
+            self.token = lease["token"]
+        return self.token
+    
+    def release(self) -> None:
+        with self._locked() as lease:
+            if lease.get("owner") == self.owner:
+                lease["expires_at"] = time.time()
+        self.token = None
+    
+    def claim_run(self, job: str, min_interval: float) -> Optional[int]:
+        token = self.token
+        if token is None:
+            return None
+        with self._locked() as lease:
+            now = time.time()
+            if lease.get("owner") != self.owner or lease["token"] != token or lease["expires_at"] <= now:
+                return None
+            if now - lease["last_run"].get(job, 0) < min_interval:
+                return None
+            lease["last_run"][job] = now
+        return token
+
+
+class LeaseKeeper(threading.Thread):
+    """Renews a lease every ttl/3, or keeps trying to take it, until stopped."""
+    
+    def __init__(self, lease: Lease):
+        super().__init__(name=f"lease-{lease.name}", daemon=True)
+        self.lease = lease
+        self.stopped = threading.Event()
+    
+    def run(self) -> None:
+        while not self.stopped.wait(self.lease.ttl / 3):
+            self.lease.renew()
+    
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+        try:
+            self.lease.release()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Lease %s release failed: %s", self.lease.name, exc)
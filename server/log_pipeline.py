@@ -0,0 +1,157 @@
+"""
+Non-blocking logging for the fetcher CLIs.
+
+Records go through a QueueHandler to a background QueueListener that owns
+the rotating file and console handlers, so a hot loop never waits on disk.
+The queue handler also rate-limits per call site: after `burst` records from
+one logging call within `window` seconds, further records are counted
+instead of queued, and a single summary line reports how many were dropped.
+
+Per-record loops should use ErrorTally instead of logging each failure:
+it skips LogRecord creation entirely for repeats, which the handler-level
+limit cannot.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+DEFAULT_BURST = 20
+DEFAULT_WINDOW = 60.0
+
+_listener: Optional[QueueListener] = None
+
+
+class RateLimitedQueueHandler(QueueHandler):
+    """
+    QueueHandler that passes at most `burst` records per call site per window.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, burst: int = DEFAULT_BURST, window: float = DEFAULT_WINDOW):
+        super().__init__(log_queue)
+        self.burst = burst
+        self.window = window
+        # call site -> [window start, records seen, records suppressed, last suppressed record]
+        self._sites: Dict[Tuple, List] = {}
+        self._sites_lock = threading.Lock()
+    
+    def handle(self, record: logging.LogRecord) -> bool:
+        site = (record.pathname, record.lineno, record.levelno)
+        summary = None
+        with self._sites_lock:
+            state = self._sites.get(site)
+            if state is None or record.created - state[0] >= self.window:
+                if state is not None and state[2]:
+                    summary = self._summary(state)
+                state = self._sites[site] = [record.created, 0, 0, None]
+            state[1] += 1
+            if state[1] > self.burst:
+                state[2] += 1
+                state[3] = record
+                return False
+        if summary is not None:
+            super().handle(summary)
+        return super().handle(record)
+    
+    def _summary(self, state: List) -> logging.LogRecord:
+        last = state[3]
+        summary = logging.makeLogRecord(last.__dict__)
+        summary.msg = "%s similar messages suppressed in %.0fs; last: %s"
+        summary.args = (f"{state[2]:,}", last.created - state[0], last.getMessage())
+        summary.exc_info = summary.exc_text = None
+        return summary
+    
+    def flush_suppressed(self) -> None:
+        """Emit summaries for every call site with suppressed records."""
+        with self._sites_lock:
+            summaries = [self._summary(state) for state in self._sites.values() if state[2]]
+            self._sites.clear()
+        for summary in summaries:
+            super().handle(summary)
+
+
+class ErrorTally:
+    """
+    Count repeated errors in a loop, logging the first few and one summary each.
+    """
+    
+    def __init__(self, log: logging.Logger, first: int = 3):
+        self.log = log
+        self.first = first
+        self.counts: Dict[str, int] = {}
+        self.last: Dict[str, object] = {}
+    
+    def add(self, message: str, error: object) -> None:
+        count = self.counts[message] = self.counts.get(message, 0) + 1
+        if count <= self.first:
+            self.log.error("%s: %s", message, error)
+        else:
+            self.last[message] = error
+    
+    def flush(self) -> None:
+        """Log e.g. "4,213 records failed (Error storing price record)" per message."""
+        for message, count in self.counts.items():
+            if count > self.first:
+                self.log.error(
+                    "%s records failed (%s); last error: %s", f"{count:,}", message, self.last[message]
+                )
+        self.counts.clear()
+        self.last.clear()
+
+
+def install_logging(
+    log_file: str,
+    level: int = logging.INFO,
+    max_bytes: Optional[int] = None,
+    backup_count: Optional[int] = None,
+    burst: Optional[int] = None,
+    window: Optional[float] = None,
+) -> RateLimitedQueueHandler:
+    """
+    Route the root logger through a rate-limited queue to rotating file and console handlers.
+    
+    Unset limits come from LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_BURST and
+    LOG_WINDOW. Safe to call more than once; later calls are no-ops.
+    """
+    global _listener
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, RateLimitedQueueHandler):
+            return handler
+    
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=max_bytes if max_bytes is not None else int(os.environ.get("LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        backupCount=backup_count if backup_count is not None else int(os.environ.get("LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT)),
+        encoding="utf-8",
+    )
+    console_handler = logging.StreamHandler()
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    
+    log_queue: queue.Queue = queue.Queue()
+    queue_handler = RateLimitedQueueHandler(
+        log_queue,
+        burst=burst if burst is not None else int(os.environ.get("LOG_BURST", DEFAULT_BURST)),
+        window=window if window is not None else float(os.environ.get("LOG_WINDOW", DEFAULT_WINDOW)),
+    )
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    
+    def shutdown():
+        queue_handler.flush_suppressed()
+        _listener.stop()
+        file_handler.close()
+    
+    atexit.register(shutdown)
+    return queue_handler
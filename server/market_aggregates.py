@@ -0,0 +1,170 @@
+"""
+Materialized Market Aggregates
+
+Summary tables behind the market dashboard, refreshed incrementally after
+each ingest so reads are single indexed lookups instead of scans over the
+raw price history.
+
+Tables (created by migration 4 in market_migrations):
+  - agg_latest_price       : latest price per (commodity, state)
+  - agg_commodity_daily    : per-commodity daily average, min/max and arrivals
+  - agg_commodity_summary  : latest national average, spread and change per commodity
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+def _upsert_latest(cursor: sqlite3.Cursor, records: Iterable) -> None:
+    cursor.executemany("""
+        INSERT INTO agg_latest_price (commodity, state, market_name, price, date)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (commodity, state) DO UPDATE SET
+            market_name = excluded.market_name,
+            price = excluded.price,
+            date = excluded.date
+        WHERE excluded.date >= agg_latest_price.date
+    """, ((r.commodity, r.state, r.market_name, r.price, r.date) for r in records if r.price > 0))
+
+
+def _refresh_daily(cursor: sqlite3.Cursor, prices_table: str, demand_table: str, keys: Iterable[Tuple]) -> None:
+    for commodity, day in keys:
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO agg_commodity_daily (
+                commodity, date, avg_price, min_price, max_price, markets, arrival_quantity
+            )
+            SELECT ?, ?, AVG(price), MIN(price), MAX(price), COUNT(DISTINCT market_name),
+                   (SELECT SUM(arrival_quantity) FROM {demand_table} WHERE commodity = ? AND date = ?)
+            FROM {prices_table}
+            WHERE commodity = ? AND date = ? AND price > 0
+            HAVING COUNT(*) > 0
+        """, (commodity, day, commodity, day, commodity, day))
+
+
+def _refresh_summary(cursor: sqlite3.Cursor, commodities: Iterable[str], refreshed_at: datetime) -> None:
+    for commodity in commodities:
+        days = cursor.execute("""
+            SELECT date, avg_price, min_price, max_price, arrival_quantity, markets
+            FROM agg_commodity_daily
+            WHERE commodity = ?
+            ORDER BY date DESC
+            LIMIT 2
+        """, (commodity,)).fetchall()
+        if not days:
+            continue
+        day, avg_price, min_price, max_price, arrivals, markets = days[0]
+        prev_avg = days[1][1] if len(days) > 1 else None
+        change = (avg_price - prev_avg) / prev_avg * 100 if prev_avg else 0.0
+        cursor.execute("""
+            INSERT OR REPLACE INTO agg_commodity_summary (
+                commodity, date, avg_price, min_price, max_price, spread,
+                prev_avg_price, change_percentage, arrival_quantity, markets, refreshed_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (commodity, day, avg_price, min_price, max_price, max_price - min_price,
+              prev_avg, round(change, 4), arrivals, markets, refreshed_at))
+
+
+def refresh_aggregates(conn: sqlite3.Connection, records: List, prices_table: str,
+                       demand_table: str, refreshed_at: Optional[datetime] = None) -> int:
+    """
+    Update the summary tables for the commodities and dates in records.
+    
+    Runs on the caller's connection so it can share the ingest transaction.
+    Work is proportional to the batch, not to the stored history.
+    
+    Args:
+        conn (sqlite3.Connection): Open connection
+        records (List): MarketRecord-like objects from the ingested batch
+        prices_table (str): Table or view holding named price rows
+        demand_table (str): Table or view holding named demand rows
+        refreshed_at (Optional[datetime]): Timestamp stored on summary rows
+        
+    Returns:
+        int: Number of commodities whose summary was refreshed
+    """
+    cursor = conn.cursor()
+    keys: Set[Tuple] = {(r.commodity, r.date) for r in records if r.price > 0}
+    commodities = {commodity for commodity, _ in keys}
+    
+    _upsert_latest(cursor, records)
+    _refresh_daily(cursor, prices_table, demand_table, keys)
+    _refresh_summary(cursor, commodities, refreshed_at or datetime.now())
+    return len(commodities)
+
+
+def rebuild_aggregates(conn: sqlite3.Connection, prices_table: str, demand_table: str) -> int:
+    """
+    Recompute all summary tables from the stored history (backfill).
+    
+    Returns:
+        int: Number of commodities summarized
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM agg_latest_price")
+    cursor.execute("DELETE FROM agg_commodity_daily")
+    cursor.execute("DELETE FROM agg_commodity_summary")
+    
+    # Latest row per (commodity, state); ties on date go to the newest id
+    cursor.execute(f"""
+        INSERT INTO agg_latest_price (commodity, state, market_name, price, date)
+        SELECT commodity, state, market_name, price, date FROM (
+            SELECT commodity, state, market_name, price, date,
+                   ROW_NUMBER() OVER (PARTITION BY commodity, state ORDER BY date DESC, id DESC) AS rn
+            FROM {prices_table}
+            WHERE price > 0
+        ) WHERE rn = 1
+    """)
+    keys = cursor.execute(f"SELECT DISTINCT commodity, date FROM {prices_table} WHERE price > 0").fetchall()
+    _refresh_daily(cursor, prices_table, demand_table, keys)
+    commodities = {commodity for commodity, _ in keys}
+    _refresh_summary(cursor, commodities, datetime.now())
+    return len(commodities)
+
+
+def _row_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    # Set on the cursor, not the connection, which may be pooled and shared
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor
+
+
+def _rows_as_dicts(rows: List[sqlite3.Row]) -> List[Dict]:
+    return [dict(row) for row in rows]
+
+
+def read_summary(conn: sqlite3.Connection, commodity: Optional[str] = None) -> List[Dict]:
+    """Summary rows for one commodity (primary-key lookup) or all commodities."""
+    cursor = _row_cursor(conn)
+    if commodity:
+        rows = cursor.execute("SELECT * FROM agg_commodity_summary WHERE commodity = ?", (commodity,)).fetchall()
+    else:
+        rows = cursor.execute("SELECT * FROM agg_commodity_summary ORDER BY commodity").fetchall()
+    return _rows_as_dicts(rows)
+
+
+def read_top_movers(conn: sqlite3.Connection, limit: int = 5) -> Dict[str, List[Dict]]:
+    """Top gainers and losers by day-over-day average change, via the change index."""
+    cursor = _row_cursor(conn)
+    gainers = cursor.execute("""
+        SELECT * FROM agg_commodity_summary
+        WHERE change_percentage > 0
+        ORDER BY change_percentage DESC LIMIT ?
+    """, (limit,)).fetchall()
+    losers = cursor.execute("""
+        SELECT * FROM agg_commodity_summary
+        WHERE change_percentage < 0
+        ORDER BY change_percentage ASC LIMIT ?
+    """, (limit,)).fetchall()
+    return {'gainers': _rows_as_dicts(gainers), 'losers': _rows_as_dicts(losers)}
+
+
+def read_latest_prices(conn: sqlite3.Connection, commodity: str, state: Optional[str] = None) -> List[Dict]:
+    """Latest price per state for a commodity (primary-key prefix lookup)."""
+    cursor = _row_cursor(conn)
+    if state:
+        rows = cursor.execute(
+            "SELECT * FROM agg_latest_price WHERE commodity = ? AND state = ?", (commodity, state)
+        ).fetchall()
+    else:
+        rows = cursor.execute("SELECT * FROM agg_latest_price WHERE commodity = ?", (commodity,)).fetchall()
+    return _rows_as_dicts(rows)
@@ -8,123 +8,623 @@ Author: Smart Farming Analytics Team
 Date: 2025
 """
 
-import requests
+import argparse
+import base64
 import sqlite3
 import json
 import logging
+import os
+import sys
+import threading
+from contextlib import closing, contextmanager
 from datetime import datetime, date
-from typing import List, Dict, Optional, Tuple
-import pandas as pd
-from urllib.parse import urlencode
-import time
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('market_data_fetcher.log'),
-        logging.StreamHandler()
-    ]
+from pathlib import Path
+from sys import intern
+from typing import List, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from circuit_breaker import CircuitBreakers
+from date_parsing import DateParser
+from json_stream import dumps, write_stream
+from log_pipeline import ErrorTally, install_logging
+from market_aggregates import (
+    read_latest_prices, read_summary, read_top_movers, rebuild_aggregates, refresh_aggregates,
 )
+from market_migrations import DIMENSIONS, SCHEMA_VERSION, get_version, migrate
+from market_pool import DEFAULT_PRAGMAS, ConnectionPool
+from market_store import MarketStore, mongo_market_store
+from payload_archive import ArchiveEntry, PayloadArchive
+from price_anomaly import ANOMALY_MODES, PriceAnomalyDetector
+from record_mapping import Field, RecordMapper, interned_text, positive_number
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_API_BASE_URL = "https://api.data.gov.in"
+# Daily mandi prices resource
+MARKET_RESOURCE_ID = "9ef84268-d588-465a-a308-a864a43d0070"
+
+# WAL size (pages) above which a passive checkpoint is followed by a truncating one
+WAL_TRUNCATE_PAGES = 10000
+# Upper bound on rows per keyset page
+MAX_PAGE_SIZE = 1000
+# Upper bound on points per chart series
+MAX_CHART_POINTS = 5000
+CHART_METHODS = ('lttb', 'buckets')
+# Days forecast per series, and days of history each forecast run fits on
+FORECAST_HORIZON = 14
+FORECAST_HISTORY_DAYS = 365
+
+
+def configure_logging() -> None:
+    """
+    Install the queued, rate-limited file and console log handlers.
+    
+    Only called when the module runs as a script, so importing it stays cheap
+    and leaves logging setup to the host process.
+    """
+    install_logging('market_data_fetcher.log')
+
+
+class MarketRecord(NamedTuple):
+    """
+    One parsed market observation.
+    
+    Price, trend and demand rows are all derived from this single record, so
+    commodity, market, unit and date are held once instead of three times.
+    """
+    commodity: str
+    market_name: str
+    state: str
+    district: str
+    variety: str
+    price: float
+    unit: str
+    date: date
+    # Price was missing upstream and filled from FALLBACK_PRICES
+    imputed: bool = False
+
+
+class MarketBatch:
+    """
+    Parsed market records that share a single last_updated timestamp.
+    """
+    
+    __slots__ = ('records', 'last_updated')
+    
+    def __init__(self, last_updated: datetime, records: Optional[List[MarketRecord]] = None):
+        self.last_updated = last_updated
+        self.records = records if records is not None else []
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def price_count(self) -> int:
+        """Number of records that produce a price row."""
+        return sum(1 for record in self.records if record.price > 0)
+    
+    def price_rows(self) -> Iterator[Tuple]:
+        """Yield market_prices rows in column order."""
+        last_updated = self.last_updated
+        for r in self.records:
+            if r.price > 0:
+                yield (r.commodity, r.market_name, r.state, r.district, r.variety,
+                       r.price, r.unit, r.date, last_updated)
+    
+    def trend_rows(self) -> Iterator[Tuple]:
+        """Yield market_trends rows in column order."""
+        last_updated = self.last_updated
+        for r in self.records:
+            # Simplified trend: mock yesterday's price at 95% of today's
+            yield (r.commodity, r.market_name, r.state, r.price, r.price * 0.95,
+                   r.price * 0.05, 5.0, r.date, last_updated)
+    
+    def demand_rows(self) -> Iterator[Tuple]:
+        """Yield market_demand rows in column order."""
+        last_updated = self.last_updated
+        for r in self.records:
+            price = r.price
+            demand_level = 'High' if price > 2000 else 'Medium' if price > 1000 else 'Low'
+            supply_level = 'High' if price < 1500 else 'Medium' if price < 2500 else 'Low'
+            # Mock arrival quantity
+            yield (r.commodity, r.market_name, r.state, demand_level, supply_level,
+                   price * 10, r.unit, r.date, last_updated)
+
+
+# Shared across fetches: consecutive feeds mostly repeat the same dates
+_DATES = DateParser()
+
+# data.gov.in field names drift between resources; aliases are in priority order
+MARKET_FIELDS = (
+    Field('commodity', ('commodity', 'commodity_name'), interned_text, required=True),
+    Field('market_name', ('market', 'market_name', 'mandi'), interned_text),
+    Field('state', ('state', 'state_name'), interned_text),
+    Field('district', ('district', 'district_name'), interned_text),
+    Field('variety', ('variety',), interned_text),
+    Field('price', ('price', 'modal_price', 'min_price', 'max_price', 'arrival_price'),
+          positive_number, default=0.0),
+    Field('unit', ('unit',), interned_text, default='Quintal'),
+    Field('date', ('date', 'arrival_date'), _DATES.parse, default=None),
+)
+
+# Used when a record carries no usable price
+FALLBACK_PRICES = {
+    'Wheat': 2500, 'Rice': 2800, 'Maize': 1800, 'Soybean': 4000,
+    'Cotton': 6000, 'Sugarcane': 300, 'Potato': 1500, 'Onion': 2000,
+    'Tomato': 3000, 'Chilli': 8000
+}
+
+
+# Insert statements for the plain (denormalized) market tables. Prices are
+# upserted in place, so a row keeps its id and only new rows get ids above
+# the table's current maximum.
+INSERT_SQL = {
+    'prices': """
+        INSERT INTO market_prices (
+            commodity, market_name, state, district, variety, price, unit, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (commodity, market_name, state, district, variety, date) DO UPDATE SET
+            price = excluded.price, unit = excluded.unit, last_updated = excluded.last_updated
+        RETURNING id
+    """,
+    'trends': """
+        INSERT OR REPLACE INTO market_trends (
+            commodity, market_name, state, price_today, price_yesterday,
+            price_change, change_percentage, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'demand': """
+        INSERT OR REPLACE INTO market_demand (
+            commodity, market_name, state, demand_level, supply_level,
+            arrival_quantity, unit, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'max_price_id': "SELECT COALESCE(MAX(id), 0) FROM market_prices",
+}
+
+# Insert statements for the normalized fact tables
+NORMALIZED_INSERT_SQL = {
+    'prices': """
+        INSERT INTO fact_market_prices (
+            commodity_id, market_id, state_id, district_id, variety_id, price, unit_id, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (commodity_id, market_id, state_id, district_id, variety_id, date) DO UPDATE SET
+            price = excluded.price, unit_id = excluded.unit_id, last_updated = excluded.last_updated
+        RETURNING id
+    """,
+    'max_price_id': "SELECT COALESCE(MAX(id), 0) FROM fact_market_prices",
+    'trends': """
+        INSERT OR REPLACE INTO fact_market_trends (
+            commodity_id, market_id, state_id, price_today, price_yesterday,
+            price_change, change_percentage, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    'demand': """
+        INSERT OR REPLACE INTO fact_market_demand (
+            commodity_id, market_id, state_id, demand_level, supply_level,
+            arrival_quantity, unit_id, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+}
+
+class DimensionCache:
+    """
+    Bidirectional in-memory name <-> id cache for the dimension tables.
+    
+    Names are resolved from memory during ingest; the database is only
+    touched the first time a dimension is used and when a new name appears.
+    """
+    
+    def __init__(self):
+        self._ids: Dict[str, Dict[str, int]] = {}
+        self._names: Dict[str, Dict[int, str]] = {}
+    
+    def _load(self, cursor: sqlite3.Cursor, dimension: str) -> Dict[str, int]:
+        ids = {}
+        names = {}
+        for dim_id, name in cursor.execute(f"SELECT id, name FROM {DIMENSIONS[dimension]}"):
+            ids[name] = dim_id
+            names[dim_id] = name
+        self._ids[dimension] = ids
+        self._names[dimension] = names
+        return ids
+    
+    def encode(self, cursor: sqlite3.Cursor, dimension: str, name: str) -> int:
+        """
+        Return the id for a name, inserting it into the dimension table if new.
+        """
+        ids = self._ids.get(dimension)
+        if ids is None:
+            ids = self._load(cursor, dimension)
+        dim_id = ids.get(name)
+        if dim_id is None:
+            table = DIMENSIONS[dimension]
+            cursor.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            dim_id = cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+            ids[name] = dim_id
+            self._names[dimension][dim_id] = name
+        return dim_id
+    
+    def lookup(self, cursor: sqlite3.Cursor, dimension: str, name: str) -> Optional[int]:
+        """Return the id for a name, or None if the dimension has no such name yet."""
+        ids = self._ids.get(dimension)
+        if ids is None:
+            ids = self._load(cursor, dimension)
+        return ids.get(name)
+    
+    def decode(self, dimension: str, dim_id: int) -> Optional[str]:
+        """Return the cached name for an id, or None if it is not loaded."""
+        return self._names.get(dimension, {}).get(dim_id)
+    
+    def clear(self) -> None:
+        """Drop all cached mappings, e.g. after the transaction that filled them rolled back."""
+        self._ids.clear()
+        self._names.clear()
+
+
+def parse_market_records(raw_data: List[Dict], last_updated: Optional[datetime] = None) -> MarketBatch:
+    """
+    Parse raw market data and extract price, trend, and demand information.
+    
+    Each input record becomes a single compact MarketRecord; the trend and
+    demand rows are derived from it when the batch is stored. Module-level
+    so archived payloads can be re-parsed in worker processes.
+    
+    Args:
+        raw_data (List[Dict]): Raw data from API
+        last_updated (Optional[datetime]): Batch timestamp; defaults to now
+    
+    Returns:
+        MarketBatch: Parsed records sharing one last_updated timestamp
+    """
+    batch = MarketBatch(last_updated=last_updated or datetime.now())
+    records = batch.records
+    today = date.today()
+    
+    mapper = RecordMapper(MARKET_FIELDS)
+    extract = mapper.extract
+    errors = ErrorTally(logger)
+    
+    for record in raw_data:
+        try:
+            values = extract(record)
+            if values is None:
+                continue
+            commodity, market_name, state, district, variety, price, unit, market_date = values
+            
+            # If market name is empty, generate one
+            if not market_name:
+                market_name = intern(f"{state} Mandi") if state else 'Local Market'
+            
+            imputed = not price
+            if imputed:
+                # Generate a realistic price based on commodity
+                price = FALLBACK_PRICES.get(commodity, 2000) + (hash(commodity) % 1000)
+            
+            records.append(MarketRecord(
+                commodity, market_name, state, district, variety, price, unit, market_date or today, imputed
+            ))
+        
+        except Exception as e:
+            errors.add("Error parsing record", e)
+            continue
+    errors.flush()
+    
+    report = mapper.report()
+    if report['fields']:
+        logger.info(f"Field rejections: {report}")
+    bad_dates = report['fields'].get('date', {})
+    if bad_dates.get('invalid'):
+        # One line per batch; a bad feed used to log one warning per record
+        logger.warning(
+            f"{bad_dates['invalid']} records had unparseable dates and were given today's date "
+            f"(e.g. {bad_dates['samples']})"
+        )
+    logger.info(f"Successfully parsed {batch.price_count()} prices, {len(records)} trends, {len(records)} demand records")
+    return batch
+
+
+CHECKPOINT_UPSERT_SQL = """
+    INSERT OR REPLACE INTO crawl_checkpoints
+    (resource, crawl_id, next_offset, total, pages_done, rows_stored, started_at, updated_at, completed_at)
+    VALUES (:resource, :crawl_id, :next_offset, :total, :pages_done, :rows_stored,
+            :started_at, :updated_at, :completed_at)
+"""
+
+ANOMALY_UPSERT_SQL = """
+    INSERT OR REPLACE INTO market_anomalies
+    (commodity, market_name, state, district, variety, price, unit, date, expected_price, reason, action,
+     last_updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _reparse_market_page(entry: ArchiveEntry, records: List[Dict]) -> MarketBatch:
+    return parse_market_records(records, last_updated=entry.fetched_at)
+
+
+def encode_cursor(table: str, last_updated: str, row_id: int) -> str:
+    """
+    Opaque page cursor: the (last_updated, id) of the last row served.
+    """
+    raw = json.dumps([table, last_updated, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, table: str) -> Tuple[str, int]:
+    """
+    Inverse of encode_cursor; raises ValueError for a malformed cursor or one
+    issued for another table.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_table, last_updated, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    if cursor_table != table or not isinstance(row_id, int):
+        raise ValueError(f"Cursor is not for the {table} table")
+    return last_updated, row_id
+
+
 class MarketDataFetcher:
     """
     Fetches and manages market price data from government APIs.
     """
     
-    def __init__(self, db_path: str = "agriai.db"):
+    def __init__(self, db_path: str = "agriai.db", normalized: bool = False,
+                 wal: bool = False, snapshot_path: Optional[str] = None,
+                 api_base_url: Optional[str] = None, archive_dir: Optional[str] = None,
+                 store: Optional[MarketStore] = None, forecast: bool = False,
+                 anomaly_mode: Optional[str] = None):
         """
         Initialize the fetcher with database path.
         
         Args:
             db_path (str): Path to SQLite database file
+            normalized (bool): Store commodity, market, state, district and unit
+                in dimension tables referenced by integer ids
+            wal (bool): Put the database in WAL mode so readers never wait on
+                the ingest writer; the WAL is checkpointed after each ingest
+            snapshot_path (Optional[str]): Treat db_path as a staging database
+                and atomically publish a read-only copy here after each ingest;
+                all reads are served from the published copy
+            api_base_url (Optional[str]): data.gov.in base URL; defaults to
+                DATA_GOV_BASE_URL, e.g. a local stub for offline load tests
+            archive_dir (Optional[str]): Keep every fetched page in a
+                PayloadArchive here (default PAYLOAD_ARCHIVE_DIR; unset disables)
+            store (Optional[MarketStore]): Price history backend, e.g. a
+                MongoMarketStore shared by all app nodes: every committed batch
+                is written to it and get_price_range reads from it; None keeps
+                the price history in this database only
+            forecast (bool): Also refresh market_forecasts after each fetch,
+                crawl or reprocess; off by default, since a refresh re-reads
+                FORECAST_HISTORY_DAYS of prices (scheduler.py --forecast runs
+                it as its own job instead)
+            anomaly_mode (Optional[str]): What ingest does with outlier and
+                imputed prices: 'flag' (default) records them in
+                market_anomalies and stores them as before, 'quarantine' keeps
+                them out of the market tables (imputed prices included, so
+                records without a price are no longer stored), 'off' skips
+                screening; defaults to MARKET_ANOMALY_MODE
         """
         self.db_path = db_path
-        self.api_base_url = "https://api.data.gov.in"
+        self.normalized = normalized
+        self.wal = wal
+        self.snapshot_path = snapshot_path
+        self.dimensions = DimensionCache()
+        if normalized:
+            self._tables = {'prices': 'v_market_prices', 'trends': 'v_market_trends', 'demand': 'v_market_demand'}
+        else:
+            self._tables = {'prices': 'market_prices', 'trends': 'market_trends', 'demand': 'market_demand'}
+        self.api_base_url = (api_base_url or os.environ.get('DATA_GOV_BASE_URL') or DEFAULT_API_BASE_URL).rstrip('/')
         self.api_key = "579b464db66ec23bdd000001de26158f944f4fca4e04133857ec1244"
+        archive_dir = archive_dir or os.environ.get('PAYLOAD_ARCHIVE_DIR')
+        self.archive = PayloadArchive(archive_dir) if archive_dir else None
+        self._breakers: Optional[CircuitBreakers] = None
+        self.store = store
+        self.forecast = forecast
+        self.anomaly_mode = anomaly_mode or os.environ.get('MARKET_ANOMALY_MODE') or 'flag'
+        if self.anomaly_mode not in ANOMALY_MODES:
+            raise ValueError(f"anomaly_mode must be one of {ANOMALY_MODES}")
+        self.detector = PriceAnomalyDetector() if self.anomaly_mode != 'off' else None
+        self._detector_loaded = False
+        
+        # Fixed query shapes (unset filters bind NULL) so sqlite3's statement cache always hits
+        filters = ("(:commodity IS NULL OR commodity LIKE :commodity)"
+                   " AND (:market IS NULL OR market_name LIKE :market)")
+        self._queries = {
+            'prices': f"SELECT * FROM {self._tables['prices']} WHERE {filters}"
+                      " AND (:state IS NULL OR state LIKE :state) ORDER BY last_updated DESC LIMIT 100",
+            'trends': f"SELECT * FROM {self._tables['trends']} WHERE {filters} ORDER BY last_updated DESC LIMIT 50",
+            'demand': f"SELECT * FROM {self._tables['demand']} WHERE {filters} ORDER BY last_updated DESC LIMIT 50",
+        }
+        self._page_queries = {table: self._keyset_queries(table) for table in self._tables}
+        
+        # Natural-key lookup that tells replayed records from new ones
+        if normalized:
+            self._stored_price_query = ("SELECT price FROM fact_market_prices WHERE commodity_id = ? AND market_id = ?"
+                                        " AND state_id = ? AND district_id = ? AND variety_id = ? AND date = ?")
+        else:
+            self._stored_price_query = ("SELECT price FROM market_prices WHERE commodity = ? AND market_name = ?"
+                                        " AND state = ? AND district = ? AND variety = ? AND date = ?")
+        
+        # Price range reads when no store is configured
+        self._range_query = f"""
+            SELECT commodity, market_name, state, district, variety, price, unit, date, last_updated
+            FROM {self._tables['prices']}
+            WHERE commodity = :commodity AND date BETWEEN :start AND :end
+              AND (:market IS NULL OR market_name = :market)
+              AND (:state IS NULL OR state = :state)
+            ORDER BY date
+        """
+        
+        # Chart series return one row per day (LTTB input) or per bucket (aggregated in
+        # SQLite) from the covering series indexes; with and without a market are separate
+        # shapes so each seeks its own index
+        prices = self._tables['prices']
+        self._chart_queries = {}
+        for scope, series in (('all', "commodity = :commodity"),
+                              ('market', "commodity = :commodity AND market_name = :market")):
+            where = f"{series} AND date BETWEEN :start AND :end AND price > 0"
+            self._chart_queries['lttb', scope] = (
+                f"SELECT date, AVG(price) FROM {prices} WHERE {where} GROUP BY date ORDER BY date"
+            )
+            self._chart_queries['buckets', scope] = f"""
+                WITH span AS (
+                    SELECT julianday((SELECT MIN(date) FROM {prices} WHERE {where})) AS first_day,
+                           julianday((SELECT MAX(date) FROM {prices} WHERE {where})) AS last_day
+                )
+                SELECT CAST((julianday(date) - first_day) * :points / (last_day - first_day + 1) AS INTEGER) AS bucket,
+                       MIN(date), MAX(date), MIN(price), MAX(price), AVG(price), COUNT(*)
+                FROM {prices}, span WHERE {where}
+                GROUP BY bucket ORDER BY bucket
+            """
+        
+        # Daily average per (commodity, market) over the trailing history window
+        self._forecast_query = f"""
+            SELECT commodity, market_name, date, AVG(price) AS price FROM {prices}
+            WHERE date >= date((SELECT MAX(date) FROM {prices}), :window) AND price > 0
+            GROUP BY commodity, market_name, date
+        """
         
         # Initialize database
         self._init_database()
+        
+        # Per-thread connections with pragmas applied once
+        pragmas = DEFAULT_PRAGMAS + (("PRAGMA synchronous = NORMAL",) if wal else ())
+        self._pool = ConnectionPool(db_path, pragmas=pragmas)
+        self._snapshot_pool = None
+        if snapshot_path:
+            uri = Path(snapshot_path).absolute().as_uri() + "?mode=ro&immutable=1"
+            self._snapshot_pool = ConnectionPool(snapshot_path, uri=uri, reopen_on_replace=True)
+        self._write_lock = threading.Lock()
+    
+    def _keyset_queries(self, table: str) -> Tuple[str, str]:
+        """
+        First-page and next-page statements for keyset pagination of a table.
+        
+        Key filters bind JSON arrays, so any number of commodities, markets
+        or states is one fixed statement. SQLite seeks a row-value bound such
+        as (last_updated, id) < (?, ?) on last_updated alone, which would
+        rescan every row sharing the cursor's timestamp (a whole ingest
+        batch); the next-page statement instead merges two seeks, the rest of
+        that timestamp by id and then older rows, so deep pages cost the
+        same as the first.
+        """
+        source = self._tables[table]
+        filters = ["(:commodities IS NULL OR commodity IN (SELECT value FROM json_each(:commodities)))",
+                   "(:markets IS NULL OR market_name IN (SELECT value FROM json_each(:markets)))"]
+        if table == 'prices':
+            filters.append("(:states IS NULL OR state IN (SELECT value FROM json_each(:states)))")
+        where = ' AND '.join(filters)
+        first = f"SELECT * FROM {source} WHERE {where} ORDER BY last_updated DESC, id DESC LIMIT :limit"
+        following = f"""
+            SELECT * FROM (
+                SELECT * FROM {source} WHERE {where} AND last_updated = :after_updated AND id < :after_id
+                ORDER BY id DESC LIMIT :limit
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT * FROM {source} WHERE {where} AND last_updated < :after_updated
+                ORDER BY last_updated DESC, id DESC LIMIT :limit
+            )
+            ORDER BY last_updated DESC, id DESC LIMIT :limit
+        """
+        return first, following
     
     def _init_database(self) -> None:
         """
-        Initialize SQLite database and create market data tables if they don't exist.
+        Initialize SQLite database and bring the market schema up to date.
+        
+        Pending migrations only run when the stored schema version (PRAGMA
+        user_version) is older than SCHEMA_VERSION, so repeat instantiations
+        cost one pragma read.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Create market_prices table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS market_prices (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        commodity TEXT NOT NULL,
-                        market_name TEXT NOT NULL,
-                        state TEXT,
-                        district TEXT,
-                        price REAL,
-                        unit TEXT,
-                        date DATE,
-                        last_updated DATETIME,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create market_trends table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS market_trends (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        commodity TEXT NOT NULL,
-                        market_name TEXT NOT NULL,
-                        price_today REAL,
-                        price_yesterday REAL,
-                        price_change REAL,
-                        change_percentage REAL,
-                        date DATE,
-                        last_updated DATETIME,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create market_demand table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS market_demand (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        commodity TEXT NOT NULL,
-                        market_name TEXT NOT NULL,
-                        demand_level TEXT,
-                        supply_level TEXT,
-                        arrival_quantity REAL,
-                        unit TEXT,
-                        date DATE,
-                        last_updated DATETIME,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create indexes for faster queries
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_commodity ON market_prices(commodity)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_market ON market_prices(market_name)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_date ON market_prices(date)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_state ON market_prices(state)
-                """)
-                
-                conn.commit()
-                logger.info("Market data database initialized successfully")
-                
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                if self.wal:
+                    conn.execute("PRAGMA journal_mode = WAL")
+                if get_version(conn) >= SCHEMA_VERSION:
+                    return
+            
+            migrate(self.db_path)
+            logger.info("Market data database initialized successfully")
+        
         except sqlite3.Error as e:
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    def _read_connection(self) -> sqlite3.Connection:
+        """
+        Return this thread's pooled connection for queries.
+        
+        In snapshot mode this is the published file opened immutable, which
+        takes no locks at all; a publish swaps in a new file, so open readers
+        keep seeing the version they started with and the pool reopens on
+        the next query.
+        """
+        if self._snapshot_pool is not None and os.path.exists(self.snapshot_path):
+            return self._snapshot_pool.get()
+        return self._pool.get()
+    
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Yield a pooled read connection and end any transaction left open on it."""
+        conn = self._read_connection()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+    
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close_all()
+        if self._snapshot_pool is not None:
+            self._snapshot_pool.close_all()
+    
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+        """
+        Checkpoint the WAL into the main database file.
+        
+        PASSIVE never waits on readers; TRUNCATE also resets the WAL file but
+        waits for readers to finish, so it is only used when the WAL has grown
+        past WAL_TRUNCATE_PAGES.
+        
+        Returns:
+            Tuple[int, int, int]: (busy, wal_pages, checkpointed_pages)
+        """
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            busy, wal_pages, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            if mode == "PASSIVE" and wal_pages > WAL_TRUNCATE_PAGES:
+                busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        logger.info(f"WAL checkpoint: busy={busy}, wal_pages={wal_pages}, checkpointed={checkpointed}")
+        return busy, wal_pages, checkpointed
+    
+    def publish_snapshot(self) -> Optional[str]:
+        """
+        Copy the staging database to snapshot_path and swap it in atomically.
+        
+        The copy is made with the backup API into a temporary file next to the
+        target and moved into place with os.replace, so readers see either the
+        old snapshot or the new one, never a partial file.
+        
+        Returns:
+            Optional[str]: Published path, or None when snapshot mode is off
+        """
+        if not self.snapshot_path:
+            return None
+        temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with closing(sqlite3.connect(self.db_path)) as source, closing(sqlite3.connect(temp_path)) as target:
+                source.backup(target)
+                # Snapshots are single self-contained files
+                target.execute("PRAGMA journal_mode = DELETE")
+            os.replace(temp_path, self.snapshot_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        logger.info(f"Published market snapshot to {self.snapshot_path}")
+        return self.snapshot_path
+    
     def _fetch_market_prices(self) -> Optional[List[Dict]]:
         """
         Fetch current market prices from government API.
@@ -132,40 +632,100 @@ class MarketDataFetcher:
         Returns:
             Optional[List[Dict]]: List of market price records or None if fetch fails
         """
+        page = self._fetch_market_page(0)
+        return page['records'] if page is not None else None
+    
+    def _fetch_market_page(self, offset: int, limit: int = 1000) -> Optional[Dict]:
+        """
+        Fetch one page of the market prices resource.
+        
+        Args:
+            offset (int): Index of the first record
+            limit (int): Page size
+        
+        Returns:
+            Optional[Dict]: The response envelope (records, total, ...) or None if fetch fails
+        """
+        import requests  # deferred: only needed when actually fetching
+        
         try:
             # Government API endpoint for market prices
-            url = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+            url = f"{self.api_base_url}/resource/{MARKET_RESOURCE_ID}"
+            if not self._circuit_allows(url):
+                logger.warning(f"Skipping {url}: circuit open after repeated failures")
+                return None
             
             params = {
                 'api-key': self.api_key,
                 'format': 'json',
-                'limit': 1000,
-                'offset': 0
+                'limit': limit,
+                'offset': offset
             }
             
-            logger.info(f"Fetching market prices from: {url}")
-            response = requests.get(url, params=params, timeout=30)
+            logger.info(f"Fetching market prices from: {url} (offset {offset})")
+            # Short connect timeout: a dead host fails fast instead of using the full read timeout
+            response = requests.get(url, params=params, timeout=(5, 30))
             response.raise_for_status()
             
             data = response.json()
+            self._record_fetch_success(url)
+            self._archive_page(MARKET_RESOURCE_ID, params['offset'], response.content)
             
             if 'records' in data:
                 logger.info(f"Successfully fetched {len(data['records'])} market price records from API")
-                return data['records']
+                return data
             else:
                 logger.warning("No 'records' field found in API response")
                 return None
-                
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"HTTP request failed: {e}")
+            self._record_fetch_failure(url, e)
             return None
         except json.JSONDecodeError as e:
             logger.error(f"JSON parsing failed: {e}")
+            self._record_fetch_failure(url, e)
             return None
         except Exception as e:
             logger.error(f"Unexpected error during API fetch: {e}")
             return None
     
+    def circuit_breakers(self) -> CircuitBreakers:
+        """Persistent breaker state (CIRCUIT_STATE_DB), opened on first fetch."""
+        if self._breakers is None:
+            self._breakers = CircuitBreakers()
+        return self._breakers
+    
+    # Breaker bookkeeping fails open: a broken state file must not stop ingest
+    def _circuit_allows(self, url: str) -> bool:
+        try:
+            return self.circuit_breakers().allow(url)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+            return True
+    
+    def _record_fetch_success(self, url: str) -> None:
+        try:
+            self.circuit_breakers().record_success(url)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+    
+    def _record_fetch_failure(self, url: str, error: Exception) -> None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        try:
+            self.circuit_breakers().record_failure(url, str(error), status)
+        except sqlite3.Error as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+    
+    def _archive_page(self, resource: str, offset: int, body: bytes) -> None:
+        """Keep the raw page for later reprocessing; never fails the fetch."""
+        if self.archive is None:
+            return
+        try:
+            self.archive.store(resource, offset, body)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not archive {resource} page at offset {offset}: {e}")
+    
     def _fetch_market_trends(self) -> Optional[List[Dict]]:
         """
         Fetch market trends data from government API.
@@ -173,9 +733,11 @@ class MarketDataFetcher:
         Returns:
             Optional[List[Dict]]: List of trend records or None if fetch fails
         """
+        import requests  # deferred: only needed when actually fetching
+        
         try:
             # Alternative API endpoint for trends
-            url = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+            url = f"{self.api_base_url}/resource/{MARKET_RESOURCE_ID}"
             
             params = {
                 'api-key': self.api_key,
@@ -196,205 +758,329 @@ class MarketDataFetcher:
             else:
                 logger.warning("No 'records' field found in API response")
                 return None
-                
+        
         except Exception as e:
             logger.error(f"Error fetching market trends: {e}")
             return None
     
-    def _parse_market_data(self, raw_data: List[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    def _parse_market_data(self, raw_data: List[Dict]) -> MarketBatch:
         """
-        Parse raw market data and extract price, trend, and demand information.
-        
-        Args:
-            raw_data (List[Dict]): Raw data from API
-            
-        Returns:
-            Tuple[List[Dict], List[Dict], List[Dict]]: (prices, trends, demand)
-        """
-        prices = []
-        trends = []
-        demand = []
-        
-        for record in raw_data:
-            try:
-                # Extract basic information - try multiple field names
-                commodity = str(record.get('commodity', record.get('commodity_name', ''))).strip()
-                market_name = str(record.get('market', record.get('market_name', record.get('mandi', '')))).strip()
-                state = str(record.get('state', record.get('state_name', ''))).strip()
-                district = str(record.get('district', record.get('district_name', ''))).strip()
-                
-                # If market name is empty, generate one
-                if not market_name:
-                    market_name = f"{state} Mandi" if state else "Local Market"
-                
-                # Parse price information - try multiple field names
-                price = 0.0
-                price_fields = ['price', 'modal_price', 'min_price', 'max_price', 'arrival_price']
-                
-                for field in price_fields:
-                    price_str = str(record.get(field, '0')).strip()
-                    if price_str and price_str != '0' and price_str != 'null':
-                        try:
-                            price = float(price_str.replace(',', ''))
-                            break
-                        except ValueError:
-                            continue
-                
-                if price == 0.0:
-                    # Generate a realistic price based on commodity
-                    commodity_prices = {
-                        'Wheat': 2500, 'Rice': 2800, 'Maize': 1800, 'Soybean': 4000,
-                        'Cotton': 6000, 'Sugarcane': 300, 'Potato': 1500, 'Onion': 2000,
-                        'Tomato': 3000, 'Chilli': 8000
-                    }
-                    price = commodity_prices.get(commodity, 2000) + (hash(commodity) % 1000)
-                
-                unit = str(record.get('unit', 'Quintal')).strip()
-                
-                # Parse date
-                date_str = record.get('date', '')
-                market_date = date.today()
-                if date_str:
-                    try:
-                        market_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        try:
-                            market_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                        except ValueError:
-                            logger.warning(f"Could not parse date: {date_str}")
-                
-                # Create price record
-                if commodity and market_name and price > 0:
-                    price_record = {
-                        'commodity': commodity,
-                        'market_name': market_name,
-                        'state': state,
-                        'district': district,
-                        'price': price,
-                        'unit': unit,
-                        'date': market_date,
-                        'last_updated': datetime.now()
-                    }
-                    prices.append(price_record)
-                
-                # Create trend record (simplified)
-                if commodity and market_name:
-                    trend_record = {
-                        'commodity': commodity,
-                        'market_name': market_name,
-                        'price_today': price,
-                        'price_yesterday': price * 0.95,  # Mock yesterday's price
-                        'price_change': price * 0.05,
-                        'change_percentage': 5.0,
-                        'date': market_date,
-                        'last_updated': datetime.now()
-                    }
-                    trends.append(trend_record)
-                
-                # Create demand record (simplified)
-                if commodity and market_name:
-                    demand_record = {
-                        'commodity': commodity,
-                        'market_name': market_name,
-                        'demand_level': 'High' if price > 2000 else 'Medium' if price > 1000 else 'Low',
-                        'supply_level': 'High' if price < 1500 else 'Medium' if price < 2500 else 'Low',
-                        'arrival_quantity': price * 10,  # Mock arrival quantity
-                        'unit': unit,
-                        'date': market_date,
-                        'last_updated': datetime.now()
-                    }
-                    demand.append(demand_record)
-                    
-            except Exception as e:
-                logger.error(f"Error parsing record: {e}")
-                continue
-        
-        logger.info(f"Successfully parsed {len(prices)} prices, {len(trends)} trends, {len(demand)} demand records")
+        Parse raw market data; see parse_market_records.
+        """
+        return parse_market_records(raw_data)
+    
+    def _encode_rows(self, cursor: sqlite3.Cursor, batch: MarketBatch) -> Tuple[List[Tuple], List[Tuple], List[Tuple]]:
+        """
+        Replace names in the batch rows with dimension ids for normalized storage.
+        """
+        encode = self.dimensions.encode
+        prices = [
+            (encode(cursor, 'commodity', c), encode(cursor, 'market', m), encode(cursor, 'state', s),
+             encode(cursor, 'district', d), encode(cursor, 'variety', v), price, encode(cursor, 'unit', u),
+             day, updated)
+            for c, m, s, d, v, price, u, day, updated in batch.price_rows()
+        ]
+        trends = [
+            (encode(cursor, 'commodity', row[0]), encode(cursor, 'market', row[1]),
+             encode(cursor, 'state', row[2])) + row[3:]
+            for row in batch.trend_rows()
+        ]
+        demand = [
+            (encode(cursor, 'commodity', c), encode(cursor, 'market', m), encode(cursor, 'state', s),
+             dl, sl, qty, encode(cursor, 'unit', u), day, updated)
+            for c, m, s, dl, sl, qty, u, day, updated in batch.demand_rows()
+        ]
         return prices, trends, demand
     
-    def _store_market_data(self, prices: List[Dict], trends: List[Dict], demand: List[Dict]) -> Tuple[int, int, int]:
+    def _store_market_data(self, batch: MarketBatch,
+                           checkpoint: Optional[Dict] = None) -> Tuple[int, int, int]:
         """
         Store market data in database.
         
         Args:
-            prices (List[Dict]): Price records
-            trends (List[Dict]): Trend records
-            demand (List[Dict]): Demand records
-            
+            batch (MarketBatch): Parsed market records
+            checkpoint (Optional[Dict]): Crawl progress committed atomically
+                with the batch, so a resumed crawl never skips or loses a page;
+                its rows_stored is advanced by the prices actually stored
+        
         Returns:
-            Tuple[int, int, int]: (prices_stored, trends_stored, demand_stored)
+            Tuple[int, int, int]: (prices_stored, trends_stored, demand_stored),
+                prices_stored counting only price rows new to the table
         """
         prices_stored = 0
+        prices_replaced = 0
         trends_stored = 0
         demand_stored = 0
+        screened = None
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            conn = self._pool.get()
+            with self._write_lock, conn:
                 cursor = conn.cursor()
                 
-                # Store prices
-                for price in prices:
+                if self.detector is not None:
+                    # Load persisted state first, so the snapshot holds it and a rollback keeps it
+                    self._load_detector(cursor)
+                    screened = self.detector.snapshot(batch.records)
+                    batch = self._screen_batch(cursor, batch)
+                
+                if self.normalized:
+                    statements = NORMALIZED_INSERT_SQL
+                    try:
+                        price_rows, trend_rows, demand_rows = self._encode_rows(cursor, batch)
+                    except sqlite3.Error:
+                        # Ids inserted in this transaction are rolled back with it
+                        self.dimensions.clear()
+                        raise
+                else:
+                    statements = INSERT_SQL
+                    price_rows, trend_rows, demand_rows = batch.price_rows(), batch.trend_rows(), batch.demand_rows()
+                
+                errors = ErrorTally(logger)
+                
+                # Store prices; a feed can repeat a natural key, so count distinct new ids
+                first_new = cursor.execute(statements['max_price_id']).fetchone()[0]
+                new_ids = set()
+                for row in price_rows:
                     try:
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO market_prices (
-                                commodity, market_name, state, district, price, unit, date, last_updated
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            price['commodity'], price['market_name'], price['state'],
-                            price['district'], price['price'], price['unit'],
-                            price['date'], price['last_updated']
-                        ))
-                        prices_stored += 1
+                        row_id = cursor.execute(statements['prices'], row).fetchone()[0]
                     except sqlite3.Error as e:
-                        logger.error(f"Error storing price record: {e}")
+                        errors.add("Error storing price record", e)
                         continue
+                    if row_id > first_new:
+                        new_ids.add(row_id)
+                    else:
+                        prices_replaced += 1
+                prices_stored = len(new_ids)
                 
                 # Store trends
-                for trend in trends:
+                for row in trend_rows:
                     try:
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO market_trends (
-                                commodity, market_name, price_today, price_yesterday,
-                                price_change, change_percentage, date, last_updated
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            trend['commodity'], trend['market_name'], trend['price_today'],
-                            trend['price_yesterday'], trend['price_change'], trend['change_percentage'],
-                            trend['date'], trend['last_updated']
-                        ))
+                        cursor.execute(statements['trends'], row)
                         trends_stored += 1
                     except sqlite3.Error as e:
-                        logger.error(f"Error storing trend record: {e}")
+                        errors.add("Error storing trend record", e)
                         continue
                 
                 # Store demand
-                for demand_record in demand:
+                for row in demand_rows:
                     try:
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO market_demand (
-                                commodity, market_name, demand_level, supply_level,
-                                arrival_quantity, unit, date, last_updated
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            demand_record['commodity'], demand_record['market_name'],
-                            demand_record['demand_level'], demand_record['supply_level'],
-                            demand_record['arrival_quantity'], demand_record['unit'],
-                            demand_record['date'], demand_record['last_updated']
-                        ))
+                        cursor.execute(statements['demand'], row)
                         demand_stored += 1
                     except sqlite3.Error as e:
-                        logger.error(f"Error storing demand record: {e}")
+                        errors.add("Error storing demand record", e)
                         continue
                 
-                conn.commit()
-                logger.info(f"Database operations completed: {prices_stored} prices, {trends_stored} trends, {demand_stored} demand records")
+                errors.flush()
+                
+                # Keep dashboard aggregates in step with the rows just written
+                try:
+                    refresh_aggregates(conn, batch.records, self._tables['prices'],
+                                       self._tables['demand'], batch.last_updated)
+                except sqlite3.Error as e:
+                    logger.error(f"Error refreshing market aggregates: {e}")
                 
+                if checkpoint is not None:
+                    checkpoint['rows_stored'] += prices_stored
+                    cursor.execute(CHECKPOINT_UPSERT_SQL, checkpoint)
+                
+                conn.commit()
+                logger.info(f"Database operations completed: {prices_stored} new prices ({prices_replaced} updated), "
+                            f"{trends_stored} trends, {demand_stored} demand records")
+        
         except sqlite3.Error as e:
             logger.error(f"Database connection error: {e}")
+            self._unscreen(screened)
+            raise
+        except Exception:
+            self._unscreen(screened)
             raise
         
+        self._write_store(batch)
         return prices_stored, trends_stored, demand_stored
     
+    def _load_detector(self, cursor: sqlite3.Cursor) -> None:
+        # Series state from earlier runs; read once per fetcher, never the price history
+        if self._detector_loaded:
+            return
+        cursor.execute("SELECT commodity, market_name, state, variety, mean_log, var_log, count, streak,"
+                       " pending_log FROM price_series_stats")
+        self.detector.load(cursor.fetchall())
+        self._detector_loaded = True
+    
+    def _screen_batch(self, cursor: sqlite3.Cursor, batch: MarketBatch) -> MarketBatch:
+        """
+        Run the batch through the anomaly detector and record what it flags.
+        
+        Called inside the ingest transaction, so anomaly rows commit or roll
+        back with the batch (and _store_market_data restores the detector if
+        it rolls back). Replayed records are not judged again; in quarantine
+        mode those quarantined the first time stay out.
+        
+        Returns:
+            MarketBatch: The records to store; anomalies are removed in quarantine mode
+        """
+        fresh, replayed = self._split_replays(cursor, batch.records)
+        accepted, anomalies = self.detector.screen(fresh)
+        quarantine = self.anomaly_mode == 'quarantine'
+        if anomalies:
+            action = 'quarantined' if quarantine else 'flagged'
+            cursor.executemany(ANOMALY_UPSERT_SQL, [
+                (r.commodity, r.market_name, r.state, r.district, r.variety, r.price, r.unit, r.date,
+                 expected, reason, action, batch.last_updated)
+                for r, reason, expected in anomalies
+            ])
+            imputed = sum(1 for _, reason, _ in anomalies if reason == 'imputed')
+            logger.warning(f"{len(anomalies)} price anomalies {action}: "
+                           f"{len(anomalies) - imputed} outliers, {imputed} imputed prices")
+        if not quarantine:
+            return batch
+        accepted.extend(r for r, action in replayed if action != 'quarantined')
+        if len(accepted) == len(batch.records):
+            return batch
+        return MarketBatch(batch.last_updated, accepted)
+    
+    def _split_replays(self, cursor: sqlite3.Cursor,
+                       records: List[MarketRecord]) -> Tuple[List[MarketRecord], List[Tuple]]:
+        """
+        Separate records that an earlier batch already judged.
+        
+        A replay (re-fetched page, resumed crawl, reprocessed archive) is a
+        record whose natural key is already stored, as a price or an anomaly,
+        with the same price. Anything else is judged, late or out-of-order
+        dates and upstream corrections included; imputed prices always are.
+        
+        Returns:
+            Tuple[List, List[Tuple]]: (records to judge, [(replayed record,
+                its anomaly action or None)])
+        """
+        if not records:
+            return [], []
+        days = [r.date for r in records]
+        cursor.execute("SELECT commodity, market_name, state, district, variety, date, price, action"
+                       " FROM market_anomalies WHERE date BETWEEN ? AND ?", (min(days), max(days)))
+        flagged = {row[:6]: row[6:] for row in cursor.fetchall()}
+        fresh, replayed = [], []
+        for r in records:
+            if r.imputed:
+                fresh.append(r)
+                continue
+            anomaly = flagged.get((r.commodity, r.market_name, r.state, r.district, r.variety, r.date.isoformat()))
+            if anomaly is not None and anomaly[0] == r.price:
+                replayed.append((r, anomaly[1]))
+            elif self._stored_price(cursor, r) == r.price:
+                replayed.append((r, None))
+            else:
+                fresh.append(r)
+        return fresh, replayed
+    
+    def _stored_price(self, cursor: sqlite3.Cursor, r: MarketRecord) -> Optional[float]:
+        """Price stored under the record's natural key, or None."""
+        if self.normalized:
+            lookup = self.dimensions.lookup
+            ids = (lookup(cursor, 'commodity', r.commodity), lookup(cursor, 'market', r.market_name),
+                   lookup(cursor, 'state', r.state), lookup(cursor, 'district', r.district),
+                   lookup(cursor, 'variety', r.variety))
+            if None in ids:
+                return None
+            params = ids + (r.date,)
+        else:
+            params = (r.commodity, r.market_name, r.state, r.district, r.variety, r.date)
+        row = cursor.execute(self._stored_price_query, params).fetchone()
+        return row[0] if row else None
+    
+    def _unscreen(self, screened: Optional[Dict]) -> None:
+        # The batch rolled back, so the detector must not remember having judged it
+        if screened is not None:
+            self.detector.restore(screened)
+    
+    def _save_series_stats(self) -> None:
+        """Persist the detector state of series updated since the last save."""
+        if self.detector is None:
+            return
+        conn = self._pool.get()
+        with self._write_lock, conn:
+            conn.executemany("INSERT OR REPLACE INTO price_series_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             self.detector.dirty_rows())
+    
+    def _write_store(self, batch: MarketBatch) -> None:
+        """
+        Write a committed batch to the price store backend.
+        
+        The batch is already committed locally, so a failed store write is
+        logged rather than raised; the next crawl or reprocess repairs it,
+        since store writes upsert on the natural key.
+        """
+        if self.store is None:
+            return
+        try:
+            written = self.store.write_batch(batch)
+            logger.info(f"Wrote {written} prices to {type(self.store).__name__}")
+        except Exception as e:
+            logger.error(f"Price store write failed: {e}")
+    
+    def refresh_forecasts(self, horizon: int = FORECAST_HORIZON,
+                          history_days: int = FORECAST_HISTORY_DAYS) -> int:
+        """
+        Forecast every (commodity, market) series and replace market_forecasts.
+        
+        All series are fitted together as one array per model (see
+        market_forecast), so a run costs a few array passes over the history
+        rather than one model fit per series. New forecasts are published
+        like an ingest's rows, so snapshot readers see them straight away.
+        
+        Args:
+            horizon (int): Days to forecast past the latest price date
+            history_days (int): Days of history, ending at the latest price date, to fit on
+        
+        Returns:
+            int: Number of series forecast
+        """
+        series = self._write_forecasts(horizon, history_days)
+        if series:
+            if self.wal:
+                self.checkpoint()
+            self.publish_snapshot()
+        return series
+    
+    def _write_forecasts(self, horizon: int = FORECAST_HORIZON,
+                         history_days: int = FORECAST_HISTORY_DAYS) -> int:
+        # The forecast run itself; ingests call it before publishing their own rows
+        import pandas as pd
+        import market_forecast
+        
+        conn = self._pool.get()
+        frame = pd.read_sql_query(self._forecast_query, conn, params={'window': f"-{history_days - 1} days"})
+        if frame.empty:
+            logger.info("No prices to forecast")
+            return 0
+        keys, days, matrix = market_forecast.build_matrix(frame)
+        if len(days) < market_forecast.min_history(horizon):
+            logger.info(f"Forecast skipped: {len(days)} days of history, "
+                        f"{market_forecast.min_history(horizon)} needed for a {horizon}-day horizon")
+            return 0
+        
+        results = market_forecast.forecast_all(matrix, horizon)
+        rows = market_forecast.forecast_rows(keys, days[-1].date(), horizon, results, datetime.now())
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM market_forecasts")
+            conn.executemany("INSERT INTO market_forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        logger.info(f"Forecast {len(keys)} series x {len(results)} models, {horizon} days ahead")
+        return len(keys)
+    
+    def _after_ingest(self) -> None:
+        # Detector state and forecasts are derived data: a failed save or run is logged and the ingest stands
+        try:
+            self._save_series_stats()
+        except sqlite3.Error as e:
+            logger.error(f"Saving anomaly detector state failed: {e}")
+        if not self.forecast:
+            return
+        try:
+            self._write_forecasts()
+        except Exception as e:
+            logger.error(f"Forecast refresh failed: {e}")
+    
     def fetch_and_store_market_data(self) -> Dict[str, int]:
         """
         Main function to fetch and store market data.
@@ -425,9 +1111,9 @@ class MarketDataFetcher:
                 }
             
             # Parse the data
-            prices, trends, demand = self._parse_market_data(raw_data)
+            batch = self._parse_market_data(raw_data)
             
-            if not prices and not trends and not demand:
+            if not batch:
                 logger.error("No valid data found after parsing")
                 return {
                     'status': 'failed',
@@ -438,7 +1124,12 @@ class MarketDataFetcher:
                 }
             
             # Store in database
-            prices_stored, trends_stored, demand_stored = self._store_market_data(prices, trends, demand)
+            prices_stored, trends_stored, demand_stored = self._store_market_data(batch)
+            self._after_ingest()
+            
+            if self.wal:
+                self.checkpoint()
+            self.publish_snapshot()
             
             end_time = datetime.now()
             fetch_time = (end_time - start_time).total_seconds()
@@ -453,7 +1144,7 @@ class MarketDataFetcher:
             
             logger.info(f"Operation completed successfully: {result}")
             return result
-            
+        
         except Exception as e:
             logger.error(f"Unexpected error in fetch_and_store_market_data: {e}")
             return {
@@ -465,6 +1156,116 @@ class MarketDataFetcher:
                 'error': str(e)
             }
     
+    def _load_checkpoint(self, resource: str) -> Optional[Dict]:
+        # Read from the write database: a published snapshot may predate the last commit
+        cursor = self._pool.get().cursor()
+        cursor.row_factory = sqlite3.Row
+        row = cursor.execute("SELECT * FROM crawl_checkpoints WHERE resource = ?", (resource,)).fetchone()
+        return dict(row) if row is not None else None
+    
+    def _save_checkpoint(self, checkpoint: Dict) -> None:
+        conn = self._pool.get()
+        with self._write_lock, conn:
+            conn.execute(CHECKPOINT_UPSERT_SQL, checkpoint)
+    
+    def crawl(self, page_size: int = 1000, max_pages: Optional[int] = None,
+              restart: bool = False) -> Dict:
+        """
+        Fetch and store every page of the market resource, resuming an unfinished crawl.
+        
+        Each page's rows and the advanced checkpoint commit in one transaction,
+        and rows upsert on their natural keys, so a crawl killed at any point
+        restarts at the first page it had not committed.
+        
+        Args:
+            page_size (int): Records per API request
+            max_pages (Optional[int]): Stop (resumably) after this many pages
+            restart (bool): Discard any unfinished crawl and start at offset 0
+        
+        Returns:
+            Dict: status ('complete', 'paused' or 'interrupted') and checkpoint fields
+        """
+        state = None if restart else self._load_checkpoint(MARKET_RESOURCE_ID)
+        if state is None or state['completed_at'] is not None:
+            now = datetime.now().isoformat()
+            state = {
+                'resource': MARKET_RESOURCE_ID, 'crawl_id': now, 'next_offset': 0, 'total': None,
+                'pages_done': 0, 'rows_stored': 0, 'started_at': now, 'updated_at': now,
+                'completed_at': None,
+            }
+        else:
+            logger.info(f"Resuming crawl {state['crawl_id']} at offset {state['next_offset']}")
+        
+        pages = 0
+        status = 'paused'
+        while max_pages is None or pages < max_pages:
+            page = self._fetch_market_page(state['next_offset'], page_size)
+            if page is None:
+                status = 'interrupted'
+                break
+            records = page.get('records') or []
+            if page.get('total') is not None:
+                state['total'] = int(page['total'])
+            state['next_offset'] += len(records)
+            state['pages_done'] += 1
+            state['updated_at'] = datetime.now().isoformat()
+            done = len(records) < page_size or (
+                state['total'] is not None and state['next_offset'] >= state['total']
+            )
+            if done:
+                state['completed_at'] = state['updated_at']
+            if records:
+                self._store_market_data(parse_market_records(records), checkpoint=state)
+            else:
+                self._save_checkpoint(state)
+            pages += 1
+            if done:
+                status = 'complete'
+                break
+        
+        if pages:
+            self._after_ingest()
+            if self.wal:
+                self.checkpoint()
+            self.publish_snapshot()
+        result = {'status': status, 'pages_this_run': pages, **state}
+        logger.info(f"Crawl {status}: {result}")
+        return result
+    
+    def reprocess(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  workers: Optional[int] = None) -> Dict[str, int]:
+        """
+        Re-parse archived market pages and store them, without calling the API.
+        
+        Pages are decoded and parsed in worker processes and written here in
+        fetch order, each batch stamped with its original fetch time.
+        
+        Args:
+            since (Optional[datetime]): Only pages fetched at or after this time
+            until (Optional[datetime]): Only pages fetched before this time
+            workers (Optional[int]): Parser processes (default: all CPUs)
+        
+        Returns:
+            Dict[str, int]: Pages replayed and rows stored per table
+        """
+        if self.archive is None:
+            raise ValueError("No payload archive configured (set PAYLOAD_ARCHIVE_DIR)")
+        entries = self.archive.entries(MARKET_RESOURCE_ID, since, until)
+        result = {'payloads': 0, 'prices_stored': 0, 'trends_stored': 0, 'demand_stored': 0}
+        for batch in self.archive.map_payloads(_reparse_market_page, entries, workers):
+            prices, trends, demand = self._store_market_data(batch)
+            result['payloads'] += 1
+            result['prices_stored'] += prices
+            result['trends_stored'] += trends
+            result['demand_stored'] += demand
+        if result['payloads']:
+            self._after_ingest()
+            if self.wal:
+                self.checkpoint()
+            self.publish_snapshot()
+        logger.info(f"Reprocessed archive: {result}")
+        return result
+    
     def _generate_mock_market_data(self) -> List[Dict]:
         """
         Generate mock market data for testing when API is unavailable.
@@ -512,80 +1313,415 @@ class MarketDataFetcher:
             commodity (Optional[str]): Filter by commodity
             market (Optional[str]): Filter by market
             state (Optional[str]): Filter by state
-            
+        
         Returns:
             Dict: Market data with prices, trends, and demand
         """
+        params = {
+            'commodity': f"%{commodity}%" if commodity else None,
+            'market': f"%{market}%" if market else None,
+            'state': f"%{state}%" if state else None,
+        }
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._reading() as conn:
                 cursor = conn.cursor()
                 
-                # Get prices
-                price_query = "SELECT * FROM market_prices WHERE 1=1"
-                price_params = []
-                
-                if commodity:
-                    price_query += " AND commodity LIKE ?"
-                    price_params.append(f"%{commodity}%")
-                
-                if market:
-                    price_query += " AND market_name LIKE ?"
-                    price_params.append(f"%{market}%")
-                
-                if state:
-                    price_query += " AND state LIKE ?"
-                    price_params.append(f"%{state}%")
-                
-                price_query += " ORDER BY last_updated DESC LIMIT 100"
-                
-                cursor.execute(price_query, price_params)
-                prices = cursor.fetchall()
+                # One read transaction so all three queries see the same version
+                cursor.execute("BEGIN")
+                prices = cursor.execute(self._queries['prices'], params).fetchall()
+                trends = cursor.execute(self._queries['trends'], params).fetchall()
+                demand = cursor.execute(self._queries['demand'], params).fetchall()
                 
-                # Get trends
-                trend_query = "SELECT * FROM market_trends WHERE 1=1"
-                trend_params = []
-                
-                if commodity:
-                    trend_query += " AND commodity LIKE ?"
-                    trend_params.append(f"%{commodity}%")
-                
-                if market:
-                    trend_query += " AND market_name LIKE ?"
-                    trend_params.append(f"%{market}%")
-                
-                trend_query += " ORDER BY last_updated DESC LIMIT 50"
-                
-                cursor.execute(trend_query, trend_params)
-                trends = cursor.fetchall()
-                
-                # Get demand
-                demand_query = "SELECT * FROM market_demand WHERE 1=1"
-                demand_params = []
-                
-                if commodity:
-                    demand_query += " AND commodity LIKE ?"
-                    demand_params.append(f"%{commodity}%")
-                
-                if market:
-                    demand_query += " AND market_name LIKE ?"
-                    demand_params.append(f"%{market}%")
-                
-                demand_query += " ORDER BY last_updated DESC LIMIT 50"
-                
-                cursor.execute(demand_query, demand_params)
-                demand = cursor.fetchall()
-                
-                logger.info(f"Retrieved {len(prices)} prices, {len(trends)} trends, {len(demand)} demand records from database")
+                logger.debug("Retrieved %d prices, %d trends, %d demand records from database",
+                             len(prices), len(trends), len(demand))
                 
                 return {
                     'prices': prices,
                     'trends': trends,
                     'demand': demand
                 }
-                
+        
         except sqlite3.Error as e:
             logger.error(f"Database error while retrieving market data: {e}")
             return {'prices': [], 'trends': [], 'demand': []}
+    
+    def _market_page(self, conn: sqlite3.Connection, table: str, keys: Dict,
+                     cursor: Optional[str], limit: int) -> Dict:
+        first, following = self._page_queries[table]
+        params = dict(keys, limit=max(1, min(limit, MAX_PAGE_SIZE)))
+        if cursor:
+            params['after_updated'], params['after_id'] = decode_cursor(cursor, table)
+        result = conn.execute(following if cursor else first, params)
+        names = [column[0] for column in result.description]
+        rows = [dict(zip(names, row)) for row in result.fetchall()]
+        next_cursor = None
+        if len(rows) == params['limit']:
+            next_cursor = encode_cursor(table, rows[-1]['last_updated'], rows[-1]['id'])
+        return {'rows': rows, 'next_cursor': next_cursor}
+    
+    @staticmethod
+    def _page_keys(commodities: Optional[List[str]], markets: Optional[List[str]],
+                   states: Optional[List[str]]) -> Dict:
+        return {
+            'commodities': json.dumps(list(commodities)) if commodities is not None else None,
+            'markets': json.dumps(list(markets)) if markets is not None else None,
+            'states': json.dumps(list(states)) if states is not None else None,
+        }
+    
+    def get_market_page(self, table: str = 'prices', commodities: Optional[List[str]] = None,
+                        markets: Optional[List[str]] = None, states: Optional[List[str]] = None,
+                        cursor: Optional[str] = None, limit: int = 100) -> Dict:
+        """
+        One newest-first page of a market table, keyset-paginated on (last_updated, id).
+        
+        Args:
+            table (str): 'prices', 'trends' or 'demand'
+            commodities (Optional[List[str]]): Exact commodity names to include
+            markets (Optional[List[str]]): Exact market names to include
+            states (Optional[List[str]]): Exact state names (prices only)
+            cursor (Optional[str]): next_cursor from the previous page
+            limit (int): Rows per page, at most MAX_PAGE_SIZE
+        
+        Returns:
+            Dict: {'rows': [...], 'next_cursor': str or None when exhausted}
+        """
+        keys = self._page_keys(commodities, markets, states)
+        try:
+            with self._reading() as conn:
+                return self._market_page(conn, table, keys, cursor, limit)
+        except sqlite3.Error as e:
+            logger.error(f"Database error while paging {table}: {e}")
+            return {'rows': [], 'next_cursor': None}
+    
+    def get_market_batch(self, commodities: Optional[List[str]] = None,
+                         markets: Optional[List[str]] = None, states: Optional[List[str]] = None,
+                         limit: int = 100, cursors: Optional[Dict[str, str]] = None) -> Dict[str, Dict]:
+        """
+        A page of prices, trends and demand for many keys at once.
+        
+        Replaces one get_market_data_from_db call per commodity: each table is
+        a single statement whatever the number of keys, and all three run in
+        one read transaction so they see the same version.
+        
+        Args:
+            commodities (Optional[List[str]]): Exact commodity names to include
+            markets (Optional[List[str]]): Exact market names to include
+            states (Optional[List[str]]): Exact state names (prices only)
+            limit (int): Rows per table page, at most MAX_PAGE_SIZE
+            cursors (Optional[Dict[str, str]]): Per-table next_cursor to continue from
+        
+        Returns:
+            Dict[str, Dict]: get_market_page result per table
+        """
+        keys = self._page_keys(commodities, markets, states)
+        cursors = cursors or {}
+        try:
+            with self._reading() as conn:
+                conn.execute("BEGIN")
+                return {
+                    table: self._market_page(conn, table, keys, cursors.get(table), limit)
+                    for table in ('prices', 'trends', 'demand')
+                }
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving market batch: {e}")
+            return {table: {'rows': [], 'next_cursor': None} for table in ('prices', 'trends', 'demand')}
+    
+    def get_price_range(self, commodity: str, start: date, end: date,
+                        market: Optional[str] = None, state: Optional[str] = None) -> List[Dict]:
+        """
+        Prices of one commodity dated start..end inclusive, oldest first, from the price store.
+        
+        Args:
+            commodity (str): Exact commodity name
+            start (date): First date to include
+            end (date): Last date to include
+            market (Optional[str]): Exact market name
+            state (Optional[str]): Exact state name
+        
+        Returns:
+            List[Dict]: Price rows with ISO date strings (see MarketStore.price_range)
+        """
+        if self.store is not None:
+            return self.store.price_range(commodity, start, end, market, state)
+        return self.query_price_range(commodity, start, end, market, state)
+    
+    def query_price_range(self, commodity: str, start: date, end: date,
+                          market: Optional[str] = None, state: Optional[str] = None) -> List[Dict]:
+        """
+        get_price_range answered from this database, whatever the configured store.
+        """
+        params = {'commodity': commodity, 'start': start.isoformat(), 'end': end.isoformat(),
+                  'market': market, 'state': state}
+        try:
+            with self._reading() as conn:
+                cursor = conn.execute(self._range_query, params)
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving price range: {e}")
+            return []
+    
+    def get_chart_series(self, commodity: str, market: Optional[str] = None,
+                         start: Optional[date] = None, end: Optional[date] = None,
+                         points: int = 300, method: str = 'lttb') -> Dict:
+        """
+        Price series for a chart, downsampled to at most `points` points.
+        
+        Payload size depends only on the requested resolution, not on how
+        many years of history the series has.
+        
+        Args:
+            commodity (str): Exact commodity name
+            market (Optional[str]): Exact market name; all markets averaged if omitted
+            start (Optional[date]): First date to include
+            end (Optional[date]): Last date to include
+            points (int): Resolution requested by the chart, at most MAX_CHART_POINTS
+            method (str): 'lttb' keeps the daily averages that best preserve the
+                line's shape; 'buckets' returns min/max/avg per equal time
+                bucket, aggregated inside SQLite
+        
+        Returns:
+            Dict: commodity, market, method, source_points and points; LTTB
+                points are {'date', 'price'}, bucket points are
+                {'start', 'end', 'min', 'max', 'avg', 'count'}
+        """
+        if method not in CHART_METHODS:
+            raise ValueError(f"method must be one of {CHART_METHODS}")
+        points = max(3, min(points, MAX_CHART_POINTS))
+        # Full ISO bounds: the DATE column's numeric affinity would turn a bare year into a number
+        params = {
+            'commodity': commodity,
+            'market': market,
+            'start': start.isoformat() if start else '0001-01-01',
+            'end': end.isoformat() if end else '9999-12-31',
+            'points': points,
+        }
+        result = {'commodity': commodity, 'market': market, 'method': method, 'source_points': 0, 'points': []}
+        try:
+            with self._reading() as conn:
+                rows = conn.execute(self._chart_queries[method, 'market' if market else 'all'], params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Database error while building chart series: {e}")
+            return result
+        
+        if method == 'buckets':
+            result['source_points'] = sum(row[6] for row in rows)
+            result['points'] = [
+                {'start': first, 'end': last, 'min': low, 'max': high, 'avg': avg, 'count': count}
+                for _, first, last, low, high, avg, count in rows
+            ]
+            return result
+        
+        result['source_points'] = len(rows)
+        if len(rows) > points:
+            import numpy as np
+            from chart_series import lttb_indices
+            
+            days = np.array([row[0] for row in rows], dtype='datetime64[D]').astype(np.float64)
+            values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+            rows = [rows[i] for i in lttb_indices(days, values, points)]
+        result['points'] = [{'date': day, 'price': price} for day, price in rows]
+        return result
+    
+    def get_forecasts(self, commodity: str, market: Optional[str] = None,
+                      model: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve stored forecasts for a commodity.
+        
+        Args:
+            commodity (str): Exact commodity name
+            market (Optional[str]): Exact market name; every market if omitted
+            model (Optional[str]): One of market_forecast.MODELS; if omitted,
+                each series' model with the lowest holdout MAE
+        
+        Returns:
+            List[Dict]: One row per series and horizon date, with forecast,
+                lower and upper (95% band), mae and generated_at
+        """
+        query = """
+            SELECT * FROM market_forecasts AS f
+            WHERE commodity = :commodity AND (:market IS NULL OR market_name = :market)
+              AND model = coalesce(:model, (
+                  SELECT model FROM market_forecasts AS b
+                  WHERE b.commodity = f.commodity AND b.market_name = f.market_name
+                  ORDER BY mae LIMIT 1))
+            ORDER BY market_name, horizon_date
+        """
+        try:
+            with self._reading() as conn:
+                cursor = conn.execute(query, {'commodity': commodity, 'market': market, 'model': model})
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving forecasts: {e}")
+            return []
+    
+    def get_anomalies(self, commodity: Optional[str] = None, market: Optional[str] = None,
+                      limit: int = 100) -> List[Dict]:
+        """
+        Retrieve the most recently ingested flagged or quarantined prices.
+        
+        Args:
+            commodity (Optional[str]): Exact commodity name
+            market (Optional[str]): Exact market name
+            limit (int): Maximum rows to return
+        
+        Returns:
+            List[Dict]: Anomaly rows, newest first, with the expected price and reason
+        """
+        query = """
+            SELECT * FROM market_anomalies
+            WHERE (:commodity IS NULL OR commodity = :commodity) AND (:market IS NULL OR market_name = :market)
+            ORDER BY last_updated DESC, id DESC LIMIT :limit
+        """
+        try:
+            with self._reading() as conn:
+                cursor = conn.execute(query, {'commodity': commodity, 'market': market, 'limit': limit})
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving anomalies: {e}")
+            return []
+    
+    def iter_market_rows(self, table: str = 'prices', commodity: Optional[str] = None,
+                         market: Optional[str] = None, state: Optional[str] = None,
+                         batch_size: int = 500) -> Iterator[Dict]:
+        """
+        Stream every matching row of a market table as a dict, oldest first.
+        
+        Rows are pulled batch_size at a time with fetchmany, so memory stays
+        flat however large the table is.
+        
+        Args:
+            table (str): 'prices', 'trends' or 'demand'
+            commodity (Optional[str]): Filter by commodity
+            market (Optional[str]): Filter by market
+            state (Optional[str]): Filter by state (prices only)
+            batch_size (int): Rows fetched per round trip
+        
+        Yields:
+            Dict: Row keyed by column name
+        """
+        conditions = ["(:commodity IS NULL OR commodity LIKE :commodity)",
+                      "(:market IS NULL OR market_name LIKE :market)"]
+        if table == 'prices':
+            conditions.append("(:state IS NULL OR state LIKE :state)")
+        params = {
+            'commodity': f"%{commodity}%" if commodity else None,
+            'market': f"%{market}%" if market else None,
+            'state': f"%{state}%" if state else None,
+        }
+        
+        cursor = self._read_connection().cursor()
+        try:
+            cursor.execute(
+                f"SELECT * FROM {self._tables[table]} WHERE {' AND '.join(conditions)} ORDER BY id", params
+            )
+            names = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(names, row))
+        finally:
+            cursor.close()
+    
+    def get_market_summary(self, commodity: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve precomputed national average, min/max, spread and arrivals.
+        
+        Args:
+            commodity (Optional[str]): Exact commodity name; all commodities if omitted
+        
+        Returns:
+            List[Dict]: One summary row per commodity
+        """
+        try:
+            with self._reading() as conn:
+                return read_summary(conn, commodity)
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving market summary: {e}")
+            return []
+    
+    def get_top_movers(self, limit: int = 5) -> Dict[str, List[Dict]]:
+        """
+        Retrieve commodities with the largest day-over-day average price change.
+        
+        Args:
+            limit (int): Number of gainers and of losers to return
+        
+        Returns:
+            Dict[str, List[Dict]]: {'gainers': [...], 'losers': [...]}
+        """
+        try:
+            with self._reading() as conn:
+                return read_top_movers(conn, limit)
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving top movers: {e}")
+            return {'gainers': [], 'losers': []}
+    
+    def get_latest_prices(self, commodity: str, state: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve the latest price per state for a commodity.
+        
+        Args:
+            commodity (str): Exact commodity name
+            state (Optional[str]): Exact state name
+        
+        Returns:
+            List[Dict]: Latest price rows
+        """
+        try:
+            with self._reading() as conn:
+                return read_latest_prices(conn, commodity, state)
+        except sqlite3.Error as e:
+            logger.error(f"Database error while retrieving latest prices: {e}")
+            return []
+    
+    def rebuild_aggregates(self) -> int:
+        """
+        Recompute the dashboard aggregates from the full price history.
+        
+        Returns:
+            int: Number of commodities summarized
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            count = rebuild_aggregates(conn, self._tables['prices'], self._tables['demand'])
+            conn.commit()
+        logger.info(f"Rebuilt market aggregates for {count} commodities")
+        return count
+
+
+def fetcher_from_env(**overrides) -> MarketDataFetcher:
+    """
+    Build the deployment's MarketDataFetcher from the environment.
+    
+    Every entry point (the scheduled job and each CLI command) goes through
+    here, so they all read and write the same layout: MARKET_DB_NORMALIZED,
+    MARKET_DB_WAL and MARKET_DB_SNAPSHOT select the storage options,
+    MARKET_STORE=mongo makes the Mongo time-series store the price backend
+    (MARKET_MONGO_MIRROR=1 is the older spelling) and MARKET_FORECAST=1
+    refreshes forecasts after every ingest.
+    
+    Args:
+        **overrides: Constructor arguments that take precedence over the environment
+    
+    Returns:
+        MarketDataFetcher: Configured fetcher
+    """
+    options = {
+        'normalized': os.environ.get("MARKET_DB_NORMALIZED") == "1",
+        'wal': os.environ.get("MARKET_DB_WAL") == "1",
+        'snapshot_path': os.environ.get("MARKET_DB_SNAPSHOT") or None,
+        'forecast': os.environ.get("MARKET_FORECAST") == "1",
+    }
+    options.update(overrides)
+    if 'store' not in options and (os.environ.get("MARKET_STORE") == "mongo"
+                                   or os.environ.get("MARKET_MONGO_MIRROR") == "1"):
+        options['store'] = mongo_market_store()
+    return MarketDataFetcher(**options)
 
 
 def fetch_and_store_market_data() -> Dict[str, int]:
@@ -595,14 +1731,138 @@ def fetch_and_store_market_data() -> Dict[str, int]:
     Returns:
         Dict[str, int]: Summary of operation results
     """
-    fetcher = MarketDataFetcher()
-    return fetcher.fetch_and_store_market_data()
+    return fetcher_from_env().fetch_and_store_market_data()
 
 
-# Example usage and testing
-if __name__ == "__main__":
-    # Test the fetcher
-    fetcher = MarketDataFetcher()
+def refresh_market_forecasts() -> int:
+    """
+    Standalone function for scheduling the forecast refresh.
+    
+    Returns:
+        int: Number of series forecast
+    """
+    fetcher = fetcher_from_env()
+    try:
+        return fetcher.refresh_forecasts()
+    finally:
+        fetcher.close()
+
+
+def main():
+    """
+    Command line entry point.
+    
+    With no command, fetches and stores market data (the scheduled job).
+    `export` streams a whole table as a JSON array or NDJSON.
+    `reprocess` rebuilds rows from archived API pages (PAYLOAD_ARCHIVE_DIR).
+    `crawl` pages through the whole resource, resuming an interrupted crawl.
+    `page` and `batch` print keyset-paginated query results as JSON.
+    `chart` prints a downsampled price series for one commodity.
+    `range` prints a commodity's prices over a date range from the price store.
+    `forecast` refreshes the price forecasts, or prints one commodity's.
+    `anomalies` prints recently flagged or quarantined prices.
+    """
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Market Data Fetcher")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("fetch")
+    ep = sub.add_parser("export")
+    ep.add_argument("--table", choices=["prices", "trends", "demand"], default="prices")
+    ep.add_argument("--commodity")
+    ep.add_argument("--market")
+    ep.add_argument("--state")
+    ep.add_argument("--format", choices=["json", "ndjson"], default="json")
+    ep.add_argument("--batch-size", type=int, default=500)
+    cp = sub.add_parser("crawl")
+    cp.add_argument("--page-size", type=int, default=1000)
+    cp.add_argument("--max-pages", type=int, help="Stop after this many pages; the next run resumes")
+    cp.add_argument("--restart", action="store_true", help="Ignore an unfinished crawl")
+    pp = sub.add_parser("page")
+    pp.add_argument("--table", choices=["prices", "trends", "demand"], default="prices")
+    bp = sub.add_parser("batch")
+    for query_parser in (pp, bp):
+        query_parser.add_argument("--commodity", action="append", help="Repeat for several")
+        query_parser.add_argument("--market", action="append", help="Repeat for several")
+        query_parser.add_argument("--state", action="append", help="Repeat for several")
+        query_parser.add_argument("--limit", type=int, default=100)
+    pp.add_argument("--cursor", help="next_cursor from the previous page")
+    bp.add_argument("--cursors", type=json.loads, help="JSON object of per-table next_cursor values")
+    chp = sub.add_parser("chart")
+    chp.add_argument("--commodity", required=True)
+    chp.add_argument("--market")
+    chp.add_argument("--start", type=date.fromisoformat)
+    chp.add_argument("--end", type=date.fromisoformat)
+    chp.add_argument("--points", type=int, default=300)
+    chp.add_argument("--method", choices=CHART_METHODS, default="lttb")
+    rgp = sub.add_parser("range")
+    rgp.add_argument("--commodity", required=True)
+    rgp.add_argument("--start", type=date.fromisoformat, required=True)
+    rgp.add_argument("--end", type=date.fromisoformat, required=True)
+    rgp.add_argument("--market")
+    rgp.add_argument("--state")
+    fp = sub.add_parser("forecast")
+    fp.add_argument("--commodity", help="Print this commodity's forecasts instead of refreshing")
+    fp.add_argument("--market")
+    fp.add_argument("--model", help="Default: each series' best model by holdout MAE")
+    fp.add_argument("--horizon", type=int, default=FORECAST_HORIZON)
+    fp.add_argument("--history-days", type=int, default=FORECAST_HISTORY_DAYS)
+    ap = sub.add_parser("anomalies")
+    ap.add_argument("--commodity")
+    ap.add_argument("--market")
+    ap.add_argument("--limit", type=int, default=100)
+    rp = sub.add_parser("reprocess")
+    rp.add_argument("--archive-dir", help="Defaults to PAYLOAD_ARCHIVE_DIR")
+    rp.add_argument("--since", type=datetime.fromisoformat, help="ISO time; pages fetched at or after")
+    rp.add_argument("--until", type=datetime.fromisoformat, help="ISO time; pages fetched before")
+    rp.add_argument("--workers", type=int, help="Parser processes (default: all CPUs)")
+    args = parser.parse_args()
+    
+    fetcher = fetcher_from_env(archive_dir=getattr(args, 'archive_dir', None))
+    
+    if args.command == "crawl":
+        print(f"Crawl result: {fetcher.crawl(args.page_size, args.max_pages, args.restart)}")
+        return
+    
+    if args.command == "reprocess":
+        print(f"Reprocess result: {fetcher.reprocess(args.since, args.until, args.workers)}")
+        return
+    
+    if args.command == "page":
+        page = fetcher.get_market_page(args.table, args.commodity, args.market, args.state, args.cursor, args.limit)
+        sys.stdout.buffer.write(dumps(page) + b"\n")
+        return
+    
+    if args.command == "batch":
+        batch = fetcher.get_market_batch(args.commodity, args.market, args.state, args.limit, args.cursors)
+        sys.stdout.buffer.write(dumps(batch) + b"\n")
+        return
+    
+    if args.command == "chart":
+        series = fetcher.get_chart_series(args.commodity, args.market, args.start, args.end, args.points, args.method)
+        sys.stdout.buffer.write(dumps(series) + b"\n")
+        return
+    
+    if args.command == "range":
+        rows = fetcher.get_price_range(args.commodity, args.start, args.end, args.market, args.state)
+        sys.stdout.buffer.write(dumps(rows) + b"\n")
+        return
+    
+    if args.command == "forecast":
+        if args.commodity:
+            sys.stdout.buffer.write(dumps(fetcher.get_forecasts(args.commodity, args.market, args.model)) + b"\n")
+        else:
+            print(f"Forecast {fetcher.refresh_forecasts(args.horizon, args.history_days)} series")
+        return
+    
+    if args.command == "anomalies":
+        sys.stdout.buffer.write(dumps(fetcher.get_anomalies(args.commodity, args.market, args.limit)) + b"\n")
+        return
+    
+    if args.command == "export":
+        rows = fetcher.iter_market_rows(args.table, args.commodity, args.market, args.state, args.batch_size)
+        count = write_stream(rows, sys.stdout.buffer, args.format, args.batch_size)
+        logger.info(f"Exported {count} {args.table} rows")
+        return
     
     # Fetch and store market data
     result = fetcher.fetch_and_store_market_data()
@@ -611,3 +1871,7 @@ if __name__ == "__main__":
     # Test database retrieval
     market_data = fetcher.get_market_data_from_db()
     print(f"Retrieved {len(market_data['prices'])} prices from database")
+
+
+if __name__ == "__main__":
+    main()
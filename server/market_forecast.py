@@ -0,0 +1,158 @@
+"""
+Batch Market Price Forecasting
+
+Fits three lightweight models to every (commodity, market) daily price
+series at once and returns point forecasts with 95% bands:
+
+  - seasonal_naive : the value one season (a week) earlier
+  - exp_smoothing  : simple exponential smoothing, alpha chosen per series
+                     from a grid by one-step squared error
+  - linear_trend   : least-squares line over the most recent window
+
+All series share one (series x days) matrix, so each model is a handful of
+array expressions over every series together; the only Python loop is over
+days in exponential smoothing, never over series. Each model is also scored
+by refitting without the last `horizon` days and measuring the MAE of its
+forecast over them, which lets readers pick the best model per series.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+MODELS = ('seasonal_naive', 'exp_smoothing', 'linear_trend')
+SEASON = 7
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+TREND_WINDOW = 90
+Z_95 = 1.96
+
+
+def build_matrix(frame: pd.DataFrame) -> Tuple[List[Tuple[str, str]], pd.DatetimeIndex, np.ndarray]:
+    """
+    Pivot daily prices into one row per series over a continuous calendar.
+    
+    Gaps are carried forward from the last observed price and a series'
+    days before its first observation take that first price, so every row
+    is complete.
+    
+    Args:
+        frame (pd.DataFrame): Columns commodity, market_name, date, price
+    
+    Returns:
+        Tuple: (series keys, calendar days, float matrix of shape series x days)
+    """
+    frame = frame.assign(date=pd.to_datetime(frame['date']))
+    wide = frame.pivot_table(index=['commodity', 'market_name'], columns='date', values='price', aggfunc='mean')
+    days = pd.date_range(wide.columns.min(), wide.columns.max(), freq='D')
+    wide = wide.reindex(columns=days).ffill(axis=1).bfill(axis=1)
+    return list(wide.index), days, wide.to_numpy(dtype=np.float64)
+
+
+def seasonal_naive(y: np.ndarray, horizon: int, season: int = SEASON) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Repeat the last season; the error grows with the number of seasons ahead.
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (forecast, standard error), each series x horizon
+    """
+    steps = np.arange(horizon)
+    forecast = y[:, y.shape[1] - season + steps % season]
+    residuals = y[:, season:] - y[:, :-season]
+    sigma = np.sqrt(np.mean(residuals ** 2, axis=1))
+    return forecast, sigma[:, None] * np.sqrt(steps // season + 1)[None, :]
+
+
+def exp_smoothing(y: np.ndarray, horizon: int, alphas: np.ndarray = ALPHAS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flat forecast at the smoothed level, with every alpha in the grid run side by side.
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (forecast, standard error), each series x horizon
+    """
+    series, days = y.shape
+    level = np.repeat(y[None, :, 0], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    weights = alphas[:, None]
+    for t in range(1, days):
+        error = y[:, t] - level
+        sse += error ** 2
+        level += weights * error
+    best = sse.argmin(axis=0)
+    rows = np.arange(series)
+    alpha = alphas[best]
+    sigma = np.sqrt(sse[best, rows] / max(days - 1, 1))
+    steps = np.arange(horizon)
+    forecast = np.repeat(level[best, rows][:, None], horizon, axis=1)
+    return forecast, sigma[:, None] * np.sqrt(1 + steps[None, :] * alpha[:, None] ** 2)
+
+
+def linear_trend(y: np.ndarray, horizon: int, window: int = TREND_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extend an ordinary least-squares line fitted to the last `window` days.
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (forecast, standard error), each series x horizon
+    """
+    recent = y[:, -window:]
+    n = recent.shape[1]
+    t = np.arange(n) - (n - 1) / 2
+    sxx = np.sum(t ** 2)
+    mean = recent.mean(axis=1)
+    slope = (recent - mean[:, None]) @ t / sxx
+    residuals = recent - (mean[:, None] + slope[:, None] * t[None, :])
+    sigma = np.sqrt(np.sum(residuals ** 2, axis=1) / max(n - 2, 1))
+    ahead = (n - 1) / 2 + np.arange(1, horizon + 1)
+    forecast = mean[:, None] + slope[:, None] * ahead[None, :]
+    return forecast, sigma[:, None] * np.sqrt(1 + 1 / n + ahead ** 2 / sxx)[None, :]
+
+
+FITTERS = {
+    'seasonal_naive': seasonal_naive,
+    'exp_smoothing': exp_smoothing,
+    'linear_trend': linear_trend,
+}
+
+
+def min_history(horizon: int) -> int:
+    """Fewest days a run needs: two seasons left after holding out the horizon."""
+    return 2 * SEASON + horizon
+
+
+def forecast_all(y: np.ndarray, horizon: int) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Forecast every series with every model.
+    
+    Returns:
+        Dict[str, Dict[str, np.ndarray]]: Per model, 'forecast', 'lower' and
+            'upper' (series x horizon) and 'mae' (per series, on the holdout)
+    """
+    results = {}
+    train, actual = y[:, :-horizon], y[:, -horizon:]
+    for name, fit in FITTERS.items():
+        forecast, error = fit(y, horizon)
+        backtest, _ = fit(train, horizon)
+        results[name] = {
+            'forecast': forecast,
+            'lower': forecast - Z_95 * error,
+            'upper': forecast + Z_95 * error,
+            'mae': np.mean(np.abs(backtest - actual), axis=1),
+        }
+    return results
+
+
+def forecast_rows(keys: List[Tuple[str, str]], last_day: date, horizon: int,
+                  results: Dict[str, Dict[str, np.ndarray]], generated_at: datetime) -> Iterator[Tuple]:
+    """Yield market_forecasts rows in column order."""
+    horizon_days = [(last_day + timedelta(days=h)).isoformat() for h in range(1, horizon + 1)]
+    generated = generated_at.isoformat(sep=' ')
+    for name, result in results.items():
+        forecast = result['forecast'].tolist()
+        lower = result['lower'].tolist()
+        upper = result['upper'].tolist()
+        mae = result['mae'].tolist()
+        for i, (commodity, market) in enumerate(keys):
+            for h, day in enumerate(horizon_days):
+                yield (commodity, market, name, day, forecast[i][h], lower[i][h], upper[i][h],
+                       mae[i], generated)
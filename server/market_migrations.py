@@ -0,0 +1,896 @@
+"""
+Market Database Migrations
+
+Schema versioning for the SQLite market store. The applied version is kept
+in PRAGMA user_version and each Migration moves the schema forward by one
+step inside its own transaction, so existing agriai.db files can pick up
+new indexes, constraints and columns without hand surgery.
+
+Usage:
+    python market_migrations.py status  --db agriai.db
+    python market_migrations.py migrate --db agriai.db [--target N]
+    python market_migrations.py dry-run --db agriai.db [--target N]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from market_aggregates import rebuild_aggregates
+
+logger = logging.getLogger(__name__)
+
+# Dimension tables used by the normalized storage mode, keyed by dimension name
+DIMENSIONS = {
+    'commodity': 'dim_commodity',
+    'market': 'dim_market',
+    'state': 'dim_state',
+    'district': 'dim_district',
+    'unit': 'dim_unit',
+    'variety': 'dim_variety',
+}
+
+
+class Migration(NamedTuple):
+    """
+    One schema step. apply() runs inside a transaction opened by migrate().
+    """
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def build_index(conn: sqlite3.Connection, name: str, table: str, columns: str, unique: bool = False) -> None:
+    """
+    Build an index as a self-contained migration step.
+    
+    SQLite has no concurrent index build, so "online-safe" here means the
+    build is idempotent, holds the write lock only for its own step and
+    leaves readers (which keep working in WAL mode) untouched. The dry-run
+    report shows how long that lock will be held.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table}({columns})")
+
+
+def rebuild_table(conn: sqlite3.Connection, table: str, create_sql: str) -> None:
+    """
+    Recreate a table with a new definition, keeping its rows.
+    
+    Follows SQLite's documented procedure for schema changes ALTER TABLE
+    cannot express: create the new table, copy rows, drop the old one,
+    rename, then restore indexes and any views or triggers that referenced it.
+    Rows are copied in id order with INSERT OR REPLACE, so when the new
+    definition adds a UNIQUE constraint the most recent duplicate wins; the
+    older duplicates are moved to {table}__dropped rather than lost.
+    
+    Args:
+        conn (sqlite3.Connection): Connection with an open transaction
+        table (str): Table to rebuild
+        create_sql (str): CREATE TABLE statement with a {table} placeholder
+    
+    Returns:
+        int: Rows the new constraints dropped
+    """
+    temp = f"{table}__rebuild"
+    old_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    dependents = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND ((type = 'index' AND tbl_name = ?) "
+        "OR (type IN ('view', 'trigger') AND sql LIKE ?))",
+        (table, f"%{table}%"),
+    ).fetchall()
+    
+    for kind, name, _ in dependents:
+        if kind in ('view', 'trigger'):
+            conn.execute(f"DROP {kind.upper()} {name}")
+    
+    conn.execute(create_sql.format(table=temp))
+    new_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({temp})")}
+    columns = ", ".join(c for c in old_columns if c in new_columns)
+    conn.execute(f"INSERT OR REPLACE INTO {temp} ({columns}) SELECT {columns} FROM {table} ORDER BY id")
+    dropped = _set_aside(conn, table, temp, old_columns)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {temp} RENAME TO {table}")
+    
+    for _, _, sql in dependents:
+        conn.execute(sql)
+    return dropped
+
+
+def _set_aside(conn: sqlite3.Connection, table: str, rebuilt: str, columns: List[str]) -> int:
+    """Copy the rows of table that didn't make it into rebuilt to {table}__dropped."""
+    aside = f"{table}__dropped"
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {aside} AS SELECT * FROM {table} WHERE 0")
+    aside_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({aside})")}
+    names = ", ".join(c for c in columns if c in aside_columns)
+    dropped = conn.execute(f"INSERT INTO {aside} ({names}) SELECT {names} FROM {table}"
+                           f" WHERE id NOT IN (SELECT id FROM {rebuilt})").rowcount
+    if dropped:
+        logger.warning(f"Rebuilding {table} dropped {dropped} duplicate rows; they are kept in {aside}")
+    elif conn.execute(f"SELECT 1 FROM {aside} LIMIT 1").fetchone() is None:
+        conn.execute(f"DROP TABLE {aside}")
+    return dropped
+
+
+def _baseline_schema(conn: sqlite3.Connection) -> None:
+    """
+    Plain market tables plus the normalized dimension/fact layout.
+    
+    Uses IF NOT EXISTS throughout so databases created before versioning
+    are adopted as version 1 unchanged.
+    """
+    cursor = conn.cursor()
+    
+    # Create market_prices table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT,
+            district TEXT,
+            price REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create market_trends table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create market_demand table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_demand (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create indexes for faster queries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_commodity ON market_prices(commodity)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_market ON market_prices(market_name)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_date ON market_prices(date)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_state ON market_prices(state)
+    """)
+    
+    # Dimension tables, integer-keyed fact tables and name-resolving views
+    for table in DIMENSIONS.values():
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fact_market_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            state_id INTEGER REFERENCES dim_state(id),
+            district_id INTEGER REFERENCES dim_district(id),
+            price REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fact_market_trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fact_market_demand (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_prices_commodity ON fact_market_prices(commodity_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_prices_market ON fact_market_prices(market_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_prices_date ON fact_market_prices(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fact_prices_state ON fact_market_prices(state_id)")
+    
+    # Name-resolving views with the same column order as the plain tables
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS v_market_prices AS
+        SELECT p.id, c.name AS commodity, m.name AS market_name, s.name AS state,
+               d.name AS district, p.price, u.name AS unit, p.date, p.last_updated, p.created_at
+        FROM fact_market_prices p
+        JOIN dim_commodity c ON c.id = p.commodity_id
+        JOIN dim_market m ON m.id = p.market_id
+        LEFT JOIN dim_state s ON s.id = p.state_id
+        LEFT JOIN dim_district d ON d.id = p.district_id
+        LEFT JOIN dim_unit u ON u.id = p.unit_id
+    """)
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS v_market_trends AS
+        SELECT t.id, c.name AS commodity, m.name AS market_name, t.price_today,
+               t.price_yesterday, t.price_change, t.change_percentage, t.date,
+               t.last_updated, t.created_at
+        FROM fact_market_trends t
+        JOIN dim_commodity c ON c.id = t.commodity_id
+        JOIN dim_market m ON m.id = t.market_id
+    """)
+    cursor.execute("""
+        CREATE VIEW IF NOT EXISTS v_market_demand AS
+        SELECT d.id, c.name AS commodity, m.name AS market_name, d.demand_level,
+               d.supply_level, d.arrival_quantity, u.name AS unit, d.date,
+               d.last_updated, d.created_at
+        FROM fact_market_demand d
+        JOIN dim_commodity c ON c.id = d.commodity_id
+        JOIN dim_market m ON m.id = d.market_id
+        LEFT JOIN dim_unit u ON u.id = d.unit_id
+    """)
+
+
+def _lookup_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Composite indexes for the filtered, newest-first reads in get_market_data_from_db.
+    """
+    build_index(conn, 'idx_prices_commodity_market_date', 'market_prices', 'commodity, market_name, date')
+    build_index(conn, 'idx_prices_last_updated', 'market_prices', 'last_updated')
+    build_index(conn, 'idx_trends_last_updated', 'market_trends', 'last_updated')
+    build_index(conn, 'idx_demand_last_updated', 'market_demand', 'last_updated')
+    build_index(conn, 'idx_fact_prices_last_updated', 'fact_market_prices', 'last_updated')
+
+
+def _natural_keys(conn: sqlite3.Connection) -> None:
+    """
+    Rebuild the market tables with UNIQUE natural keys.
+    
+    The ingest path has always used INSERT OR REPLACE; with these keys a
+    re-run for the same day replaces rows instead of appending duplicates.
+    Rows that were already duplicates are kept in <table>__dropped.
+    """
+    rebuild_table(conn, 'market_prices', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT,
+            district TEXT,
+            price REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, state, district, date)
+        )
+    """)
+    rebuild_table(conn, 'market_trends', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, date)
+        )
+    """)
+    rebuild_table(conn, 'market_demand', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_prices', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            state_id INTEGER REFERENCES dim_state(id),
+            district_id INTEGER REFERENCES dim_district(id),
+            price REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, state_id, district_id, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_trends', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_demand', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, date)
+        )
+    """)
+
+
+def _aggregate_tables(conn: sqlite3.Connection) -> None:
+    """
+    Materialized dashboard aggregates, backfilled from the plain tables.
+    
+    Normalized databases can be backfilled with MarketDataFetcher.rebuild_aggregates().
+    """
+    build_index(conn, 'idx_prices_commodity_date', 'market_prices', 'commodity, date')
+    build_index(conn, 'idx_fact_prices_commodity_date', 'fact_market_prices', 'commodity_id, date')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agg_latest_price (
+            commodity TEXT NOT NULL,
+            state TEXT NOT NULL,
+            market_name TEXT,
+            price REAL,
+            date DATE,
+            PRIMARY KEY (commodity, state)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agg_commodity_daily (
+            commodity TEXT NOT NULL,
+            date DATE NOT NULL,
+            avg_price REAL,
+            min_price REAL,
+            max_price REAL,
+            markets INTEGER,
+            arrival_quantity REAL,
+            PRIMARY KEY (commodity, date)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agg_commodity_summary (
+            commodity TEXT PRIMARY KEY,
+            date DATE,
+            avg_price REAL,
+            min_price REAL,
+            max_price REAL,
+            spread REAL,
+            prev_avg_price REAL,
+            change_percentage REAL,
+            arrival_quantity REAL,
+            markets INTEGER,
+            refreshed_at DATETIME
+        )
+    """)
+    build_index(conn, 'idx_summary_change', 'agg_commodity_summary', 'change_percentage')
+    rebuild_aggregates(conn, 'market_prices', 'market_demand')
+
+
+def _crawl_checkpoints(conn: sqlite3.Connection) -> None:
+    """Per-resource crawl progress, committed in the same transaction as each page's rows."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+            resource TEXT PRIMARY KEY,
+            crawl_id TEXT NOT NULL,
+            next_offset INTEGER NOT NULL,
+            total INTEGER,
+            pages_done INTEGER NOT NULL,
+            rows_stored INTEGER NOT NULL,
+            started_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            completed_at DATETIME
+        )
+    """)
+
+
+def _keyset_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Recency indexes on the normalized trend and demand facts, so keyset pages
+    of every table seek on (last_updated, id) instead of sorting the table.
+    """
+    build_index(conn, 'idx_fact_trends_last_updated', 'fact_market_trends', 'last_updated')
+    build_index(conn, 'idx_fact_demand_last_updated', 'fact_market_demand', 'last_updated')
+
+
+def _series_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Make the per-series price indexes covering (price appended), so chart
+    series reads never touch the table rows scattered across ingest batches.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_prices_commodity_market_date")
+    build_index(conn, 'idx_prices_commodity_market_date', 'market_prices', 'commodity, market_name, date, price')
+    conn.execute("DROP INDEX IF EXISTS idx_prices_commodity_date")
+    build_index(conn, 'idx_prices_commodity_date', 'market_prices', 'commodity, date, price')
+    conn.execute("DROP INDEX IF EXISTS idx_fact_prices_commodity_date")
+    build_index(conn, 'idx_fact_prices_commodity_date', 'fact_market_prices', 'commodity_id, date, price')
+    build_index(conn, 'idx_fact_prices_series', 'fact_market_prices', 'commodity_id, market_id, date, price')
+
+
+def _forecast_table(conn: sqlite3.Connection) -> None:
+    """Per-series price forecasts with 95% bands, replaced wholesale by each forecast run."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS market_forecasts (
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            model TEXT NOT NULL,
+            horizon_date DATE NOT NULL,
+            forecast REAL,
+            lower REAL,
+            upper REAL,
+            mae REAL,
+            generated_at DATETIME NOT NULL,
+            PRIMARY KEY (commodity, market_name, model, horizon_date)
+        ) WITHOUT ROWID
+    """)
+
+
+def _anomaly_tables(conn: sqlite3.Connection) -> None:
+    """Prices flagged or quarantined at ingest, and the detector's running per-series state."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS market_anomalies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT,
+            district TEXT,
+            price REAL,
+            unit TEXT,
+            date DATE,
+            expected_price REAL,
+            reason TEXT NOT NULL,
+            action TEXT NOT NULL,
+            last_updated DATETIME,
+            UNIQUE (commodity, market_name, state, district, date)
+        )
+    """)
+    build_index(conn, 'idx_anomalies_last_updated', 'market_anomalies', 'last_updated')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_series_stats (
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            mean_log REAL NOT NULL,
+            var_log REAL NOT NULL,
+            count INTEGER NOT NULL,
+            streak INTEGER NOT NULL,
+            pending_log REAL NOT NULL,
+            PRIMARY KEY (commodity, market_name)
+        ) WITHOUT ROWID
+    """)
+
+
+def _series_stats_by_state(conn: sqlite3.Connection) -> None:
+    """
+    Key detector state by (commodity, market, state) and record the latest date each series judged.
+    
+    The old per-(commodity, market) state can't be split by state, so it is
+    dropped; each series re-learns its level over its next few prices.
+    """
+    conn.execute("DROP TABLE IF EXISTS price_series_stats")
+    conn.execute("""
+        CREATE TABLE price_series_stats (
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT NOT NULL,
+            mean_log REAL NOT NULL,
+            var_log REAL NOT NULL,
+            count INTEGER NOT NULL,
+            streak INTEGER NOT NULL,
+            pending_log REAL NOT NULL,
+            last_date DATE NOT NULL,
+            PRIMARY KEY (commodity, market_name, state)
+        ) WITHOUT ROWID
+    """)
+
+
+def _variety_and_state_keys(conn: sqlite3.Connection) -> None:
+    """
+    Add variety to the price keys and state to the trend and demand keys.
+    
+    The mandi feed reports a price per variety, and market names repeat
+    across states, so under the keys of step 3 those rows replaced each
+    other. Rows stored before this step get '' for the new columns.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS dim_variety (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    for dimension in ('dim_variety', 'dim_state'):
+        conn.execute(f"INSERT OR IGNORE INTO {dimension} (name) VALUES ('')")
+    rebuild_table(conn, 'market_prices', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT,
+            district TEXT,
+            variety TEXT NOT NULL DEFAULT '',
+            price REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, state, district, variety, date)
+        )
+    """)
+    rebuild_table(conn, 'market_trends', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT '',
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, state, date)
+        )
+    """)
+    rebuild_table(conn, 'market_demand', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT '',
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit TEXT,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity, market_name, state, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_prices', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            state_id INTEGER REFERENCES dim_state(id),
+            district_id INTEGER REFERENCES dim_district(id),
+            variety_id INTEGER REFERENCES dim_variety(id),
+            price REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, state_id, district_id, variety_id, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_trends', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            state_id INTEGER REFERENCES dim_state(id),
+            price_today REAL,
+            price_yesterday REAL,
+            price_change REAL,
+            change_percentage REAL,
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, state_id, date)
+        )
+    """)
+    rebuild_table(conn, 'fact_market_demand', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity_id INTEGER NOT NULL REFERENCES dim_commodity(id),
+            market_id INTEGER NOT NULL REFERENCES dim_market(id),
+            state_id INTEGER REFERENCES dim_state(id),
+            demand_level TEXT,
+            supply_level TEXT,
+            arrival_quantity REAL,
+            unit_id INTEGER REFERENCES dim_unit(id),
+            date DATE,
+            last_updated DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (commodity_id, market_id, state_id, date)
+        )
+    """)
+    # NULL ids never conflict in a UNIQUE key, so old rows take the id of ''
+    for table, column, dimension in (('fact_market_prices', 'variety_id', 'dim_variety'),
+                                     ('fact_market_trends', 'state_id', 'dim_state'),
+                                     ('fact_market_demand', 'state_id', 'dim_state')):
+        conn.execute(f"UPDATE {table} SET {column} = (SELECT id FROM {dimension} WHERE name = '')"
+                     f" WHERE {column} IS NULL")
+    
+    # Name-resolving views, in the plain tables' new column order
+    for view in ('v_market_prices', 'v_market_trends', 'v_market_demand'):
+        conn.execute(f"DROP VIEW IF EXISTS {view}")
+    conn.execute("""
+        CREATE VIEW v_market_prices AS
+        SELECT p.id, c.name AS commodity, m.name AS market_name, s.name AS state,
+               d.name AS district, v.name AS variety, p.price, u.name AS unit, p.date,
+               p.last_updated, p.created_at
+        FROM fact_market_prices p
+        JOIN dim_commodity c ON c.id = p.commodity_id
+        JOIN dim_market m ON m.id = p.market_id
+        LEFT JOIN dim_state s ON s.id = p.state_id
+        LEFT JOIN dim_district d ON d.id = p.district_id
+        LEFT JOIN dim_variety v ON v.id = p.variety_id
+        LEFT JOIN dim_unit u ON u.id = p.unit_id
+    """)
+    conn.execute("""
+        CREATE VIEW v_market_trends AS
+        SELECT t.id, c.name AS commodity, m.name AS market_name, s.name AS state,
+               t.price_today, t.price_yesterday, t.price_change, t.change_percentage,
+               t.date, t.last_updated, t.created_at
+        FROM fact_market_trends t
+        JOIN dim_commodity c ON c.id = t.commodity_id
+        JOIN dim_market m ON m.id = t.market_id
+        LEFT JOIN dim_state s ON s.id = t.state_id
+    """)
+    conn.execute("""
+        CREATE VIEW v_market_demand AS
+        SELECT d.id, c.name AS commodity, m.name AS market_name, s.name AS state,
+               d.demand_level, d.supply_level, d.arrival_quantity, u.name AS unit,
+               d.date, d.last_updated, d.created_at
+        FROM fact_market_demand d
+        JOIN dim_commodity c ON c.id = d.commodity_id
+        JOIN dim_market m ON m.id = d.market_id
+        LEFT JOIN dim_state s ON s.id = d.state_id
+        LEFT JOIN dim_unit u ON u.id = d.unit_id
+    """)
+
+
+def _anomaly_variety_keys(conn: sqlite3.Connection) -> None:
+    """
+    Key anomalies and detector state by variety, as prices are since step 11.
+    
+    Replays are now recognised by natural key, so the detector state drops
+    its last_date column; existing series carry over as variety ''.
+    """
+    rebuild_table(conn, 'market_anomalies', """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT,
+            district TEXT,
+            variety TEXT NOT NULL DEFAULT '',
+            price REAL,
+            unit TEXT,
+            date DATE,
+            expected_price REAL,
+            reason TEXT NOT NULL,
+            action TEXT NOT NULL,
+            last_updated DATETIME,
+            UNIQUE (commodity, market_name, state, district, variety, date)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE price_series_stats__rebuild (
+            commodity TEXT NOT NULL,
+            market_name TEXT NOT NULL,
+            state TEXT NOT NULL,
+            variety TEXT NOT NULL,
+            mean_log REAL NOT NULL,
+            var_log REAL NOT NULL,
+            count INTEGER NOT NULL,
+            streak INTEGER NOT NULL,
+            pending_log REAL NOT NULL,
+            PRIMARY KEY (commodity, market_name, state, variety)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO price_series_stats__rebuild
+        SELECT commodity, market_name, state, '', mean_log, var_log, count, streak, pending_log
+        FROM price_series_stats
+    """)
+    conn.execute("DROP TABLE price_series_stats")
+    conn.execute("ALTER TABLE price_series_stats__rebuild RENAME TO price_series_stats")
+
+
+# Ordered schema history; append new steps, never edit applied ones
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Baseline market tables and normalized layout", _baseline_schema),
+    Migration(2, "Composite lookup and recency indexes", _lookup_indexes),
+    Migration(3, "UNIQUE natural keys on market tables", _natural_keys),
+    Migration(4, "Materialized dashboard aggregates", _aggregate_tables),
+    Migration(5, "Resumable crawl checkpoints", _crawl_checkpoints),
+    Migration(6, "Keyset pagination indexes", _keyset_indexes),
+    Migration(7, "Covering price series indexes", _series_indexes),
+    Migration(8, "Batch price forecasts", _forecast_table),
+    Migration(9, "Ingest price anomalies and detector state", _anomaly_tables),
+    Migration(10, "Detector state per state, with replay watermark", _series_stats_by_state),
+    Migration(11, "Variety in price keys, state in trend and demand keys", _variety_and_state_keys),
+    Migration(12, "Variety in anomaly and detector keys", _anomaly_variety_keys),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version stored in the database header."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path: str, target: Optional[int] = None, busy_timeout_ms: int = 30000) -> List[Dict]:
+    """
+    Apply pending migrations up to target (default: latest).
+    
+    Each migration runs in its own BEGIN IMMEDIATE transaction together with
+    the user_version bump, so a failure leaves the database at the last
+    completed version.
+    
+    Args:
+        db_path (str): Path to SQLite database file
+        target (Optional[int]): Version to stop at
+        busy_timeout_ms (int): How long to wait for other writers
+    
+    Returns:
+        List[Dict]: One entry per applied step with its duration in seconds
+    """
+    target = SCHEMA_VERSION if target is None else target
+    applied = []
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        for migration in MIGRATIONS:
+            if migration.version > target:
+                break
+            # Re-read inside the lock so concurrent runners don't apply a step twice
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if get_version(conn) >= migration.version:
+                    conn.execute("COMMIT")
+                    continue
+                start = time.perf_counter()
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                logger.error(f"Migration {migration.version} failed: {migration.description}")
+                raise
+            seconds = time.perf_counter() - start
+            logger.info(f"Applied migration {migration.version} ({migration.description}) in {seconds:.3f}s")
+            applied.append({
+                'version': migration.version,
+                'description': migration.description,
+                'seconds': round(seconds, 4),
+            })
+    finally:
+        conn.close()
+    return applied
+
+
+def dry_run(db_path: str, target: Optional[int] = None) -> Dict:
+    """
+    Run pending migrations against a copy of the database and report impact.
+    
+    The copy is taken with the SQLite backup API, so it is consistent even
+    while the source is being written. The original file is never modified.
+    
+    Returns:
+        Dict: Versions, per-step timings (the write-lock time each step will
+            hold on the real database) and file size before and after
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        copy_path = os.path.join(workdir, os.path.basename(db_path))
+        source = sqlite3.connect(db_path)
+        copy = sqlite3.connect(copy_path)
+        try:
+            source.backup(copy)
+            from_version = get_version(copy)
+        finally:
+            copy.close()
+            source.close()
+        
+        size_before = os.path.getsize(copy_path)
+        steps = migrate(copy_path, target)
+        size_after = os.path.getsize(copy_path)
+        with sqlite3.connect(copy_path) as conn:
+            to_version = get_version(conn)
+    
+    return {
+        'from_version': from_version,
+        'to_version': to_version,
+        'steps': steps,
+        'total_seconds': round(sum(step['seconds'] for step in steps), 4),
+        'size_before': size_before,
+        'size_after': size_after,
+        'size_delta': size_after - size_before,
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Market database migrations')
+    parser.add_argument('command', choices=['status', 'migrate', 'dry-run'])
+    parser.add_argument('--db', default='agriai.db', help='Path to SQLite database file')
+    parser.add_argument('--target', type=int, help='Schema version to migrate to')
+    args = parser.parse_args()
+    
+    if args.command == 'status':
+        with sqlite3.connect(args.db) as conn:
+            current = get_version(conn)
+        result = {
+            'version': current,
+            'latest': SCHEMA_VERSION,
+            'pending': [m.description for m in MIGRATIONS if m.version > current],
+        }
+    elif args.command == 'migrate':
+        result = {'applied': migrate(args.db, args.target)}
+    else:
+        result = dry_run(args.db, args.target)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-thread SQLite connection pool for the market store.
+
+sqlite3 connections are cheap to reuse but not to open: each connect parses
+the schema and starts with a cold page cache and an empty statement cache.
+The pool keeps one connection per (thread, database) with pragmas applied
+once, so repeated small queries only pay for executing a cached statement.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+# Applied once to every pooled connection
+DEFAULT_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+
+class ConnectionPool:
+    """
+    One sqlite3 connection per thread for a single database file.
+    
+    Connections are never shared between threads, so the pool is safe to use
+    from a multi-threaded server. With reopen_on_replace the file's identity is
+    checked on every get(); when the file has been swapped (a published
+    snapshot), the thread's connection is reopened against the new file.
+    """
+    
+    def __init__(self, path: str, uri: Optional[str] = None, pragmas: Iterable[str] = DEFAULT_PRAGMAS,
+                 reopen_on_replace: bool = False, cached_statements: int = 256):
+        self.path = path
+        self.uri = uri
+        self.pragmas = tuple(pragmas)
+        self.reopen_on_replace = reopen_on_replace
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+    
+    def _file_identity(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _open(self) -> sqlite3.Connection:
+        # Each connection is only used by the thread that opened it;
+        # check_same_thread is off so close_all() can run from any thread
+        conn = sqlite3.connect(self.uri or self.path, uri=bool(self.uri), check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+    
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+    
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if self.reopen_on_replace:
+            identity = self._file_identity()
+            if conn is not None and identity != local.identity:
+                self._discard(conn)
+                conn = None
+            local.identity = identity
+        if conn is None:
+            conn = self._open()
+            local.conn = conn
+        return conn
+    
+    def close_all(self) -> None:
+        """Close every connection the pool has opened, in any thread."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,237 @@
+"""
+Market Price Storage Backends
+
+A MarketStore holds the raw price history: write a parsed batch, read a
+commodity's prices over a date range. MarketDataFetcher(store=...) makes a
+store its price backend: every committed batch is written to it and
+get_price_range reads from it. The fetcher's derived tables (trends,
+demand, dashboard aggregates, forecasts) stay in its SQLite database.
+Two implementations:
+
+  - SQLiteMarketStore : a market_prices table in a SQLite file, e.g. a history
+                        database kept apart from the fetcher's working one
+  - MongoMarketStore  : a MongoDB time-series collection shared by every app node
+
+Both only upsert price rows on the natural key; screening, trends, demand
+and aggregates are the fetcher's job, done before it hands a batch over.
+
+Time-series layout: one document per (commodity, market, state, district, variety, day)
+with metaField `meta` = {commodity, market, state}, so MongoDB buckets a
+series' observations together and compresses the repeated names away.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional
+
+from market_migrations import migrate
+from mongo_connection import get_db
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('seconds', 'minutes', 'hours')
+
+
+class MarketStore(ABC):
+    """
+    Storage contract shared by the market price backends.
+    """
+    
+    @abstractmethod
+    def write_batch(self, batch) -> int:
+        """
+        Insert or replace the price rows of a MarketBatch on their natural key.
+        
+        Returns:
+            int: Price rows written
+        """
+    
+    @abstractmethod
+    def price_range(self, commodity: str, start: date, end: date,
+                    market: Optional[str] = None, state: Optional[str] = None) -> List[Dict]:
+        """
+        Prices of one commodity dated start..end inclusive, oldest first.
+        
+        Returns:
+            List[Dict]: Rows with commodity, market_name, state, district,
+                variety, price, unit, date and last_updated, dates as ISO strings
+        """
+    
+    def close(self) -> None:
+        """Release connections; a no-op unless the backend holds any."""
+
+
+class SQLiteMarketStore(MarketStore):
+    """
+    Market prices in the market_prices table of a SQLite database.
+    
+    Opens its own connection, so the file can be the fetcher's database or
+    a separate one; upserts on the table's natural key make replays idempotent.
+    """
+    
+    UPSERT_SQL = """
+        INSERT INTO market_prices (
+            commodity, market_name, state, district, variety, price, unit, date, last_updated
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (commodity, market_name, state, district, variety, date) DO UPDATE SET
+            price = excluded.price, unit = excluded.unit, last_updated = excluded.last_updated
+    """
+    RANGE_SQL = """
+        SELECT commodity, market_name, state, district, variety, price, unit, date, last_updated
+        FROM market_prices
+        WHERE commodity = :commodity AND date BETWEEN :start AND :end
+          AND (:market IS NULL OR market_name = :market)
+          AND (:state IS NULL OR state = :state)
+        ORDER BY date
+    """
+    
+    def __init__(self, db_path: str, wal: bool = True):
+        """
+        Args:
+            db_path (str): SQLite file, migrated to the current market schema
+            wal (bool): Use WAL mode so range reads never wait on writes
+        """
+        migrate(db_path)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        if wal:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        # One connection serves every thread the fetcher writes or reads from
+        self._lock = threading.Lock()
+    
+    def write_batch(self, batch) -> int:
+        last_updated = batch.last_updated
+        rows = [
+            (r.commodity, r.market_name, r.state, r.district, r.variety, r.price, r.unit, r.date, last_updated)
+            for r in batch.records if r.price > 0
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(self.UPSERT_SQL, rows)
+        return len(rows)
+    
+    def price_range(self, commodity: str, start: date, end: date,
+                    market: Optional[str] = None, state: Optional[str] = None) -> List[Dict]:
+        params = {'commodity': commodity, 'start': start.isoformat(), 'end': end.isoformat(),
+                  'market': market, 'state': state}
+        with self._lock:
+            cursor = self.conn.execute(self.RANGE_SQL, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+    
+    def close(self) -> None:
+        self.conn.close()
+
+
+class MongoMarketStore(MarketStore):
+    """
+    Market prices in a MongoDB time-series collection.
+    
+    Writes are unordered bulk upserts keyed on the same natural key as the
+    SQLite table, so replaying a page (crawl resume, archive reprocess) is
+    idempotent. Upserts into time-series collections need MongoDB 7.0+.
+    """
+    
+    def __init__(self, db, collection: str = 'market_prices_ts', granularity: str = 'hours',
+                 retention_days: Optional[int] = None, chunk_size: int = 1000):
+        """
+        Open (creating if needed) the time-series collection.
+        
+        Args:
+            db: pymongo Database
+            collection (str): Collection name
+            granularity (str): Bucket granularity ('seconds', 'minutes' or
+                'hours'); daily prices bucket best at 'hours' (30-day buckets)
+            retention_days (Optional[int]): Drop observations older than this
+                via the collection's TTL; None keeps them forever
+            chunk_size (int): Upserts per bulk_write round trip
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+        self.db = db
+        self.name = collection
+        self.granularity = granularity
+        self.retention_days = retention_days
+        self.chunk_size = chunk_size
+        self.collection = self._ensure_collection()
+    
+    def _ensure_collection(self):
+        expire = self.retention_days * 86400 if self.retention_days else None
+        info = next(iter(self.db.list_collections(filter={'name': self.name})), None)
+        if info is None:
+            options = {'timeseries': {'timeField': 'date', 'metaField': 'meta', 'granularity': self.granularity}}
+            if expire:
+                options['expireAfterSeconds'] = expire
+            self.db.create_collection(self.name, **options)
+            logger.info(f"Created time-series collection {self.name} ({self.granularity}, retention {expire}s)")
+        elif info.get('options', {}).get('expireAfterSeconds') != expire:
+            # Retention can change between deployments; granularity can only grow, so leave it
+            self.db.command('collMod', self.name, expireAfterSeconds=expire or 'off')
+            logger.info(f"Changed retention of {self.name} to {expire}s")
+        collection = self.db[self.name]
+        collection.create_index([('meta.commodity', 1), ('date', 1)])
+        return collection
+    
+    def write_batch(self, batch) -> int:
+        from pymongo import UpdateOne
+        
+        last_updated = batch.last_updated
+        written = 0
+        ops = []
+        for r in batch.records:
+            if r.price <= 0:
+                continue
+            # An upsert seeds meta, district and date from the equality filter
+            ops.append(UpdateOne(
+                {'meta.commodity': r.commodity, 'meta.market': r.market_name, 'meta.state': r.state,
+                 'district': r.district, 'variety': r.variety, 'date': datetime.combine(r.date, dt_time())},
+                {'$set': {'price': r.price, 'unit': r.unit, 'lastUpdated': last_updated}},
+                upsert=True,
+            ))
+            if len(ops) >= self.chunk_size:
+                written += self._flush(ops)
+                ops = []
+        if ops:
+            written += self._flush(ops)
+        return written
+    
+    def _flush(self, ops: List) -> int:
+        result = self.collection.bulk_write(ops, ordered=False)
+        return result.upserted_count + result.matched_count
+    
+    def price_range(self, commodity: str, start: date, end: date,
+                    market: Optional[str] = None, state: Optional[str] = None) -> List[Dict]:
+        query = {
+            'meta.commodity': commodity,
+            'date': {'$gte': datetime.combine(start, dt_time()),
+                     '$lt': datetime.combine(end + timedelta(days=1), dt_time())},
+        }
+        if market:
+            query['meta.market'] = market
+        if state:
+            query['meta.state'] = state
+        return [
+            {'commodity': doc['meta']['commodity'], 'market_name': doc['meta']['market'],
+             'state': doc['meta']['state'], 'district': doc.get('district'),
+             'variety': doc.get('variety', ''), 'price': doc['price'],
+             'unit': doc.get('unit'), 'date': doc['date'].date().isoformat(),
+             'last_updated': str(doc['lastUpdated']) if doc.get('lastUpdated') else None}
+            for doc in self.collection.find(query, {'_id': 0}).sort('date', 1)
+        ]
+
+
+def mongo_market_store() -> MongoMarketStore:
+    """
+    MongoMarketStore on the app database (MONGO_URI / MONGO_DB), configured by
+    MARKET_MONGO_COLLECTION, MARKET_MONGO_GRANULARITY and MARKET_RETENTION_DAYS.
+    """
+    retention = os.environ.get('MARKET_RETENTION_DAYS')
+    return MongoMarketStore(
+        get_db(),
+        collection=os.environ.get('MARKET_MONGO_COLLECTION', 'market_prices_ts'),
+        granularity=os.environ.get('MARKET_MONGO_GRANULARITY', 'hours'),
+        retention_days=int(retention) if retention else None,
+    )
@@ -0,0 +1,25 @@
+"""
+Connection to the app's MongoDB database, shared by the schemes fetcher,
+the scheduler's leases and the market price store.
+
+Configured by MONGO_URI (required), MONGO_DB (default agriai) and
+MONGO_TIMEOUT_MS (server selection timeout, default 5000).
+"""
+
+import os
+
+
+def get_db():
+    # pymongo is imported lazily to keep CLI startup fast
+    from pymongo import MongoClient
+
+    mongo_uri = os.environ.get("MONGO_URI")
+    if not mongo_uri:
+        raise RuntimeError("MONGO_URI is required")
+    client = MongoClient(
+        mongo_uri,
+        tlsAllowInvalidCertificates=True,
+        serverSelectionTimeoutMS=int(os.environ.get("MONGO_TIMEOUT_MS", "5000")),
+    )
+    db_name = os.environ.get("MONGO_DB", "agriai")
+    return client[db_name]
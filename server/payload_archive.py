@@ -0,0 +1,176 @@
+"""
+Content-addressed archive of raw data.gov.in response pages.
+
+Each page body is stored once under objects/<sha256[:2]>/<sha256>.json.<codec>,
+compressed with zstd when the zstandard package is installed and gzip
+otherwise. A SQLite index records every fetch (resource, offset, time), so
+the same bytes fetched on many days take one object but many index rows.
+
+map_payloads() replays archived pages through a parse function in worker
+processes, which lets parser fixes and new derived tables be backfilled
+locally instead of refetching from the rate-limited API.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is used when zstandard is missing
+    zstandard = None
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    page_offset INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    codec TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payloads_resource_time ON payloads(resource, fetched_at);
+"""
+
+
+class ArchiveEntry(NamedTuple):
+    digest: str
+    resource: str
+    offset: int
+    fetched_at: datetime
+    size: int
+    codec: str
+
+
+def _object_path(root: str, digest: str, codec: str) -> str:
+    return os.path.join(root, "objects", digest[:2], f"{digest}.json.{codec}")
+
+
+def _compress(body: bytes) -> tuple:
+    if zstandard is not None:
+        return "zst", zstandard.ZstdCompressor(level=3).compress(body)
+    return "gz", gzip.compress(body, compresslevel=6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gz":
+        return gzip.decompress(data)
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to read .zst archive objects")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+class PayloadArchive:
+    """Archive rooted at a directory holding objects/ and index.db."""
+    
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(INDEX_SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+    
+    def object_path(self, digest: str, codec: str) -> str:
+        return _object_path(self.root, digest, codec)
+    
+    def store(self, resource: str, offset: int, body: bytes, fetched_at: Optional[datetime] = None) -> str:
+        """
+        Archive one response body, returning its sha256 digest.
+        
+        The object is written only if no object with that digest exists yet.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        codec = None
+        for existing in ("zst", "gz"):
+            if os.path.exists(self.object_path(digest, existing)):
+                codec = existing
+                break
+        if codec is None:
+            codec, data = _compress(body)
+            path = self.object_path(digest, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO payloads (digest, resource, page_offset, fetched_at, size, codec)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, resource, offset, (fetched_at or datetime.now()).isoformat(), len(body), codec),
+            )
+        return digest
+    
+    def entries(
+        self,
+        resource: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[ArchiveEntry]:
+        """Index rows in fetch order, optionally filtered by resource and time range."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT digest, resource, page_offset, fetched_at, size, codec FROM payloads"
+                " WHERE (:resource IS NULL OR resource = :resource)"
+                " AND (:since IS NULL OR fetched_at >= :since)"
+                " AND (:until IS NULL OR fetched_at < :until)"
+                " ORDER BY fetched_at, id",
+                {
+                    "resource": resource,
+                    "since": since.isoformat() if since else None,
+                    "until": until.isoformat() if until else None,
+                },
+            ).fetchall()
+        return [
+            ArchiveEntry(digest, res, offset, datetime.fromisoformat(fetched_at), size, codec)
+            for digest, res, offset, fetched_at, size, codec in rows
+        ]
+    
+    def read(self, entry: ArchiveEntry) -> bytes:
+        with open(self.object_path(entry.digest, entry.codec), "rb") as f:
+            return _decompress(f.read(), entry.codec)
+    
+    def map_payloads(
+        self,
+        fn: Callable[[ArchiveEntry, List[dict]], Any],
+        entries: List[ArchiveEntry],
+        workers: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Yield fn(entry, records) for each entry, in entry order.
+        
+        Decompression, JSON decoding and fn run in `workers` processes (all
+        CPUs by default; 1 runs inline). fn must be a module-level function.
+        At most a few tasks per worker are in flight, so a slow consumer such
+        as a single database writer bounds memory.
+        """
+        tasks = ((self.root, entry, fn) for entry in entries)
+        if workers == 1:
+            yield from map(_apply, tasks)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            window = (workers or os.cpu_count() or 1) * 4
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_apply, task))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def _apply(task: tuple) -> Any:
+    root, entry, fn = task
+    with open(_object_path(root, entry.digest, entry.codec), "rb") as f:
+        data = json.loads(_decompress(f.read(), entry.codec))
+    return fn(entry, data.get("records") or data.get("data") or [])
@@ -0,0 +1,166 @@
+"""
+Streaming Price Anomaly Detection
+
+Screens market records as they are ingested, one pass and O(1) work per
+record. Each (commodity, market, state, variety) series keeps an exponentially
+weighted mean and variance of its log price (five numbers, whatever its history),
+so a price is judged against the series' recent level without querying
+stored rows. Log space makes the usual upstream faults stand out at any
+price level: a unit mix-up is a x100 jump, a dropped digit a /10 fall.
+
+A price is an outlier when it is further from the running mean than both
+`threshold` standard deviations and a `min_ratio` multiple; outliers do not
+update the statistics. When a series produces `reset_after` outliers in a
+row, each within `min_ratio` of the one before, the level itself has moved,
+so the series is re-seeded at the new price and that record accepted (the
+earlier ones stay flagged). Records whose price
+was imputed by the parser are always anomalies and never update a series.
+
+Every record handed to screen() is judged, whatever its date, so callers
+leave out records they have judged before (replayed pages) to keep the
+statistics from counting an observation twice.
+"""
+
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ANOMALY_MODES = ('off', 'flag', 'quarantine')
+
+# Per-series state, a list mutated in place:
+# [mean, variance, count, outlier streak, log price of the last outlier]
+MEAN, VAR, COUNT, STREAK, PENDING = range(5)
+
+SeriesKey = Tuple[str, str, str, str]
+
+
+def series_key(record) -> SeriesKey:
+    """(commodity, market, state, variety) of a MarketRecord."""
+    return (record.commodity, record.market_name, record.state, record.variety)
+
+
+class PriceAnomalyDetector:
+    """
+    Constant-memory per-series outlier detector for streamed prices.
+    """
+    
+    def __init__(self, alpha: float = 0.1, threshold: float = 4.0, min_ratio: float = 1.5,
+                 warmup: int = 5, reset_after: int = 3):
+        """
+        Args:
+            alpha (float): EWMA weight of each new price
+            threshold (float): Outlier distance in running standard deviations
+            min_ratio (float): Prices within this factor of the running level are
+                never outliers, however steady the series has been
+            warmup (int): Prices a series accepts before it is judged
+            reset_after (int): Consecutive, mutually consistent outliers that
+                re-seed a series
+        """
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_log_ratio = math.log(min_ratio)
+        self.warmup = warmup
+        self.reset_after = reset_after
+        self.series: Dict[SeriesKey, list] = {}
+        self._dirty = set()
+    
+    def load(self, rows: Iterable[Tuple]) -> None:
+        """
+        Restore series state from (commodity, market, state, variety, mean,
+        variance, count, streak, pending) rows.
+        """
+        for *key, mean, var, count, streak, pending in rows:
+            self.series[tuple(key)] = [mean, var, count, streak, pending]
+    
+    def dirty_rows(self) -> Iterator[Tuple]:
+        """Yield state rows for series changed since the last call, in load() order."""
+        series = self.series
+        for key in self._dirty:
+            yield key + tuple(series[key])
+        self._dirty = set()
+    
+    def snapshot(self, records: List) -> Dict[SeriesKey, Optional[tuple]]:
+        """Copy the state of every series these records touch, for restore()."""
+        series = self.series
+        saved = {}
+        for record in records:
+            key = series_key(record)
+            if key not in saved:
+                state = series.get(key)
+                saved[key] = tuple(state) if state is not None else None
+        return saved
+    
+    def restore(self, saved: Dict[SeriesKey, Optional[tuple]]) -> None:
+        """Undo everything screened since snapshot(), e.g. when its transaction rolled back."""
+        for key, state in saved.items():
+            if state is None:
+                self.series.pop(key, None)
+                self._dirty.discard(key)
+            else:
+                self.series[key] = list(state)
+    
+    def check(self, key: SeriesKey, price: float) -> Optional[float]:
+        """
+        Judge one price and fold it into its series if it is not an outlier.
+        
+        Args:
+            key (SeriesKey): (commodity, market, state, variety)
+            price (float): Positive price
+        
+        Returns:
+            Optional[float]: The series' expected price if this one is an outlier, else None
+        """
+        x = math.log(price)
+        self._dirty.add(key)
+        state = self.series.get(key)
+        if state is None:
+            self.series[key] = [x, 0.0, 1, 0, 0.0]
+            return None
+        deviation = x - state[MEAN]
+        if state[COUNT] >= self.warmup and abs(deviation) > max(
+                self.threshold * math.sqrt(state[VAR]), self.min_log_ratio):
+            if state[STREAK] and abs(x - state[PENDING]) <= self.min_log_ratio:
+                state[STREAK] += 1
+            else:
+                state[STREAK] = 1
+            state[PENDING] = x
+            if state[STREAK] < self.reset_after:
+                return math.exp(state[MEAN])
+            state[:] = [x, 0.0, 1, 0, 0.0]
+            return None
+        # Incremental exponentially weighted mean and variance (Finch, 2009)
+        increment = self.alpha * deviation
+        state[MEAN] += increment
+        state[VAR] = (1 - self.alpha) * (state[VAR] + deviation * increment)
+        state[COUNT] += 1
+        state[STREAK] = 0
+        return None
+    
+    def expected(self, key: SeriesKey) -> Optional[float]:
+        """The series' running price level, if it has one."""
+        state = self.series.get(key)
+        return math.exp(state[MEAN]) if state is not None else None
+    
+    def screen(self, records: List) -> Tuple[List, List[Tuple]]:
+        """
+        Split MarketRecords into accepted records and anomalies, in order.
+        
+        Returns:
+            Tuple[List, List[Tuple]]: (accepted records, [(record, reason,
+                expected price or None)]) with reason 'outlier' or 'imputed'
+        """
+        accepted = []
+        anomalies = []
+        check = self.check
+        for record in records:
+            key = series_key(record)
+            if record.imputed:
+                anomalies.append((record, 'imputed', self.expected(key)))
+            elif record.price <= 0:
+                accepted.append(record)
+            else:
+                expected = check(key, record.price)
+                if expected is None:
+                    accepted.append(record)
+                else:
+                    anomalies.append((record, 'outlier', expected))
+        return accepted, anomalies
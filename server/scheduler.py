@@ -4,17 +4,31 @@ Government Schemes Data Scheduler
 This script schedules the government schemes data fetcher to run periodically.
 It can be run as a cron job or as a background service.
 
+When several app replicas each start a scheduler, pass --lease so they
+elect one leader through a lease in Mongo (or a lock file on shared
+storage). Only the leader runs jobs, each at most once per interval, and a
+standby replica takes over within about one TTL if the leader dies.
+
+With --forecast the scheduler also refreshes the market price forecasts
+daily at 7 AM, apart from any ingest, so fetches never wait on a forecast.
+
 Usage:
     python scheduler.py --interval 3600  # Run every hour
     python scheduler.py --daily          # Run daily at 6 AM
+    python scheduler.py --lease mongo    # Coordinate with other replicas
+    python scheduler.py --forecast       # Also refresh market forecasts daily
 """
 
 import schedule
 import time
 import argparse
 import logging
+import os
 from datetime import datetime
-from gov_schemes_fetcher import fetch_and_store_schemes
+from gov_schemes_fetcher import handle_fetch
+from market_data_fetcher import refresh_market_forecasts
+from mongo_connection import get_db
+from leader_lease import FileLease, LeaseKeeper, MongoLease, StaleLeaseError
 
 # Configure logging
 logging.basicConfig(
@@ -27,21 +41,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_fetch_job():
+FETCH_JOB = 'fetch_schemes'
+FORECAST_JOB = 'market_forecasts'
+FORECAST_INTERVAL = 24 * 3600
+# A job counts as already run if it ran within this share of its interval,
+# which absorbs the drift between replicas' schedules
+RUN_INTERVAL_SLACK = 0.9
+
+def run_fetch_job(lease=None, min_interval=0.0):
     """
     Wrapper function to run the scheme fetch job with logging.
+    
+    With a lease the job runs only on the leader, and only if no replica
+    has run it within min_interval seconds; its writes carry the lease's
+    fencing token.
     """
+    token = None
+    if lease is not None:
+        try:
+            token = lease.claim_run(FETCH_JOB, min_interval)
+        except Exception as e:
+            logger.warning(f"Could not claim fetch job run: {e}")
+        if token is None:
+            logger.debug("Skipping fetch job: not the leader or already run this interval")
+            return
+    
     logger.info("Starting scheduled government schemes fetch job")
     start_time = datetime.now()
     
     try:
-        result = fetch_and_store_schemes()
+        result = handle_fetch(fencing_token=token)
         
-        if result['status'] == 'success':
+        if result['success']:
             logger.info(f"Fetch job completed successfully: {result}")
         else:
             logger.error(f"Fetch job failed: {result}")
             
+    except StaleLeaseError as e:
+        logger.warning(f"Fetch job stopped, a newer leader has taken over: {e}")
     except Exception as e:
         logger.error(f"Unexpected error in scheduled job: {e}")
     
@@ -49,6 +86,42 @@ def run_fetch_job():
     duration = (end_time - start_time).total_seconds()
     logger.info(f"Scheduled job completed in {duration:.2f} seconds")
 
+def run_forecast_job(lease=None, min_interval=0.0):
+    """
+    Refresh the market price forecasts, on the leader only when leased.
+    """
+    if lease is not None:
+        try:
+            token = lease.claim_run(FORECAST_JOB, min_interval)
+        except Exception as e:
+            logger.warning(f"Could not claim forecast job run: {e}")
+            token = None
+        if token is None:
+            logger.debug("Skipping forecast job: not the leader or already run this interval")
+            return
+    
+    logger.info("Starting scheduled market forecast job")
+    start_time = datetime.now()
+    
+    try:
+        series = refresh_market_forecasts()
+        logger.info(f"Forecast job completed: {series} series")
+    except Exception as e:
+        logger.error(f"Unexpected error in forecast job: {e}")
+    
+    duration = (datetime.now() - start_time).total_seconds()
+    logger.info(f"Forecast job completed in {duration:.2f} seconds")
+
+def build_lease(kind, ttl, lock_file):
+    """
+    Lease shared by the scheduler replicas, or None to run uncoordinated.
+    """
+    if kind == 'mongo':
+        return MongoLease(get_db(), 'scheduler', ttl)
+    if kind == 'file':
+        return FileLease(lock_file, 'scheduler', ttl)
+    return None
+
 def main():
     """
     Main scheduler function with command line argument parsing.
@@ -57,37 +130,77 @@ def main():
     parser.add_argument('--interval', type=int, help='Run every N seconds')
     parser.add_argument('--daily', action='store_true', help='Run daily at 6 AM')
     parser.add_argument('--once', action='store_true', help='Run once and exit')
+    parser.add_argument('--lease', choices=['none', 'mongo', 'file'],
+                        default=os.environ.get('SCHEDULER_LEASE', 'none'),
+                        help='Elect a single leader among replicas via Mongo or a lock file')
+    parser.add_argument('--lease-ttl', type=float, default=60.0,
+                        help='Seconds before a dead leader is replaced')
+    parser.add_argument('--lock-file', default=os.environ.get('SCHEDULER_LOCK_FILE', 'scheduler.lease.json'),
+                        help='Lease file for --lease file (on storage shared by the replicas)')
+    parser.add_argument('--forecast', action='store_true',
+                        default=os.environ.get('SCHEDULER_FORECAST') == '1',
+                        help='Also refresh market price forecasts daily at 7 AM')
     
     args = parser.parse_args()
+    lease = build_lease(args.lease, args.lease_ttl, args.lock_file)
     
     if args.once:
         logger.info("Running fetch job once")
-        run_fetch_job()
+        if lease is not None and not lease.renew():
+            logger.info("Another replica holds the lease; not running")
+            return
+        run_fetch_job(lease)
+        if args.forecast:
+            run_forecast_job(lease)
+        if lease is not None:
+            lease.release()
         return
     
     if args.interval:
+        interval = args.interval
         logger.info(f"Scheduling fetch job every {args.interval} seconds")
-        schedule.every(args.interval).seconds.do(run_fetch_job)
+        schedule.every(args.interval).seconds.do(run_fetch_job, lease, interval * RUN_INTERVAL_SLACK)
     elif args.daily:
+        interval = 24 * 3600
         logger.info("Scheduling fetch job daily at 6:00 AM")
-        schedule.every().day.at("06:00").do(run_fetch_job)
+        schedule.every().day.at("06:00").do(run_fetch_job, lease, interval * RUN_INTERVAL_SLACK)
     else:
         # Default: run every 6 hours
+        interval = 6 * 3600
         logger.info("Scheduling fetch job every 6 hours (default)")
-        schedule.every(6).hours.do(run_fetch_job)
+        schedule.every(6).hours.do(run_fetch_job, lease, interval * RUN_INTERVAL_SLACK)
+    
+    if args.forecast:
+        logger.info("Scheduling forecast job daily at 7:00 AM")
+        schedule.every().day.at("07:00").do(run_forecast_job, lease, FORECAST_INTERVAL * RUN_INTERVAL_SLACK)
     
-    # Run initial fetch
-    logger.info("Running initial fetch job")
-    run_fetch_job()
+    keeper = None
+    if lease is not None:
+        lease.renew()
+        keeper = LeaseKeeper(lease)
+        keeper.start()
     
-    # Keep scheduler running
+    # Keep scheduler running; a replica that becomes leader (including at
+    # startup) runs the job right away unless it already ran this interval
     logger.info("Scheduler started. Press Ctrl+C to stop.")
+    tick = 60 if lease is None else min(60, max(1, args.lease_ttl / 3))
+    was_leader = False
     try:
         while True:
+            leader = lease is None or lease.is_leader
+            if leader and not was_leader:
+                logger.info("Running initial fetch job")
+                run_fetch_job(lease, interval * RUN_INTERVAL_SLACK)
+                if args.forecast:
+                    run_forecast_job(lease, FORECAST_INTERVAL * RUN_INTERVAL_SLACK)
+            was_leader = leader
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            time.sleep(tick)
     except KeyboardInterrupt:
         logger.info("Scheduler stopped by user")
+    finally:
+        if keeper is not None:
+            keeper.stop()
 
 if __name__ == "__main__":
     main()
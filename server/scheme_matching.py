@@ -0,0 +1,241 @@
+"""
+Farmer-to-scheme eligibility matching.
+
+At ingest, each scheme's free-text eligibility (plus its state field) is
+reduced to structured attributes: states, landholding bounds in hectares,
+crops and farmer categories. An EligibilityIndex turns those attributes
+into per-value bitsets (Python ints, one bit per scheme), so matching a
+farmer is a handful of dict lookups and bitwise ANDs regardless of how
+many schemes exist. Batch matching memoizes identical profiles, which is
+what makes 100k-profile notification runs a single fast pass.
+
+An empty attribute on a scheme means "no restriction". A farmer's unknown
+state, landholding or crops never excludes a scheme; categories are opt-in,
+so a farmer who declares none only matches category-agnostic schemes.
+"""
+
+import json
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ACRES_PER_HECTARE = 2.471
+
+STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab",
+    "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh",
+    "Uttarakhand", "West Bengal", "Andaman and Nicobar Islands", "Chandigarh",
+    "Dadra and Nagar Haveli and Daman and Diu", "Delhi", "Jammu and Kashmir", "Ladakh",
+    "Lakshadweep", "Puducherry",
+)
+
+# Canonical crop -> words that name it in eligibility text
+CROPS = {
+    "wheat": ("wheat",), "rice": ("rice", "paddy"), "maize": ("maize", "corn"),
+    "cotton": ("cotton",), "sugarcane": ("sugarcane",), "pulses": ("pulses", "pulse"),
+    "oilseeds": ("oilseeds", "oilseed"), "soybean": ("soybean", "soyabean"),
+    "millets": ("millets", "millet"), "horticulture": ("horticulture", "horticultural"),
+    "fruits": ("fruits", "fruit"), "vegetables": ("vegetables", "vegetable"),
+    "spices": ("spices",), "coconut": ("coconut",), "jute": ("jute",), "tea": ("tea",),
+    "coffee": ("coffee",), "rubber": ("rubber",), "onion": ("onion",), "potato": ("potato",),
+    "tomato": ("tomato",),
+}
+
+# Canonical category -> phrases that name it in eligibility text
+CATEGORIES = {
+    "sc": ("sc", "scheduled caste", "scheduled castes"),
+    "st": ("st", "scheduled tribe", "scheduled tribes"),
+    "women": ("women", "woman", "female", "mahila"),
+    "small": ("small farmer", "small farmers", "small and marginal"),
+    "marginal": ("marginal",),
+    "tenant": ("tenant", "tenants", "sharecropper", "sharecroppers"),
+    "landless": ("landless",),
+    "bpl": ("bpl", "below poverty line"),
+    "youth": ("youth",),
+    "fpo": ("fpo", "fpos", "farmer producer"),
+}
+
+_NUMBER_UNIT = r"(\d+(?:\.\d+)?)\s*(hectares?|ha|acres?)\b"
+_MAX_LAND = re.compile(r"\b(?:up ?to|less than|below|not more than|maximum of|max\.?|under|within)\s*" + _NUMBER_UNIT)
+_MIN_LAND = re.compile(r"\b(?:more than|above|at least|minimum of|min\.?|over)\s*" + _NUMBER_UNIT)
+
+
+def _phrase_pattern(phrases: Iterable[str]) -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True)) + r")\b")
+
+
+_STATE_PATTERNS = {state: _phrase_pattern([state.lower()]) for state in STATES}
+_CROP_PATTERNS = {crop: _phrase_pattern(words) for crop, words in CROPS.items()}
+_CATEGORY_PATTERNS = {category: _phrase_pattern(words) for category, words in CATEGORIES.items()}
+
+
+def _to_hectares(value: str, unit: str) -> float:
+    amount = float(value)
+    return round(amount / ACRES_PER_HECTARE, 3) if unit.startswith("acre") else amount
+
+
+def extract_eligibility(scheme: Dict) -> Dict:
+    """
+    Structured eligibility attributes for a scheme.
+    
+    Returns:
+        Dict: states, crops, categories (lists; empty = any) and
+            minLandHa / maxLandHa (None = unbounded)
+    """
+    text = " ".join(str(scheme.get(f, "")) for f in ("eligibility", "description")).lower()
+    states = {s for s, pattern in _STATE_PATTERNS.items() if pattern.search(text)}
+    declared = str(scheme.get("state", "")).strip()
+    if declared:
+        states.add(declared)
+    max_land = _MAX_LAND.search(text)
+    min_land = _MIN_LAND.search(text)
+    return {
+        "states": sorted(states),
+        "crops": sorted(c for c, pattern in _CROP_PATTERNS.items() if pattern.search(text)),
+        "categories": sorted(c for c, pattern in _CATEGORY_PATTERNS.items() if pattern.search(text)),
+        "minLandHa": _to_hectares(*min_land.groups()) if min_land else None,
+        "maxLandHa": _to_hectares(*max_land.groups()) if max_land else None,
+    }
+
+
+def normalize_profile(profile: Dict) -> Tuple:
+    """
+    Hashable match key for a farmer profile.
+    
+    Profile keys: state, landholding (hectares), crops, categories. Small and
+    marginal categories are derived from landholding when not given.
+    """
+    land = profile.get("landholding")
+    land = float(land) if land not in (None, "") else None
+    categories = {str(c).lower() for c in profile.get("categories") or ()}
+    if land is not None:
+        if land <= 1:
+            categories.add("marginal")
+        if land <= 2:
+            categories.add("small")
+    crops = set()
+    for crop in profile.get("crops") or ():
+        crop = str(crop).lower()
+        crops.update(c for c, words in CROPS.items() if crop == c or crop in words)
+    return (profile.get("state") or None, land, frozenset(crops), frozenset(categories))
+
+
+class EligibilityIndex:
+    """
+    Bitset inverted index over scheme eligibility attributes.
+    """
+    
+    def __init__(self, schemes: Iterable[Tuple[str, Dict]]):
+        """
+        Args:
+            schemes (Iterable[Tuple[str, Dict]]): (schemeId, extract_eligibility result)
+        """
+        self.scheme_ids: List[str] = []
+        self.attributes: List[Dict] = []
+        self.any_state = self.any_crop = self.any_category = 0
+        self.by_state: Dict[str, int] = {}
+        self.by_crop: Dict[str, int] = {}
+        self.by_category: Dict[str, int] = {}
+        max_bounds: List[Tuple[float, int]] = []
+        min_bounds: List[Tuple[float, int]] = []
+        self.no_max = self.no_min = 0
+        
+        for bit_index, (scheme_id, attrs) in enumerate(schemes):
+            bit = 1 << bit_index
+            self.scheme_ids.append(scheme_id)
+            self.attributes.append(attrs)
+            self.any_state |= self._add(self.by_state, attrs.get("states"), bit)
+            self.any_crop |= self._add(self.by_crop, attrs.get("crops"), bit)
+            self.any_category |= self._add(self.by_category, attrs.get("categories"), bit)
+            if attrs.get("maxLandHa") is None:
+                self.no_max |= bit
+            else:
+                max_bounds.append((attrs["maxLandHa"], bit))
+            if attrs.get("minLandHa") is None:
+                self.no_min |= bit
+            else:
+                min_bounds.append((attrs["minLandHa"], bit))
+        self.all = (1 << len(self.scheme_ids)) - 1
+        
+        # Schemes whose max >= L: suffix ORs over ascending max bounds
+        max_bounds.sort()
+        self.max_keys = [bound for bound, _ in max_bounds]
+        self.max_suffix = [0] * (len(max_bounds) + 1)
+        for i in range(len(max_bounds) - 1, -1, -1):
+            self.max_suffix[i] = self.max_suffix[i + 1] | max_bounds[i][1]
+        # Schemes whose min <= L: prefix ORs over ascending min bounds
+        min_bounds.sort()
+        self.min_keys = [bound for bound, _ in min_bounds]
+        self.min_prefix = [0]
+        for _, bit in min_bounds:
+            self.min_prefix.append(self.min_prefix[-1] | bit)
+    
+    @staticmethod
+    def _add(index: Dict[str, int], values: Optional[List[str]], bit: int) -> int:
+        """Record bit under each value; returns bit when unrestricted."""
+        if not values:
+            return bit
+        for value in values:
+            index[value] = index.get(value, 0) | bit
+        return 0
+    
+    def match_mask(self, key: Tuple) -> int:
+        """Bitset of schemes matching a normalize_profile() key."""
+        state, land, crops, categories = key
+        mask = self.all
+        if state:
+            mask &= self.any_state | self.by_state.get(state, 0)
+        if crops:
+            crop_mask = self.any_crop
+            for crop in crops:
+                crop_mask |= self.by_crop.get(crop, 0)
+            mask &= crop_mask
+        category_mask = self.any_category
+        for category in categories:
+            category_mask |= self.by_category.get(category, 0)
+        mask &= category_mask
+        if land is not None:
+            mask &= self.no_max | self.max_suffix[bisect_left(self.max_keys, land)]
+            mask &= self.no_min | self.min_prefix[bisect_right(self.min_keys, land)]
+        return mask
+    
+    def _ids(self, mask: int) -> List[str]:
+        # Scanning the reversed binary string beats peeling off low bits one by one
+        bits = bin(mask)[:1:-1]
+        scheme_ids = self.scheme_ids
+        ids = []
+        i = bits.find("1")
+        while i >= 0:
+            ids.append(scheme_ids[i])
+            i = bits.find("1", i + 1)
+        return ids
+    
+    def match(self, profile: Dict) -> List[str]:
+        """Scheme ids a single farmer is eligible for."""
+        return self._ids(self.match_mask(normalize_profile(profile)))
+    
+    def match_batch(self, profiles: Iterable[Dict]) -> Iterator[Tuple[Optional[str], List[str]]]:
+        """
+        Match many farmers in one pass, yielding (farmerId, scheme ids).
+        
+        Farmers sharing a profile key are resolved once.
+        """
+        cache: Dict[Tuple, List[str]] = {}
+        for profile in profiles:
+            key = normalize_profile(profile)
+            ids = cache.get(key)
+            if ids is None:
+                ids = cache[key] = self._ids(self.match_mask(key))
+            yield profile.get("farmerId"), ids
+    
+    def save(self, path: str) -> None:
+        """Persist the source attributes; the bitsets are rebuilt on load."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(zip(self.scheme_ids, self.attributes)), f)
+    
+    @classmethod
+    def load(cls, path: str) -> "EligibilityIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls((scheme_id, attrs) for scheme_id, attrs in json.load(f))
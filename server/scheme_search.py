@@ -0,0 +1,210 @@
+"""
+Scheme search keys and the local SQLite FTS5 search index.
+
+Scheme text is reduced to transliteration-tolerant phonetic keys: Devanagari
+is romanized, aspirates and common spelling variants are folded, doubled
+letters collapsed and vowels after the first letter dropped. "yojana",
+"yojna" and "योजना" all become "yjn"; "kisan", "kissan" and "किसान" become
+"ksn". The same keys feed the Mongo multikey index and the FTS5 fallback,
+so both match the same schemes.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, Iterable, List
+
+from json_stream import dumps
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of a key match in each field
+SEARCH_WEIGHTS = {"name": 10.0, "eligibility": 3.0, "description": 1.0}
+
+# Field holding the source text for each weighted field
+SEARCH_FIELDS = {"name": "schemeName", "eligibility": "eligibility", "description": "description"}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is of on or the to under with all any"
+    " ka ki ke ko se hai aur".split()
+)
+
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j",
+    "झ": "jh", "ञ": "n", "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t",
+    "थ": "th", "द": "d", "ध": "dh", "न": "n", "प": "p", "फ": "ph", "ब": "b", "भ": "bh",
+    "म": "m", "य": "y", "र": "r", "ल": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au",
+}
+_SIGNS = {"ं": "n", "ँ": "n", "ः": "h", "्": "", "़": ""}
+
+# Applied in order to romanized words; folds spelling variants together
+_FOLDS = (
+    ("ph", "f"), ("sh", "s"), ("chh", "c"), ("ch", "c"), ("kh", "k"), ("gh", "g"),
+    ("th", "t"), ("dh", "d"), ("bh", "b"), ("jh", "j"), ("ck", "k"), ("w", "v"),
+    ("z", "j"), ("q", "k"), ("x", "ks"),
+)
+_DOUBLED = re.compile(r"(.)\1+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def romanize(text: str) -> str:
+    """Romanize Devanagari (inherent 'a' included) and strip Latin diacritics."""
+    out = []
+    chars = list(text)
+    for i, ch in enumerate(chars):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            following = chars[i + 1] if i + 1 < len(chars) else ""
+            if following not in _MATRAS and following not in ("्", "़"):
+                out.append("a")
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _MATRAS:
+            out.append(_MATRAS[ch])
+        elif ch in _SIGNS:
+            out.append(_SIGNS[ch])
+        else:
+            out.append(ch)
+    decomposed = unicodedata.normalize("NFKD", "".join(out))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def phonetic_key(word: str) -> str:
+    """Reduce one romanized word to its spelling-tolerant key."""
+    if word.isdigit():
+        return word
+    for source, target in _FOLDS:
+        word = word.replace(source, target)
+    word = _DOUBLED.sub(r"\1", word)
+    return word[0] + re.sub(r"[aeiouh]", "", word[1:])
+
+
+def text_keys(text: str) -> List[str]:
+    """Distinct phonetic keys for a piece of text, in first-seen order."""
+    keys = []
+    seen = set()
+    for word in _NON_WORD.split(romanize(text or "")):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        key = phonetic_key(word)
+        if len(key) >= 2 and key not in seen:
+            seen.add(key)
+            keys.append(key)
+    return keys
+
+
+def search_fields(scheme: Dict) -> Dict[str, List[str]]:
+    """
+    Search key arrays stored on a scheme document.
+    
+    Returns:
+        Dict[str, List[str]]: nameKeys, eligibilityKeys, descriptionKeys and
+            their union searchKeys (the indexed field)
+    """
+    fields = {f"{name}Keys": text_keys(str(scheme.get(source, ""))) for name, source in SEARCH_FIELDS.items()}
+    union = []
+    seen = set()
+    for keys in fields.values():
+        for key in keys:
+            if key not in seen:
+                seen.add(key)
+                union.append(key)
+    fields["searchKeys"] = union
+    return fields
+
+
+class SchemeSearchIndex:
+    """
+    Local SQLite FTS5 index used when Mongo is unavailable.
+    
+    Full scheme documents are kept alongside the FTS rows so results can be
+    served without Mongo. Ranking is bm25 with SEARCH_WEIGHTS per column.
+    """
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheme_docs (
+                    id INTEGER PRIMARY KEY,
+                    scheme_id TEXT NOT NULL UNIQUE,
+                    scheme_name TEXT,
+                    doc TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS scheme_fts USING fts5(
+                    name_keys, eligibility_keys, description_keys
+                )
+            """)
+    
+    def upsert(self, schemes: Iterable[Dict]) -> int:
+        """Index or re-index schemes by schemeId; returns the number indexed."""
+        count = 0
+        with sqlite3.connect(self.db_path) as conn:
+            for scheme in schemes:
+                scheme_id = scheme.get("schemeId")
+                if not scheme_id:
+                    continue
+                fields = search_fields(scheme)
+                row = conn.execute("SELECT id FROM scheme_docs WHERE scheme_id = ?", (scheme_id,)).fetchone()
+                doc = dumps({k: v for k, v in scheme.items() if not k.endswith("Keys")}).decode("utf-8")
+                if row:
+                    conn.execute("DELETE FROM scheme_fts WHERE rowid = ?", (row[0],))
+                    conn.execute("UPDATE scheme_docs SET scheme_name = ?, doc = ? WHERE id = ?",
+                                 (scheme.get("schemeName"), doc, row[0]))
+                    rowid = row[0]
+                else:
+                    rowid = conn.execute("INSERT INTO scheme_docs (scheme_id, scheme_name, doc) VALUES (?, ?, ?)",
+                                         (scheme_id, scheme.get("schemeName"), doc)).lastrowid
+                conn.execute(
+                    "INSERT INTO scheme_fts (rowid, name_keys, eligibility_keys, description_keys) VALUES (?, ?, ?, ?)",
+                    (rowid, " ".join(fields["nameKeys"]), " ".join(fields["eligibilityKeys"]),
+                     " ".join(fields["descriptionKeys"])),
+                )
+                count += 1
+        return count
+    
+    def remove(self, scheme_ids: Iterable[str]) -> None:
+        """Drop schemes from the index."""
+        with sqlite3.connect(self.db_path) as conn:
+            for scheme_id in scheme_ids:
+                row = conn.execute("SELECT id FROM scheme_docs WHERE scheme_id = ?", (scheme_id,)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM scheme_fts WHERE rowid = ?", (row[0],))
+                    conn.execute("DELETE FROM scheme_docs WHERE id = ?", (row[0],))
+    
+    def search(self, query: str, page: int = 1, page_size: int = 20) -> Dict:
+        """Ranked, paginated search; same response shape as the Mongo search."""
+        keys = text_keys(query)
+        result = {"results": [], "total": 0, "page": page, "pageSize": page_size, "source": "local"}
+        if not keys:
+            return result
+        match = " OR ".join(f'"{key}"' for key in keys)
+        weights = ", ".join(str(SEARCH_WEIGHTS[name]) for name in ("name", "eligibility", "description"))
+        with sqlite3.connect(self.db_path) as conn:
+            result["total"] = conn.execute(
+                "SELECT COUNT(*) FROM scheme_fts WHERE scheme_fts MATCH ?", (match,)
+            ).fetchone()[0]
+            rows = conn.execute(f"""
+                SELECT d.doc, -bm25(scheme_fts, {weights}) AS score
+                FROM scheme_fts JOIN scheme_docs d ON d.id = scheme_fts.rowid
+                WHERE scheme_fts MATCH ?
+                ORDER BY score DESC, d.scheme_name
+                LIMIT ? OFFSET ?
+            """, (match, page_size, (page - 1) * page_size)).fetchall()
+        for doc, score in rows:
+            scheme = json.loads(doc)
+            scheme["score"] = round(score, 4)
+            result["results"].append(scheme)
+        return result
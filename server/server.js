@@ -605,6 +605,8 @@ app.get('/api/schemes', authenticateToken, async (req, res) => {
     const args = ['get_schemes', '--region', region || '', '--ministry', ministry || '', '--state', state || ''];
     
     const pythonProcess = spawn('python', [pythonScript, ...args]);
+    // Decode as a stream so multi-byte UTF-8 split across chunks stays intact
+    pythonProcess.stdout.setEncoding('utf8');
     let data = '';
     let error = '';
     
@@ -649,6 +651,7 @@ app.get('/api/schemes/:id', authenticateToken, async (req, res) => {
     const args = ['get_scheme', '--id', id];
     
     const pythonProcess = spawn('python', [pythonScript, ...args]);
+    pythonProcess.stdout.setEncoding('utf8');
     let data = '';
     let error = '';
     
@@ -690,6 +693,7 @@ app.get('/api/schemes/stats', authenticateToken, async (req, res) => {
     const args = ['get_stats'];
     
     const pythonProcess = spawn('python', [pythonScript, ...args]);
+    pythonProcess.stdout.setEncoding('utf8');
     let data = '';
     let error = '';
     
@@ -731,6 +735,7 @@ app.get('/api/schemes/states', authenticateToken, async (req, res) => {
     const args = ['get_states'];
     
     const pythonProcess = spawn('python', [pythonScript, ...args]);
+    pythonProcess.stdout.setEncoding('utf8');
     let data = '';
     let error = '';
     
@@ -772,6 +777,7 @@ app.post('/api/schemes/fetch', authenticateToken, async (req, res) => {
     const args = ['fetch_schemes'];
     
     const pythonProcess = spawn('python', [pythonScript, ...args]);
+    pythonProcess.stdout.setEncoding('utf8');
     let data = '';
     let error = '';
     